@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+动作计划编译器
+将JSON点击配置一次性校验并编译为不可变的动作计划：
+默认值在编译时解析完毕，执行时只需按类型分派、注入事件和等待
+
+repeat / for 循环块在计划中保持原样，执行时由 expand_actions 惰性展开，
+计划大小与配置文件成正比，与实际执行的动作数无关；
+网格、直线等图案动作同样只保存参数，坐标在执行时由 patterns 模块逐个生成
+"""
+
+import hashlib
+import json
+import operator
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+VALID_BUTTONS = ('left', 'right', 'middle')
+
+# 编译结果的格式版本，动作类型或编译输出变化时加1（使计划缓存中的旧条目失效）
+PLAN_VERSION = 3
+
+
+class ClickAction(NamedTuple):
+    """单击"""
+    x: int
+    y: int
+    button: str
+    delay_before: float
+
+
+class DoubleClickAction(NamedTuple):
+    """双击"""
+    x: int
+    y: int
+    delay_before: float
+
+
+class RightClickAction(NamedTuple):
+    """右键点击"""
+    x: int
+    y: int
+    delay_before: float
+
+
+class ContinuousClickAction(NamedTuple):
+    """连续点击"""
+    x: int
+    y: int
+    count: int
+    interval: float
+    delay_before: float
+
+
+class DragAction(NamedTuple):
+    """拖拽"""
+    start_x: int
+    start_y: int
+    end_x: int
+    end_y: int
+    duration: float
+    delay_before: float
+
+
+class WaitAction(NamedTuple):
+    """等待"""
+    time: float
+    delay_before: float
+
+
+class MoveAction(NamedTuple):
+    """移动鼠标"""
+    x: int
+    y: int
+    duration: float
+    delay_before: float
+
+
+class GridPattern(NamedTuple):
+    """网格点击：(x, y) 为第一格，共 columns 列 rows 行"""
+    x: int
+    y: int
+    columns: int
+    rows: int
+    spacing_x: int
+    spacing_y: int
+    snake: bool
+    button: str
+    interval: float
+    delay_before: float
+
+
+class LinePattern(NamedTuple):
+    """直线点击：起点到终点均匀取 count 个点，或指定 spacing 时每隔 spacing 像素取一个点"""
+    start_x: int
+    start_y: int
+    end_x: int
+    end_y: int
+    count: int
+    spacing: Optional[float]
+    button: str
+    interval: float
+    delay_before: float
+
+
+class PolylinePattern(NamedTuple):
+    """折线点击：依次点击各顶点，指定 spacing 时沿折线每隔 spacing 像素取一个点"""
+    points: Tuple[Tuple[int, int], ...]
+    spacing: Optional[float]
+    button: str
+    interval: float
+    delay_before: float
+
+
+class PointsFilePattern(NamedTuple):
+    """依次点击坐标文件中的点（执行时逐行读取）"""
+    path: str
+    button: str
+    interval: float
+    delay_before: float
+
+
+class RepeatBlock(NamedTuple):
+    """重复执行子动作 count 次（var 为可选的循环变量，取值 0..count-1）"""
+    count: int
+    var: Optional[str]
+    actions: Tuple[NamedTuple, ...]
+    delay_before: float
+
+
+class ForBlock(NamedTuple):
+    """
+    循环变量依次取值并执行子动作
+
+    values 不为 None 时依次取列表中的值，否则取 start 到 end（含）按 step 递增的整数；
+    start/end/step 可以是引用外层循环变量的表达式
+    """
+    var: str
+    start: Any
+    end: Any
+    step: Any
+    values: Optional[Tuple[int, ...]]
+    actions: Tuple[NamedTuple, ...]
+    delay_before: float
+
+
+class ActionTemplate(NamedTuple):
+    """坐标引用了循环变量的动作，执行时代入变量值生成具体动作"""
+    action: NamedTuple
+    bindings: Tuple[Tuple[str, Any], ...]
+
+
+class Var(NamedTuple):
+    """表达式：循环变量"""
+    name: str
+
+
+class BinOp(NamedTuple):
+    """表达式：二元运算"""
+    op: str
+    left: Any
+    right: Any
+
+
+class PlanSettings(NamedTuple):
+    """解析后的全局设置"""
+    default_delay: float
+    safety_delay: float
+    fail_safe: bool
+    max_rate: float
+
+
+class SequencePlan(NamedTuple):
+    """编译后的点击序列"""
+    name: str
+    actions: Tuple[NamedTuple, ...]
+
+
+class ActionPlan(NamedTuple):
+    """编译后的完整配置"""
+    description: str
+    settings: PlanSettings
+    sequences: Tuple[SequencePlan, ...]
+
+    def find_sequences(self, sequence_name: Optional[str] = None) -> Tuple[SequencePlan, ...]:
+        """返回要执行的序列（未指定名称时返回全部）"""
+        if not sequence_name:
+            return self.sequences
+        return tuple(seq for seq in self.sequences if seq.name == sequence_name)
+
+
+class PlanError(Exception):
+    """配置无法编译为动作计划"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__(f"配置文件存在 {len(errors)} 个错误")
+        self.errors = errors
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': operator.floordiv,
+    '%': operator.mod,
+}
+
+_TOKEN = re.compile(r'\s*(?:(\d+(?:\.\d+)?)|\$([A-Za-z_]\w*)|(//|[-+*/%()]))')
+_IDENTIFIER = re.compile(r'[A-Za-z_]\w*$')
+
+
+def evaluate(node: Any, env: Dict[str, Any]) -> Any:
+    """计算表达式的值（常量直接返回）"""
+    if type(node) is Var:
+        return env[node.name]
+    if type(node) is BinOp:
+        return _OPERATORS[node.op](evaluate(node.left, env), evaluate(node.right, env))
+    return node
+
+
+def _binop(op: str, left: Any, right: Any) -> Any:
+    # 常量折叠：两侧都是数字时直接计算
+    if _is_number(left) and _is_number(right):
+        return _OPERATORS[op](left, right)
+    return BinOp(op, left, right)
+
+
+def parse_expression(text: str, scope: Tuple[str, ...]) -> Any:
+    """
+    解析坐标表达式，如 "$x+5"、"100 + $row * 20"
+
+    支持数字、$变量、+ - * / // %、括号和负号；变量必须是外层循环定义的。
+
+    Raises:
+        ValueError: 表达式无效
+    """
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"无法识别 '{text[pos:].strip()}'")
+        number, name, op = match.groups()
+        if number is not None:
+            tokens.append(('num', float(number) if '.' in number else int(number)))
+        elif name is not None:
+            if name not in scope:
+                raise ValueError(f"未定义的循环变量 '${name}'")
+            tokens.append(('var', name))
+        else:
+            tokens.append(('op', op))
+        pos = match.end()
+    if not tokens:
+        raise ValueError("表达式为空")
+
+    index = 0
+
+    def peek():
+        return tokens[index] if index < len(tokens) else (None, None)
+
+    def take():
+        nonlocal index
+        token = peek()
+        index += 1
+        return token
+
+    def factor():
+        kind, value = take()
+        if kind == 'num':
+            return value
+        if kind == 'var':
+            return Var(value)
+        if (kind, value) == ('op', '-'):
+            return _binop('-', 0, factor())
+        if (kind, value) == ('op', '('):
+            node = expression()
+            if take() != ('op', ')'):
+                raise ValueError("括号不匹配")
+            return node
+        raise ValueError("表达式不完整")
+
+    def term():
+        node = factor()
+        while peek()[0] == 'op' and peek()[1] in ('*', '/', '//', '%'):
+            node = _binop(take()[1], node, factor())
+        return node
+
+    def expression():
+        node = term()
+        while peek()[0] == 'op' and peek()[1] in ('+', '-'):
+            node = _binop(take()[1], node, term())
+        return node
+
+    node = expression()
+    if index != len(tokens):
+        raise ValueError(f"多余的 '{tokens[index][1]}'")
+    return node
+
+
+class _ActionCompiler:
+    """单个动作的字段读取与校验，错误统一收集到 errors 中"""
+
+    def __init__(self, action: Dict[str, Any], where: str, errors: List[str], scope: Tuple[str, ...] = ()):
+        self.action = action
+        self.where = where
+        self.errors = errors
+        # 当前可见的循环变量
+        self.scope = scope
+        # 引用了循环变量的字段: (字段名, 表达式)
+        self.bindings: List[Tuple[str, Any]] = []
+        self.ok = True
+
+    def error(self, message: str):
+        self.errors.append(f"{self.where} {message}")
+        self.ok = False
+
+    def expr(self, field: str, default: Any = None) -> Any:
+        """读取数字或表达式字段，返回常量或表达式"""
+        if field not in self.action:
+            if default is None:
+                self.error(f"缺少字段 '{field}'")
+                return 0
+            return default
+        value = self.action[field]
+        if _is_number(value):
+            return value
+        if not isinstance(value, str):
+            self.error(f"字段 '{field}' 必须是数字或表达式")
+            return 0
+        try:
+            return parse_expression(value, self.scope)
+        except ValueError as e:
+            self.error(f"字段 '{field}' 表达式无效: {e}")
+            return 0
+
+    def coord(self, field: str) -> int:
+        value = self.expr(field)
+        if _is_number(value):
+            return int(value)
+        # 引用循环变量，执行时代入
+        self.bindings.append((field, value))
+        return 0
+
+    def var(self, required: bool) -> Optional[str]:
+        if 'var' not in self.action:
+            if required:
+                self.error("缺少字段 'var'")
+            return None
+        name = self.action['var']
+        if not isinstance(name, str) or not _IDENTIFIER.match(name):
+            self.error(f"循环变量名 '{name}' 无效")
+            return None
+        return name
+
+    def body(self, var: Optional[str]) -> Tuple[NamedTuple, ...]:
+        """编译循环块的子动作"""
+        actions = self.action.get('actions')
+        if not isinstance(actions, list) or not actions:
+            self.error("的 'actions' 必须是非空数组")
+            return ()
+        scope = self.scope + (var,) if var else self.scope
+        compiled = []
+        for j, sub in enumerate(actions, 1):
+            item = compile_action(sub, f"{self.where} 子动作 {j}", self.errors, scope)
+            if item is None:
+                self.ok = False
+            else:
+                compiled.append(item)
+        return tuple(compiled)
+
+    def number(self, field: str, default: Optional[float] = None, minimum: float = 0.0) -> float:
+        if field not in self.action:
+            if default is None:
+                self.error(f"缺少字段 '{field}'")
+                return 0.0
+            return default
+        value = self.action[field]
+        if not _is_number(value):
+            self.error(f"字段 '{field}' 必须是数字")
+            return 0.0
+        if value < minimum:
+            self.error(f"字段 '{field}' 不能小于 {minimum}")
+            return 0.0
+        return float(value)
+
+    def count(self, field: str) -> int:
+        if field not in self.action:
+            self.error(f"缺少字段 '{field}'")
+            return 0
+        value = self.action[field]
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            self.error(f"字段 '{field}' 必须是非负整数")
+            return 0
+        return value
+
+    def button(self) -> str:
+        value = self.action.get('button', 'left')
+        if value not in VALID_BUTTONS:
+            self.error(f"按钮 '{value}' 无效，应为 {', '.join(VALID_BUTTONS)} 之一")
+            return 'left'
+        return value
+
+
+def _compile_click(c: _ActionCompiler, delay_before: float):
+    return ClickAction(c.coord('x'), c.coord('y'), c.button(), delay_before)
+
+
+def _compile_double_click(c: _ActionCompiler, delay_before: float):
+    return DoubleClickAction(c.coord('x'), c.coord('y'), delay_before)
+
+
+def _compile_right_click(c: _ActionCompiler, delay_before: float):
+    return RightClickAction(c.coord('x'), c.coord('y'), delay_before)
+
+
+def _compile_continuous_click(c: _ActionCompiler, delay_before: float):
+    return ContinuousClickAction(c.coord('x'), c.coord('y'), c.count('count'),
+                                 c.number('interval', 1.0), delay_before)
+
+
+def _compile_drag(c: _ActionCompiler, delay_before: float):
+    return DragAction(c.coord('start_x'), c.coord('start_y'), c.coord('end_x'), c.coord('end_y'),
+                      c.number('duration', 1.0), delay_before)
+
+
+def _compile_wait(c: _ActionCompiler, delay_before: float):
+    return WaitAction(c.number('time'), delay_before)
+
+
+def _compile_move(c: _ActionCompiler, delay_before: float):
+    return MoveAction(c.coord('x'), c.coord('y'), c.number('duration', 0.5), delay_before)
+
+
+def _compile_grid(c: _ActionCompiler, delay_before: float):
+    return GridPattern(c.coord('x'), c.coord('y'), c.count('columns'), c.count('rows'),
+                       c.coord('spacing_x'), c.coord('spacing_y'), bool(c.action.get('snake', False)),
+                       c.button(), c.number('interval', 0.0), delay_before)
+
+
+def _compile_line(c: _ActionCompiler, delay_before: float):
+    start_x, start_y, end_x, end_y = c.coord('start_x'), c.coord('start_y'), c.coord('end_x'), c.coord('end_y')
+    count, spacing = 0, None
+    if 'spacing' in c.action:
+        spacing = c.number('spacing')
+        if c.ok and spacing <= 0:
+            c.error("字段 'spacing' 必须大于0")
+    else:
+        count = c.count('count')
+        if c.ok and count < 1:
+            c.error("字段 'count' 必须大于0")
+    return LinePattern(start_x, start_y, end_x, end_y, count, spacing,
+                       c.button(), c.number('interval', 0.0), delay_before)
+
+
+def _compile_polyline(c: _ActionCompiler, delay_before: float):
+    points = c.action.get('points')
+    if (not isinstance(points, list) or not points
+            or not all(isinstance(p, list) and len(p) == 2 and all(_is_number(v) for v in p) for p in points)):
+        c.error("字段 'points' 必须是非空的 [x, y] 坐标数组")
+        points = []
+    spacing = None
+    if 'spacing' in c.action:
+        spacing = c.number('spacing')
+        if c.ok and spacing <= 0:
+            c.error("字段 'spacing' 必须大于0")
+    return PolylinePattern(tuple((int(x), int(y)) for x, y in points), spacing,
+                           c.button(), c.number('interval', 0.0), delay_before)
+
+
+def _compile_points_file(c: _ActionCompiler, delay_before: float):
+    path = c.action.get('path')
+    if not isinstance(path, str) or not path:
+        c.error("字段 'path' 必须是坐标文件路径")
+        path = ''
+    return PointsFilePattern(path, c.button(), c.number('interval', 0.0), delay_before)
+
+
+def _compile_repeat(c: _ActionCompiler, delay_before: float):
+    var = c.var(required=False)
+    return RepeatBlock(c.count('count'), var, c.body(var), delay_before)
+
+
+def _compile_for(c: _ActionCompiler, delay_before: float):
+    var = c.var(required=True)
+    if 'values' in c.action:
+        values = c.action['values']
+        if not isinstance(values, list) or not all(_is_number(v) for v in values):
+            c.error("字段 'values' 必须是数字数组")
+            values = []
+        return ForBlock(var, 0, 0, 1, tuple(int(v) for v in values), c.body(var), delay_before)
+
+    start, end, step = c.expr('from'), c.expr('to'), c.expr('step', 1)
+    if _is_number(step) and step == 0:
+        c.error("字段 'step' 不能为0")
+    return ForBlock(var, start, end, step, None, c.body(var), delay_before)
+
+
+# 动作类型 -> 编译函数
+ACTION_COMPILERS = {
+    'click': _compile_click,
+    'double_click': _compile_double_click,
+    'right_click': _compile_right_click,
+    'continuous_click': _compile_continuous_click,
+    'drag': _compile_drag,
+    'wait': _compile_wait,
+    'move': _compile_move,
+    'grid': _compile_grid,
+    'line': _compile_line,
+    'polyline': _compile_polyline,
+    'points_file': _compile_points_file,
+    'repeat': _compile_repeat,
+    'for': _compile_for,
+}
+
+
+def compile_action(action: Any, where: str, errors: List[str], scope: Tuple[str, ...] = ()):
+    """
+    编译单个动作，失败时向 errors 追加错误并返回 None
+
+    scope 为外层循环定义的变量，坐标字段可以用表达式引用它们
+    """
+    if not isinstance(action, dict):
+        errors.append(f"{where} 必须是对象")
+        return None
+
+    if 'type' not in action:
+        errors.append(f"{where} 缺少 'type' 字段")
+        return None
+
+    action_type = action['type']
+    compiler = ACTION_COMPILERS.get(action_type)
+    if compiler is None:
+        errors.append(f"{where} 未知的动作类型 '{action_type}'")
+        return None
+
+    c = _ActionCompiler(action, where, errors, scope)
+    delay_before = c.number('delay_before', 0.0)
+    compiled = compiler(c, delay_before)
+    if not c.ok:
+        return None
+    if c.bindings:
+        return ActionTemplate(compiled, tuple(c.bindings))
+    return compiled
+
+
+def _loop_values(block: ForBlock, env: Dict[str, Any]) -> Iterable[int]:
+    if block.values is not None:
+        return block.values
+    start, end, step = (int(evaluate(v, env)) for v in (block.start, block.end, block.step))
+    if step == 0:
+        raise ValueError(f"循环 '${block.var}' 的步长为0")
+    # 终点包含在内
+    return range(start, end + (1 if step > 0 else -1), step)
+
+
+def _expand_block(block, env: Dict[str, Any]) -> Iterator[NamedTuple]:
+    if type(block) is RepeatBlock:
+        var, values = block.var, range(block.count)
+    else:
+        var, values = block.var, _loop_values(block, env)
+
+    # 循环变量可以遮蔽外层同名变量，循环结束后恢复
+    missing = object()
+    saved = env.get(var, missing) if var else missing
+    try:
+        for value in values:
+            if var:
+                env[var] = value
+            yield from expand_actions(block.actions, env)
+    finally:
+        if var:
+            if saved is missing:
+                env.pop(var, None)
+            else:
+                env[var] = saved
+
+
+def expand_actions(actions: Iterable[NamedTuple], env: Optional[Dict[str, Any]] = None) -> Iterator[NamedTuple]:
+    """
+    按执行顺序惰性展开循环块，产出具体动作
+
+    循环块的 delay_before 合并到块内第一个动作的 delay_before 上。
+    """
+    if env is None:
+        env = {}
+    for action in actions:
+        kind = type(action)
+        if kind is ActionTemplate:
+            yield action.action._replace(**{field: int(evaluate(expr, env)) for field, expr in action.bindings})
+        elif kind is RepeatBlock or kind is ForBlock:
+            delay = action.delay_before
+            for item in _expand_block(action, env):
+                if delay:
+                    item = item._replace(delay_before=item.delay_before + delay)
+                    delay = 0.0
+                yield item
+        else:
+            yield action
+
+
+def count_actions(actions: Iterable[NamedTuple]) -> Optional[int]:
+    """展开后的动作总数；循环范围依赖外层变量而无法静态确定时返回 None"""
+    total = 0
+    for action in actions:
+        kind = type(action)
+        if kind is RepeatBlock or kind is ForBlock:
+            inner = count_actions(action.actions)
+            if inner is None:
+                return None
+            if kind is RepeatBlock:
+                iterations = action.count
+            elif action.values is not None:
+                iterations = len(action.values)
+            elif all(_is_number(v) for v in (action.start, action.end, action.step)):
+                iterations = len(_loop_values(action, {}))
+            else:
+                return None
+            total += iterations * inner
+        else:
+            total += 1
+    return total
+
+
+def compile_settings(settings: Any, errors: List[str]) -> PlanSettings:
+    """解析全局设置并填充默认值"""
+    if settings is None:
+        settings = {}
+    if not isinstance(settings, dict):
+        errors.append("'settings' 必须是对象")
+        settings = {}
+
+    c = _ActionCompiler(settings, "settings", errors)
+    return PlanSettings(
+        default_delay=c.number('default_delay', 0.5),
+        safety_delay=c.number('safety_delay', 3.0),
+        fail_safe=bool(settings.get('fail_safe', True)),
+        # 大于0时启用极速模式：取消 pyautogui.PAUSE，按每秒动作数限速
+        max_rate=c.number('max_rate', 0.0),
+    )
+
+
+def compile_sequence(sequence: Any, index: int, errors: List[str]) -> Optional[SequencePlan]:
+    """编译单个序列，index 从1开始，用于错误提示"""
+    if not isinstance(sequence, dict):
+        errors.append(f"序列 {index} 必须是对象")
+        return None
+
+    if 'actions' not in sequence:
+        errors.append(f"序列 {index} 缺少 'actions' 字段")
+        return None
+
+    actions = sequence['actions']
+    if not isinstance(actions, list):
+        errors.append(f"序列 {index} 的 'actions' 必须是数组")
+        return None
+
+    compiled = []
+    for j, action in enumerate(actions, 1):
+        item = compile_action(action, f"序列 {index} 动作 {j}", errors)
+        if item is not None:
+            compiled.append(item)
+
+    return SequencePlan(sequence.get('name', '未命名序列'), tuple(compiled))
+
+
+class SequenceCache:
+    """
+    按序列内容复用编译结果（监视模式下重新加载配置时只编译变化的序列）
+
+    每次编译成功后提交为新一代，上一代中未再出现的序列自动丢弃；编译失败时保留上一代，
+    修复错误后仍可复用。只缓存没有错误的序列，出错的序列每次都重新编译以得到正确的错误位置。
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, SequencePlan] = {}
+        self._committed: Dict[str, SequencePlan] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(sequence: Any) -> str:
+        canonical = json.dumps(sequence, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def begin(self):
+        self.entries = {}
+        self.hits = self.misses = 0
+
+    def commit(self):
+        self._committed = self.entries
+
+    def compile(self, sequence: Any, index: int, errors: List[str]) -> Optional[SequencePlan]:
+        key = self.key(sequence)
+        item = self.entries.get(key) or self._committed.get(key)
+        if item is not None:
+            self.hits += 1
+            self.entries[key] = item
+            return item
+
+        self.misses += 1
+        error_count = len(errors)
+        item = compile_sequence(sequence, index, errors)
+        if item is not None and len(errors) == error_count:
+            self.entries[key] = item
+        return item
+
+
+def compile_config(config: Any, reuse: Optional[SequenceCache] = None) -> Tuple[Optional[ActionPlan], List[str]]:
+    """
+    将配置编译为动作计划
+
+    Args:
+        reuse: 序列缓存，提供时内容未变化的序列直接复用之前的编译结果
+
+    Returns:
+        (plan, errors): 存在错误时 plan 为 None
+    """
+    errors = []
+
+    if not isinstance(config, dict):
+        return None, ["配置文件顶层必须是对象"]
+
+    if 'click_sequences' not in config:
+        return None, ["缺少 'click_sequences' 字段"]
+
+    sequences = config['click_sequences']
+    if not isinstance(sequences, list):
+        return None, ["'click_sequences' 必须是数组"]
+
+    settings = compile_settings(config.get('settings'), errors)
+
+    if reuse is not None:
+        reuse.begin()
+
+    compiled = []
+    for i, sequence in enumerate(sequences, 1):
+        if reuse is not None:
+            item = reuse.compile(sequence, i, errors)
+        else:
+            item = compile_sequence(sequence, i, errors)
+        if item is not None:
+            compiled.append(item)
+
+    if errors:
+        return None, errors
+
+    if reuse is not None:
+        reuse.commit()
+    return ActionPlan(config.get('description', '无描述'), settings, tuple(compiled)), errors
@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入注入后端
+点击器、配置执行器和GUI都通过后端注入鼠标/键盘事件，
+不直接调用 pyautogui，便于无显示环境运行、性能测量和替换更快的注入方式
+"""
+
+import ctypes
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import startup_timing
+
+
+class BackendUnavailableError(RuntimeError):
+    """当前环境无法使用所选后端"""
+
+
+class FailSafeError(RuntimeError):
+    """鼠标位于屏幕左上角，安全保护触发"""
+
+
+class InputBackend:
+    """输入注入后端接口"""
+
+    name = 'base'
+
+    def configure(self, fail_safe: bool = True, pause: float = 0.1):
+        """设置安全保护和每次操作后的固定停顿"""
+        raise NotImplementedError
+
+    def click(self, x: int, y: int, button: str = 'left', clicks: int = 1, interval: float = 0.0):
+        raise NotImplementedError
+
+    def move(self, x: int, y: int, duration: float = 0.0, pause: bool = True):
+        """移动鼠标；pause=False 时省去操作后的固定停顿（回放鼠标轨迹时使用）"""
+        raise NotImplementedError
+
+    def mouse_down(self, x: int, y: int, button: str = 'left'):
+        raise NotImplementedError
+
+    def mouse_up(self, x: int, y: int, button: str = 'left'):
+        raise NotImplementedError
+
+    def drag(self, start_x: int, start_y: int, end_x: int, end_y: int,
+             duration: float = 0.0, button: str = 'left'):
+        raise NotImplementedError
+
+    def scroll(self, x: int, y: int, dy: int, dx: int = 0):
+        raise NotImplementedError
+
+    def key_down(self, key: str):
+        raise NotImplementedError
+
+    def key_up(self, key: str):
+        raise NotImplementedError
+
+    def position(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def screen_size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self):
+        """
+        批量注入：块内的事件尽量合并后一次性提交
+
+        默认实现不做任何合并，支持批量提交的后端（如 XTest）会覆盖它。
+        """
+        yield self
+
+    def close(self):
+        """释放后端占用的资源"""
+
+
+class PyAutoGUIBackend(InputBackend):
+    """基于 pyautogui 的默认后端"""
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        self._gui = startup_timing.load('pyautogui')
+
+    def configure(self, fail_safe: bool = True, pause: float = 0.1):
+        self._gui.FAILSAFE = fail_safe
+        self._gui.PAUSE = pause
+
+    def click(self, x, y, button='left', clicks=1, interval=0.0):
+        if clicks == 1:
+            self._gui.click(x, y, button=button)
+        else:
+            self._gui.click(x, y, clicks=clicks, interval=interval, button=button)
+
+    def move(self, x, y, duration=0.0, pause=True):
+        self._gui.moveTo(x, y, duration=duration, _pause=pause)
+
+    def mouse_down(self, x, y, button='left'):
+        self._gui.mouseDown(x, y, button=button)
+
+    def mouse_up(self, x, y, button='left'):
+        self._gui.mouseUp(x, y, button=button)
+
+    def drag(self, start_x, start_y, end_x, end_y, duration=0.0, button='left'):
+        self._gui.moveTo(start_x, start_y)
+        self._gui.dragTo(end_x, end_y, duration=duration, button=button)
+
+    def scroll(self, x, y, dy, dx=0):
+        if dy:
+            self._gui.scroll(int(dy), x=x, y=y)
+        if dx:
+            self._gui.hscroll(int(dx), x=x, y=y)
+
+    def key_down(self, key):
+        self._gui.keyDown(key)
+
+    def key_up(self, key):
+        self._gui.keyUp(key)
+
+    def position(self):
+        x, y = self._gui.position()
+        return x, y
+
+    def screen_size(self):
+        width, height = self._gui.size()
+        return width, height
+
+
+class InjectedEvent(NamedTuple):
+    """录制后端捕获的一次注入"""
+    timestamp: float
+    kind: str
+    args: tuple
+
+
+class RecordingBackend(InputBackend):
+    """
+    内存录制后端（不注入任何真实事件）
+
+    所有调用连同单调时钟时间戳记录在 events 中，
+    用于无显示环境运行配置、CI 校验和测量执行器自身开销。
+    """
+
+    name = 'recording'
+
+    def __init__(self, screen_size: Tuple[int, int] = (1920, 1080),
+                 clock: Callable[[], float] = time.perf_counter):
+        self.events: List[InjectedEvent] = []
+        self.clock = clock
+        self.fail_safe = True
+        self.pause = 0.0
+        self._size = screen_size
+        self._x = 0
+        self._y = 0
+
+    def _record(self, kind, *args):
+        self.events.append(InjectedEvent(self.clock(), kind, args))
+
+    def configure(self, fail_safe=True, pause=0.1):
+        self.fail_safe = fail_safe
+        self.pause = pause
+
+    def click(self, x, y, button='left', clicks=1, interval=0.0):
+        self._x, self._y = x, y
+        self._record('click', x, y, button, clicks)
+
+    def move(self, x, y, duration=0.0, pause=True):
+        self._x, self._y = x, y
+        self._record('move', x, y, duration)
+
+    def mouse_down(self, x, y, button='left'):
+        self._x, self._y = x, y
+        self._record('mouse_down', x, y, button)
+
+    def mouse_up(self, x, y, button='left'):
+        self._x, self._y = x, y
+        self._record('mouse_up', x, y, button)
+
+    def drag(self, start_x, start_y, end_x, end_y, duration=0.0, button='left'):
+        self._x, self._y = end_x, end_y
+        self._record('drag', start_x, start_y, end_x, end_y, duration, button)
+
+    def scroll(self, x, y, dy, dx=0):
+        self._record('scroll', x, y, dy, dx)
+
+    def key_down(self, key):
+        self._record('key_down', key)
+
+    def key_up(self, key):
+        self._record('key_up', key)
+
+    def position(self):
+        return self._x, self._y
+
+    def screen_size(self):
+        return self._size
+
+    def summary(self) -> Dict[str, int]:
+        """按事件类型统计次数"""
+        counts: Dict[str, int] = {}
+        for event in self.events:
+            counts[event.kind] = counts.get(event.kind, 0) + 1
+        return counts
+
+
+class NullBackend(RecordingBackend):
+    """
+    丢弃事件的后端（不注入任何真实事件）
+
+    只按事件类型计数，内存占用不随运行时间增长，适合长时间或反复运行配置（-b null）。
+    """
+
+    name = 'null'
+
+    def __init__(self, screen_size: Tuple[int, int] = (1920, 1080),
+                 clock: Callable[[], float] = time.perf_counter):
+        super().__init__(screen_size, clock)
+        self.counts: Dict[str, int] = {}
+
+    def _record(self, kind, *args):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def summary(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+class SimulatedBackend(RecordingBackend):
+    """
+    模拟耗时的录制后端（--dry-run 使用）
+
+    按 pyautogui 的行为推进虚拟时钟：移动/拖拽的持续时间、
+    多次点击之间的间隔，以及每次调用后的固定停顿 (PAUSE)。
+    """
+
+    name = 'simulated'
+
+    def __init__(self, clock, screen_size: Tuple[int, int] = (1920, 1080)):
+        super().__init__(screen_size, clock)
+
+    def _spend(self, seconds: float, calls: int = 1):
+        self.clock.advance(seconds + self.pause * calls)
+
+    def click(self, x, y, button='left', clicks=1, interval=0.0):
+        super().click(x, y, button, clicks, interval)
+        self._spend(interval * (clicks - 1))
+
+    def move(self, x, y, duration=0.0, pause=True):
+        super().move(x, y, duration)
+        self._spend(duration, calls=int(pause))
+
+    def mouse_down(self, x, y, button='left'):
+        super().mouse_down(x, y, button)
+        self._spend(0.0)
+
+    def mouse_up(self, x, y, button='left'):
+        super().mouse_up(x, y, button)
+        self._spend(0.0)
+
+    def drag(self, start_x, start_y, end_x, end_y, duration=0.0, button='left'):
+        super().drag(start_x, start_y, end_x, end_y, duration, button)
+        # 与 PyAutoGUIBackend 一致：moveTo + dragTo 两次调用
+        self._spend(duration, calls=2)
+
+    def scroll(self, x, y, dy, dx=0):
+        super().scroll(x, y, dy, dx)
+        self._spend(0.0, calls=int(bool(dy)) + int(bool(dx)))
+
+    def key_down(self, key):
+        super().key_down(key)
+        self._spend(0.0)
+
+    def key_up(self, key):
+        super().key_up(key)
+        self._spend(0.0)
+
+
+_xlib = None
+
+
+def _load_xlib():
+    """加载 libX11 和 libXtst 并声明用到的函数签名（每个进程只加载一次）"""
+    global _xlib
+    if _xlib is not None:
+        return _xlib
+    # ctypes.util 会导入 subprocess、shutil 等模块，只在使用 XTest 后端时加载
+    import ctypes.util
+
+    x11_path = ctypes.util.find_library('X11')
+    xtst_path = ctypes.util.find_library('Xtst')
+    if not x11_path or not xtst_path:
+        raise BackendUnavailableError("未找到 libX11/libXtst，请安装 libxtst6（Debian/Ubuntu）或 libXtst（Fedora）")
+
+    x11 = ctypes.CDLL(x11_path)
+    xtst = ctypes.CDLL(xtst_path)
+
+    display_p = ctypes.c_void_p
+    x11.XInitThreads.restype = ctypes.c_int
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = display_p
+    x11.XCloseDisplay.argtypes = [display_p]
+    x11.XDefaultScreen.argtypes = [display_p]
+    x11.XDefaultScreen.restype = ctypes.c_int
+    x11.XRootWindow.argtypes = [display_p, ctypes.c_int]
+    x11.XRootWindow.restype = ctypes.c_ulong
+    x11.XDisplayWidth.argtypes = [display_p, ctypes.c_int]
+    x11.XDisplayWidth.restype = ctypes.c_int
+    x11.XDisplayHeight.argtypes = [display_p, ctypes.c_int]
+    x11.XDisplayHeight.restype = ctypes.c_int
+    x11.XFlush.argtypes = [display_p]
+    x11.XSync.argtypes = [display_p, ctypes.c_int]
+    x11.XStringToKeysym.argtypes = [ctypes.c_char_p]
+    x11.XStringToKeysym.restype = ctypes.c_ulong
+    x11.XKeysymToKeycode.argtypes = [display_p, ctypes.c_ulong]
+    x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+    x11.XQueryPointer.argtypes = [
+        display_p, ctypes.c_ulong,
+        ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_uint),
+    ]
+    x11.XQueryPointer.restype = ctypes.c_int
+
+    int_p = ctypes.POINTER(ctypes.c_int)
+    xtst.XTestQueryExtension.argtypes = [display_p, int_p, int_p, int_p, int_p]
+    xtst.XTestQueryExtension.restype = ctypes.c_int
+    xtst.XTestFakeMotionEvent.argtypes = [display_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+    xtst.XTestFakeButtonEvent.argtypes = [display_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+    xtst.XTestFakeKeyEvent.argtypes = [display_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+
+    # GUI会在多个线程中使用同一个连接，必须在打开连接前调用
+    x11.XInitThreads()
+    _xlib = (x11, xtst)
+    return _xlib
+
+
+# pyautogui 按键名称 -> X keysym 名称
+_X_KEY_NAMES = {
+    'enter': 'Return', 'return': 'Return', 'esc': 'Escape', 'escape': 'Escape',
+    'tab': 'Tab', 'space': 'space', 'backspace': 'BackSpace', 'delete': 'Delete',
+    'del': 'Delete', 'insert': 'Insert', 'home': 'Home', 'end': 'End',
+    'pageup': 'Prior', 'pagedown': 'Next', 'up': 'Up', 'down': 'Down',
+    'left': 'Left', 'right': 'Right', 'capslock': 'Caps_Lock',
+    'shift': 'Shift_L', 'shiftleft': 'Shift_L', 'shiftright': 'Shift_R',
+    'ctrl': 'Control_L', 'ctrlleft': 'Control_L', 'ctrlright': 'Control_R',
+    'alt': 'Alt_L', 'altleft': 'Alt_L', 'altright': 'Alt_R',
+    'win': 'Super_L', 'winleft': 'Super_L', 'winright': 'Super_R',
+    'cmd': 'Super_L', 'command': 'Super_L',
+}
+
+# 鼠标按钮名称 -> X 按钮编号
+_X_BUTTONS = {'left': 1, 'middle': 2, 'right': 3}
+_X_SCROLL_UP, _X_SCROLL_DOWN, _X_SCROLL_LEFT, _X_SCROLL_RIGHT = 4, 5, 6, 7
+
+# 平滑移动/拖拽时每秒的插值步数
+_X_MOVE_STEPS_PER_SECOND = 120
+
+
+class XTestBackend(InputBackend):
+    """
+    基于 X11 XTest 扩展的原生注入后端（Linux）
+
+    通过 ctypes 直接调用 libXtst，始终复用同一个显示连接；
+    一次点击的移动、按下、释放在同一次 XFlush 中提交，
+    batch() 块内的所有事件则合并到块结束时再提交。
+    """
+
+    name = 'xtest'
+
+    def __init__(self, display: Optional[str] = None):
+        self._x11, self._xtst = _load_xlib()
+        display_name = display or os.environ.get('DISPLAY')
+        if not display_name:
+            raise BackendUnavailableError("未设置 DISPLAY，无法连接 X 服务器")
+
+        self._display = self._x11.XOpenDisplay(display_name.encode())
+        if not self._display:
+            raise BackendUnavailableError(f"无法连接 X 显示 {display_name}")
+
+        dummy = ctypes.c_int()
+        if not self._xtst.XTestQueryExtension(self._display, ctypes.byref(dummy), ctypes.byref(dummy),
+                                              ctypes.byref(dummy), ctypes.byref(dummy)):
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+            raise BackendUnavailableError(f"X 显示 {display_name} 不支持 XTest 扩展")
+
+        self.display_name = display_name
+        self._screen = self._x11.XDefaultScreen(self._display)
+        self._root = self._x11.XRootWindow(self._display, self._screen)
+        self._keycodes: Dict[str, int] = {}
+        self._batch_depth = 0
+        self.fail_safe = True
+        self.pause = 0.1
+
+    # ---- 底层事件 ----
+
+    def _flush(self):
+        if self._batch_depth == 0:
+            self._x11.XFlush(self._display)
+
+    def _after(self, pause=True):
+        """提交事件并执行固定停顿（与 pyautogui.PAUSE 语义一致）"""
+        self._flush()
+        if pause and self.pause > 0 and self._batch_depth == 0:
+            time.sleep(self.pause)
+
+    def _check_fail_safe(self):
+        # 需要一次服务器往返：批量块内只在进入时检查一次，极速场景也可通过 configure(fail_safe=False) 关闭
+        if self.fail_safe and self._batch_depth == 0 and self.position() == (0, 0):
+            raise FailSafeError("鼠标位于屏幕左上角，安全保护已触发")
+
+    def _motion(self, x, y):
+        self._xtst.XTestFakeMotionEvent(self._display, self._screen, int(x), int(y), 0)
+
+    def _button(self, button, pressed):
+        self._xtst.XTestFakeButtonEvent(self._display, button, 1 if pressed else 0, 0)
+
+    def _glide(self, x, y, duration):
+        """从当前位置按线性插值移动到 (x, y)"""
+        start_x, start_y = self.position()
+        steps = max(1, int(duration * _X_MOVE_STEPS_PER_SECOND))
+        step_time = duration / steps
+        deadline = time.perf_counter()
+        for i in range(1, steps + 1):
+            self._motion(start_x + (x - start_x) * i / steps, start_y + (y - start_y) * i / steps)
+            self._x11.XFlush(self._display)
+            deadline += step_time
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _keycode(self, key: str) -> int:
+        keycode = self._keycodes.get(key)
+        if keycode is None:
+            name = _X_KEY_NAMES.get(key.lower())
+            if name is None and len(key) > 1 and key[0] in 'fF' and key[1:].isdigit():
+                name = key.upper()
+            if name is not None:
+                keysym = self._x11.XStringToKeysym(name.encode())
+            elif len(key) == 1:
+                # Latin-1 字符的 keysym 就是其编码，其他 Unicode 字符使用 0x01000000 前缀
+                code = ord(key)
+                keysym = code if code < 0x100 else 0x01000000 | code
+            else:
+                keysym = self._x11.XStringToKeysym(key.encode())
+            keycode = self._x11.XKeysymToKeycode(self._display, keysym) if keysym else 0
+            if not keycode:
+                raise ValueError(f"无法映射按键 '{key}'")
+            self._keycodes[key] = keycode
+        return keycode
+
+    # ---- InputBackend 接口 ----
+
+    def configure(self, fail_safe=True, pause=0.1):
+        self.fail_safe = fail_safe
+        self.pause = pause
+
+    def click(self, x, y, button='left', clicks=1, interval=0.0):
+        self._check_fail_safe()
+        code = _X_BUTTONS[button]
+        self._motion(x, y)
+        for i in range(clicks):
+            if i and interval > 0:
+                self._flush()
+                time.sleep(interval)
+            self._button(code, True)
+            self._button(code, False)
+        self._after()
+
+    def move(self, x, y, duration=0.0, pause=True):
+        self._check_fail_safe()
+        if duration > 0:
+            self._glide(x, y, duration)
+        else:
+            self._motion(x, y)
+        self._after(pause)
+
+    def mouse_down(self, x, y, button='left'):
+        self._check_fail_safe()
+        self._motion(x, y)
+        self._button(_X_BUTTONS[button], True)
+        self._after()
+
+    def mouse_up(self, x, y, button='left'):
+        # 不检查安全保护：按钮已按下时中止会让它一直处于按下状态
+        self._motion(x, y)
+        self._button(_X_BUTTONS[button], False)
+        self._after()
+
+    def drag(self, start_x, start_y, end_x, end_y, duration=0.0, button='left'):
+        self._check_fail_safe()
+        code = _X_BUTTONS[button]
+        self._motion(start_x, start_y)
+        self._button(code, True)
+        if duration > 0:
+            self._x11.XFlush(self._display)
+            self._glide(end_x, end_y, duration)
+        else:
+            self._motion(end_x, end_y)
+        self._button(code, False)
+        self._after()
+
+    def scroll(self, x, y, dy, dx=0):
+        self._check_fail_safe()
+        self._motion(x, y)
+        for amount, positive, negative in ((dy, _X_SCROLL_UP, _X_SCROLL_DOWN),
+                                           (dx, _X_SCROLL_RIGHT, _X_SCROLL_LEFT)):
+            code = positive if amount > 0 else negative
+            for _ in range(abs(int(amount))):
+                self._button(code, True)
+                self._button(code, False)
+        self._after()
+
+    def key_down(self, key):
+        self._xtst.XTestFakeKeyEvent(self._display, self._keycode(key), 1, 0)
+        self._after()
+
+    def key_up(self, key):
+        self._xtst.XTestFakeKeyEvent(self._display, self._keycode(key), 0, 0)
+        self._after()
+
+    def position(self):
+        root, child = ctypes.c_ulong(), ctypes.c_ulong()
+        root_x, root_y, win_x, win_y = ctypes.c_int(), ctypes.c_int(), ctypes.c_int(), ctypes.c_int()
+        mask = ctypes.c_uint()
+        self._x11.XQueryPointer(self._display, self._root, ctypes.byref(root), ctypes.byref(child),
+                                ctypes.byref(root_x), ctypes.byref(root_y),
+                                ctypes.byref(win_x), ctypes.byref(win_y), ctypes.byref(mask))
+        return root_x.value, root_y.value
+
+    def screen_size(self):
+        return (self._x11.XDisplayWidth(self._display, self._screen),
+                self._x11.XDisplayHeight(self._display, self._screen))
+
+    @contextmanager
+    def batch(self):
+        self._check_fail_safe()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            self._after()
+
+    def sync(self):
+        """等待 X 服务器处理完所有已提交的事件"""
+        self._x11.XSync(self._display, 0)
+
+    def close(self):
+        if self._display:
+            self._x11.XSync(self._display, 0)
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+class LazyBackend(InputBackend):
+    """
+    首次使用时才创建的后端
+
+    图形界面用它在窗口显示之后（可在后台线程中调用 load()）再导入 pyautogui；
+    加载完成前调用任何注入方法都会等待加载结束。configure 的设置在加载后应用。
+    """
+
+    def __init__(self, name: str = 'pyautogui', **options):
+        self.name = name
+        self._options = options
+        self._backend: Optional[InputBackend] = None
+        self._settings = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._backend is not None
+
+    def load(self) -> InputBackend:
+        """创建被包装的后端（线程安全，只创建一次）"""
+        backend = self._backend
+        if backend is not None:
+            return backend
+        with self._lock:
+            if self._backend is None:
+                backend = create_backend(self.name, **self._options)
+                if self._settings is not None:
+                    backend.configure(**self._settings)
+                self._backend = backend
+        return self._backend
+
+    def configure(self, fail_safe=True, pause=0.1):
+        with self._lock:
+            if self._backend is None:
+                self._settings = {'fail_safe': fail_safe, 'pause': pause}
+                return
+        self._backend.configure(fail_safe=fail_safe, pause=pause)
+
+    def click(self, x, y, button='left', clicks=1, interval=0.0):
+        self.load().click(x, y, button=button, clicks=clicks, interval=interval)
+
+    def move(self, x, y, duration=0.0, pause=True):
+        self.load().move(x, y, duration=duration, pause=pause)
+
+    def mouse_down(self, x, y, button='left'):
+        self.load().mouse_down(x, y, button=button)
+
+    def mouse_up(self, x, y, button='left'):
+        self.load().mouse_up(x, y, button=button)
+
+    def drag(self, start_x, start_y, end_x, end_y, duration=0.0, button='left'):
+        self.load().drag(start_x, start_y, end_x, end_y, duration=duration, button=button)
+
+    def scroll(self, x, y, dy, dx=0):
+        self.load().scroll(x, y, dy, dx)
+
+    def key_down(self, key):
+        self.load().key_down(key)
+
+    def key_up(self, key):
+        self.load().key_up(key)
+
+    def position(self):
+        return self.load().position()
+
+    def screen_size(self):
+        return self.load().screen_size()
+
+    @contextmanager
+    def batch(self):
+        with self.load().batch():
+            yield self
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+
+
+# 后端名称 -> 后端类
+BACKENDS = {
+    'pyautogui': PyAutoGUIBackend,
+    'recording': RecordingBackend,
+    'null': NullBackend,
+    'xtest': XTestBackend,
+}
+
+
+def create_backend(name: str = 'pyautogui', **options) -> InputBackend:
+    """
+    按名称创建注入后端
+
+    Raises:
+        ValueError: 未知的后端名称
+        BackendUnavailableError: 当前环境无法使用该后端
+    """
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的注入后端 '{name}'，可选: {', '.join(BACKENDS)}")
+    return backend_class(**options)
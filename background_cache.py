@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+背景图片缓存
+缩放后的背景以 "原图路径、修改时间和大小 + 目标尺寸 + 格式版本" 的 SHA-256 为键缓存为 PPM 文件，
+Tk 的 PhotoImage 可直接解码，再次启动时无需导入 PIL，也不再解码原图和重新缩放；
+计算键只需一次 stat，不读取原图内容。缓存未命中时原图只解码一次，之后的尺寸从内存中的副本缩放
+"""
+
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Optional, Set, Tuple
+
+import startup_timing
+
+# 缓存文件的格式版本，缩放方式变化时提升即可使旧文件全部失效
+CACHE_VERSION = 1
+
+# 最多保留的缓存文件数（调整窗口大小会产生不同尺寸的缓存）
+MAX_ENTRIES = 16
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'zmhtools-dianjiqi', 'backgrounds')
+
+
+class BackgroundCache:
+    """
+    按原图（路径、修改时间、大小）和尺寸缓存缩放后的背景图片
+
+    用法:
+        cache = BackgroundCache("background.png")
+        path = cache.lookup((600, 700))          # 命中时返回 PPM 文件路径
+        if path is None:
+            path = cache.render((600, 700))      # 需要 PIL，可在后台线程中调用
+        photo = tk.PhotoImage(file=path)
+        cache.discard(path)                      # 缓存目录不可写时 render 返回的是临时文件
+    """
+
+    def __init__(self, source: str, directory: Optional[str] = None):
+        self.source = source
+        self.directory = os.fspath(directory) if directory is not None else default_cache_dir()
+        self._identity: Optional[str] = None
+        # 解码并转换为RGB后的原图，首次缩放时加载；多个缩放线程共用
+        self._image = None
+        self._image_lock = threading.Lock()
+        # render 写入系统临时目录（而非缓存目录）的文件
+        self._temporary: Set[str] = set()
+
+    def _source_identity(self) -> str:
+        """原图的标识：替换或修改原图后修改时间或大小会变化，缓存随之失效"""
+        if self._identity is None:
+            path = os.path.abspath(self.source)
+            stat = os.stat(path)
+            self._identity = f"{CACHE_VERSION}\0{path}\0{stat.st_mtime_ns}\0{stat.st_size}"
+        return self._identity
+
+    def _path(self, size: Tuple[int, int]) -> str:
+        key = hashlib.sha256(f"{self._source_identity()}:{size[0]}x{size[1]}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.ppm")
+
+    def lookup(self, size: Tuple[int, int]) -> Optional[str]:
+        """返回已缓存的缩放结果路径，未命中时返回 None"""
+        try:
+            path = self._path(size)
+            # 更新修改时间，清理旧缓存时保留最近用过的尺寸
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def render(self, size: Tuple[int, int]) -> str:
+        """
+        用 PIL 缩放原图并写入缓存，返回 PPM 文件路径
+
+        只读取文件、不访问 Tk，可在后台线程中调用。缓存目录无法创建或写入（只读、磁盘已满）时
+        改为写入系统临时目录，只是不缓存；调用方加载后用 discard 删除该文件。
+        """
+        Image = startup_timing.load('PIL.Image')
+        scaled = self._source_image().resize(size, Image.Resampling.LANCZOS)
+
+        path = self._path(size)
+        try:
+            self._store(scaled, path)
+        except OSError:
+            path = self._write(scaled, None, '.ppm')
+            self._temporary.add(path)
+            return path
+        self._prune()
+        return path
+
+    def discard(self, path: str):
+        """删除 render 写入系统临时目录的文件；缓存中的文件保留"""
+        if path in self._temporary:
+            self._temporary.discard(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _source_image(self):
+        """返回解码后的原图（只解码一次）"""
+        with self._image_lock:
+            if self._image is None:
+                Image = startup_timing.load('PIL.Image')
+                with Image.open(self.source) as image:
+                    # 转换为RGB模式以确保兼容性（PPM 不支持透明通道）；convert 总是返回新图像，
+                    # 关闭文件后仍可使用
+                    self._image = image.convert('RGB')
+            return self._image
+
+    def _store(self, image, path: str):
+        """原子地写入缓存文件"""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        tmp = self._write(image, self.directory, '.tmp')
+        try:
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @staticmethod
+    def _write(image, directory: Optional[str], suffix: str) -> str:
+        """把图像以 PPM 格式写入 directory（None 为系统临时目录）中的新文件，返回其路径"""
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='zmh-background-', suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, 'PPM')
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return tmp
+
+    def _prune(self):
+        """只保留最近使用的 MAX_ENTRIES 个缓存文件"""
+        try:
+            entries = sorted(glob.glob(os.path.join(self.directory, '*.ppm')), key=os.path.getmtime, reverse=True)
+            for stale in entries[MAX_ENTRIES:]:
+                os.remove(stale)
+        except OSError:
+            pass
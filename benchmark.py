@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试
+在录制后端上无头运行 ConfigExecutor、MouseClicker.continuous_click 和录制回放（GUI 回放线程的核心），
+测量吞吐量、单个动作的开销、调度抖动百分位数和回放时间误差，
+结果写入JSON文件，可与之前的结果比较以发现性能退化
+
+用法:
+    python benchmark.py -o results.json
+    python benchmark.py -o new.json --compare results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+from backends import RecordingBackend
+from config_executor import ConfigExecutor
+from mouse_clicker import MouseClicker
+from recording import Button, EventCode, MappedRecording, RecordingBuffer, Replayer
+from structured_log import StructuredLogger
+
+# 结果文件的格式版本
+RESULT_VERSION = 1
+
+# 比较时检查的指标: (指标路径, 越大越好)；带间隔的测试只比较抖动
+THROUGHPUT_METRICS = (('actions_per_second', True), ('overhead_us', False))
+TIMING_METRICS = (('jitter_ms.p99', False),)
+
+# 抖动低于该值（毫秒）时的变化视为噪声，不判定为退化
+JITTER_FLOOR_MS = 1.0
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """样本（秒）的 p50/p90/p99/最大值/平均值，单位毫秒"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    result = {f"p{p}": ordered[round(p / 100 * last)] * 1000 for p in (50, 90, 99)}
+    result['max'] = ordered[-1] * 1000
+    result['mean'] = sum(ordered) / len(ordered) * 1000
+    return result
+
+
+def timing_errors(timestamps: Sequence[float], offsets: Sequence[float]) -> List[float]:
+    """每个事件相对第一个事件的实际时刻与计划时刻之差的绝对值"""
+    if not timestamps:
+        return []
+    origin = timestamps[0]
+    return [abs((t - origin) - offset) for t, offset in zip(timestamps, offsets)]
+
+
+def throughput(count: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        'count': count,
+        'elapsed': elapsed,
+        'actions_per_second': count / elapsed if elapsed > 0 else 0.0,
+        'overhead_us': elapsed / count * 1_000_000 if count else 0.0,
+    }
+
+
+def _write_config(path: str, count: int, default_delay: float):
+    actions = [{'type': 'click', 'x': 100 + i % 500, 'y': 100 + i % 300} for i in range(count)]
+    config = {
+        'settings': {'safety_delay': 0, 'default_delay': default_delay},
+        'click_sequences': [{'name': 'benchmark', 'actions': actions}],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+
+
+def bench_executor(workdir: str, count: int, default_delay: float) -> Dict[str, Any]:
+    """ConfigExecutor 执行 count 个点击动作（逐动作日志由后台线程写入空设备，与真实执行的路径相同）"""
+    path = os.path.join(workdir, f"executor-{count}-{default_delay:g}.json")
+    _write_config(path, count, default_delay)
+    backend = RecordingBackend()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        log = StructuredLogger(stream=devnull)
+        started = time.perf_counter()
+        executor = ConfigExecutor(path, backend=backend, cache=False, log=log)
+        executor.compile_plan()
+        compiled = time.perf_counter()
+        executor.execute_sequence()
+        finished = time.perf_counter()
+        log.close()
+
+    timestamps = [event.timestamp for event in backend.events]
+    result = throughput(len(timestamps), finished - compiled)
+    result['compile_seconds'] = compiled - started
+    if default_delay > 0:
+        result['interval'] = default_delay
+        result['jitter_ms'] = percentiles(timing_errors(timestamps, [i * default_delay for i in range(count)]))
+    return result
+
+
+def bench_continuous_click(count: int, interval: float) -> Dict[str, Any]:
+    """MouseClicker.continuous_click 连续点击 count 次"""
+    backend = RecordingBackend()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        log = StructuredLogger(stream=devnull)
+        clicker = MouseClicker(backend=backend, log=log)
+        started = time.perf_counter()
+        clicker.continuous_click(100, 100, count, interval)
+        elapsed = time.perf_counter() - started
+        log.close()
+
+    timestamps = [event.timestamp for event in backend.events]
+    result = throughput(len(timestamps), elapsed)
+    if interval > 0:
+        result['interval'] = interval
+        result['jitter_ms'] = percentiles(timing_errors(timestamps, [i * interval for i in range(count)]))
+    return result
+
+
+def _recording(count: int, interval: float) -> RecordingBuffer:
+    buffer = RecordingBuffer()
+    for i in range(count):
+        buffer.append(EventCode.CLICK, 100 + i % 500, 100 + i % 300, interval if i else 0.0, Button.LEFT)
+    return buffer
+
+
+def bench_replay(workdir: str, count: int, interval: float) -> Dict[str, Any]:
+    """
+    从内存映射的录制文件回放 count 次点击（与 GUI 加载录制后的回放路径相同）
+
+    回放日志写入列表，代替 GUI 的日志队列。
+    """
+    buffer = _recording(count, interval)
+    path = os.path.join(workdir, f"replay-{count}-{interval:g}.zrec")
+    buffer.save(path)
+
+    backend = RecordingBackend()
+    log: List[str] = []
+    with MappedRecording(path) as recording:
+        replayer = Replayer(backend, recording.keys, log=log.append)
+        started = time.perf_counter()
+        played = replayer.play(recording)
+        elapsed = time.perf_counter() - started
+
+    result = throughput(played, elapsed)
+    if interval > 0:
+        # 录制中的事件间隔即计划时刻，误差为回放相对录制的时间偏差
+        timestamps = [event.timestamp for event in backend.events]
+        result['interval'] = interval
+        result['jitter_ms'] = percentiles(timing_errors(timestamps, [i * interval for i in range(count)]))
+    return result
+
+
+def run_benchmarks(scale: float = 1.0) -> Dict[str, Dict[str, Any]]:
+    """运行全部基准测试，scale 按比例缩放动作数"""
+    def n(count):
+        return max(int(count * scale), 10)
+
+    benchmarks = (
+        ('executor_throughput', lambda d: bench_executor(d, n(20000), 0.0)),
+        ('executor_timing', lambda d: bench_executor(d, n(500), 0.002)),
+        ('continuous_click_throughput', lambda d: bench_continuous_click(n(20000), 0.0)),
+        ('continuous_click_timing', lambda d: bench_continuous_click(n(500), 0.002)),
+        ('replay_throughput', lambda d: bench_replay(d, n(50000), 0.0)),
+        ('replay_timing', lambda d: bench_replay(d, n(500), 0.002)),
+    )
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='zmh-bench-') as workdir:
+        for name, bench in benchmarks:
+            print(f"运行 {name}...", flush=True)
+            results[name] = bench(workdir)
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def _metric(result: Dict[str, Any], path: str):
+    value: Any = result
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def print_results(results: Dict[str, Dict[str, Any]]):
+    print("\n=== 基准测试结果 ===")
+    for name, result in results.items():
+        line = (f"{name}: {result['actions_per_second']:.0f} 次/秒，"
+                f"单个动作 {result['overhead_us']:.1f} 微秒")
+        jitter = result.get('jitter_ms')
+        if jitter:
+            line += (f"，间隔 {result['interval'] * 1000:g} 毫秒时误差 p50 {jitter['p50']:.3f} / "
+                     f"p90 {jitter['p90']:.3f} / p99 {jitter['p99']:.3f} / 最大 {jitter['max']:.3f} 毫秒")
+        print(line)
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """与基线结果比较，打印变化并返回超出容差的退化项"""
+    regressions = []
+    print(f"\n=== 与基线比较（容差 {tolerance:.0%}）===")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        metrics = TIMING_METRICS if 'interval' in result else THROUGHPUT_METRICS
+        for path, higher_is_better in metrics:
+            new, old = _metric(result, path), _metric(baseline[name], path)
+            if new is None or old is None or old == 0:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            regressed = worse > tolerance
+            if path.startswith('jitter_ms') and new < JITTER_FLOOR_MS:
+                regressed = False
+            mark = "  <-- 退化" if regressed else ""
+            print(f"{name} {path}: {old:.3f} -> {new:.3f} ({change:+.1%}){mark}")
+            if regressed:
+                regressions.append(f"{name} {path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='点击器性能基准测试')
+    parser.add_argument('--output', '-o', default='benchmark-results.json', help='结果JSON文件路径')
+    parser.add_argument('--compare', '-c', metavar='BASELINE', help='与之前的结果文件比较')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='比较时允许的相对退化幅度（默认0.25，即25%%）')
+    parser.add_argument('--quick', action='store_true', help='快速模式：动作数缩小为1/10')
+
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"错误：无法读取基线文件 {args.compare} - {e}")
+            sys.exit(1)
+        if baseline.get('version') != RESULT_VERSION:
+            print(f"错误：基线文件格式版本 {baseline.get('version')} 与当前版本 {RESULT_VERSION} 不一致")
+            sys.exit(1)
+
+    results = run_benchmarks(0.1 if args.quick else 1.0)
+    report = {
+        'version': RESULT_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_results(results)
+    print(f"\n结果已写入 {args.output}")
+
+    if baseline is not None:
+        if baseline.get('quick') != args.quick:
+            print("注意：基线与本次运行的规模不同（--quick），吞吐量不完全可比")
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能退化: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n未发现性能退化")
+
+
+if __name__ == '__main__':
+    main()
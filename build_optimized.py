@@ -4,8 +4,13 @@
 优化的构建脚本
 自动检测平台并执行相应的构建流程
 包含错误恢复和重试机制
+
+--fast-start 构建以启动速度为目标的版本：目录模式（不再每次启动解压到临时目录）、
+以 -O 预编译字节码、排除用不到的标准库和 PIL 图片格式插件、不使用 UPX；
+--bench 在构建后运行 startup_benchmark.py 测量启动时间
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -102,14 +107,111 @@ def install_dependencies(activate_cmd):
     print("✅ 依赖安装完成")
     return True
 
-def build_executable(activate_cmd):
+# 快速启动版本排除的标准库模块（程序运行时不会导入）
+FAST_START_EXCLUDES = [
+    'unittest', 'doctest', 'pydoc', 'pydoc_data', 'lib2to3', 'idlelib', 'test', 'tkinter.test',
+    'turtle', 'turtledemo', 'distutils', 'pip', 'ensurepip', 'venv', 'xmlrpc', 'sqlite3', 'curses',
+]
+
+# 保留的 PIL 图片格式插件（pyscreeze 截图和 Tk 显示用到的格式），其余插件不打包
+FAST_START_PIL_PLUGINS = ['BmpImagePlugin', 'GifImagePlugin', 'JpegImagePlugin', 'PngImagePlugin', 'PpmImagePlugin']
+
+FAST_START_SPEC = 'mouse_clicker_fast_start.spec'
+
+def create_fast_start_spec():
+    """创建以启动速度为目标的 spec 文件（目录模式、不使用 UPX）"""
+    spec_content = f'''
+# -*- mode: python ; coding: utf-8 -*-
+# 由 build_optimized.py --fast-start 生成
+
+import sys
+from PyInstaller.utils.hooks import collect_submodules
+
+block_cipher = None
+
+keep_plugins = {{'PIL.' + name for name in {FAST_START_PIL_PLUGINS!r}}}
+unused_plugins = [name for name in collect_submodules('PIL', filter=lambda name: name.endswith('ImagePlugin'))
+                  if name not in keep_plugins]
+
+a = Analysis(
+    ['mouse_clicker_macos.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[
+        'pynput',
+        'pyautogui',
+        'PIL',
+        'tkinter',
+    ],
+    hookspath=[],
+    hooksconfig={{}},
+    runtime_hooks=[],
+    excludes={FAST_START_EXCLUDES!r} + unused_plugins,
+    win_no_prefer_redirects=False,
+    win_private_assemblies=False,
+    cipher=block_cipher,
+    noarchive=False,
+)
+
+pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+
+# 目录模式：EXE 只包含启动器，依赖放在旁边的目录中，启动时不需要解压
+exe = EXE(
+    pyz,
+    a.scripts,
+    # 运行时也使用 -O，与打包时预编译的字节码一致（解释器选项作为 EXE 的 TOC 条目传入）
+    [('O', None, 'OPTION')],
+    exclude_binaries=True,
+    name='小宝工具集之点击器',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='小宝工具集之点击器',
+)
+
+if sys.platform == 'darwin':
+    app = BUNDLE(
+        coll,
+        name='小宝工具集之点击器.app',
+        icon=None,
+        bundle_identifier='com.zmhtools.mouseclicker',
+    )
+'''
+    
+    with open(FAST_START_SPEC, 'w', encoding='utf-8') as f:
+        f.write(spec_content)
+    print(f"✅ 已创建快速启动 spec 文件: {FAST_START_SPEC}")
+
+def build_executable(activate_cmd, fast_start=False):
     """构建可执行文件"""
     print("🔨 开始构建可执行文件...")
     
     current_platform = get_platform()
     
+    if fast_start:
+        create_fast_start_spec()
+        # 以 -O 运行 PyInstaller，打包的字节码按优化级别1预编译
+        build_cmd = f"{activate_cmd} && python -O -m PyInstaller --noconfirm --clean {FAST_START_SPEC}"
     # 使用优化的spec文件构建
-    if os.path.exists('pyinstaller.spec'):
+    elif os.path.exists('pyinstaller.spec'):
         build_cmd = f"{activate_cmd} && pyinstaller pyinstaller.spec"
     else:
         # 回退到传统构建方式
@@ -130,7 +232,7 @@ def build_executable(activate_cmd):
     print("✅ 构建完成")
     return True
 
-def organize_output():
+def organize_output(fast_start=False):
     """整理输出文件"""
     print("📁 整理输出文件...")
     
@@ -143,10 +245,11 @@ def organize_output():
     
     # 查找生成的可执行文件
     executable_name = '小宝工具集之点击器'
-    if current_platform == 'windows':
-        executable_name += '.exe'
-    elif current_platform == 'macos':
+    if current_platform == 'macos':
         executable_name += '.app'
+    elif current_platform == 'windows' and not fast_start:
+        # 目录模式的输出是同名目录
+        executable_name += '.exe'
     
     # 移动文件到平台目录
     source_path = dist_dir / executable_name
@@ -167,8 +270,20 @@ def organize_output():
         print(f"❌ 找不到可执行文件: {source_path}")
         return False
 
+def run_startup_benchmark():
+    """运行启动速度基准测试，结果写入 dist/<平台>/startup-benchmark.json"""
+    output = os.path.join('dist', get_platform(), 'startup-benchmark.json')
+    result = subprocess.run([sys.executable, 'startup_benchmark.py', '--output', output])
+    return result.returncode == 0
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='小宝工具集之点击器构建脚本')
+    parser.add_argument('--fast-start', action='store_true',
+                        help='构建以启动速度为目标的目录模式版本（不使用 UPX）')
+    parser.add_argument('--bench', action='store_true', help='构建完成后测量启动速度')
+    args = parser.parse_args()
+    
     print("🚀 开始优化构建流程...")
     print(f"📋 平台信息: {get_platform()} ({platform.machine()})")
     print(f"🐍 Python版本: {sys.version}")
@@ -190,11 +305,16 @@ def main():
         return False
     
     # 构建可执行文件
-    if not build_executable(activate_cmd):
+    if not build_executable(activate_cmd, fast_start=args.fast_start):
         return False
     
     # 整理输出文件
-    if not organize_output():
+    if not organize_output(fast_start=args.fast_start):
+        return False
+    
+    # 测量启动速度
+    if args.bench and not run_startup_benchmark():
+        print("❌ 启动速度测量失败")
         return False
     
     print("🎉 构建流程完成！")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+录制事件采集
+pynput 的回调运行在系统输入钩子线程中，回调耗时会让钩子延迟甚至丢失事件（同时拖慢用户自己的输入）。
+回调只取一次单调时钟，把事件元组写入预分配的环形缓冲区；名称解析、计算时间间隔、写入录制和界面日志
+都在单独的采集线程中完成
+
+每个监听器（鼠标、键盘各一个线程）使用自己的环形缓冲区：单生产者单消费者，
+生产者只写写入位置、消费者只写读取位置，依靠 GIL 保证单个属性读写的原子性，不需要加锁。
+回调先取时间戳再写入缓冲区，采集线程取出时较早的事件可能还没有发布，所以最近一个唤醒间隔内的事件
+留到下一次再按时间顺序交给处理函数，保证多个监听器的事件合并后时间戳不倒退
+"""
+
+import threading
+import time
+from operator import itemgetter
+from typing import Callable, List, Optional, Tuple
+
+# 事件元组: (时间戳, 事件码, x, y, 参数1, 参数2)
+# 点击: 参数1 为 pynput 按钮对象；滚动: 参数1/参数2 为 dx/dy；按键: 参数1 为 pynput 按键对象
+CapturedEvent = Tuple[float, int, int, int, object, object]
+
+# 每个环形缓冲区的容量（事件数，取2的幂），采集线程每次唤醒都会清空，正常情况下远用不满
+DEFAULT_CAPACITY = 4096
+
+# 采集线程的唤醒间隔（秒）；界面日志相对实际操作最多延迟两个间隔
+DRAIN_INTERVAL = 0.01
+
+_by_time = itemgetter(0)
+
+
+class CaptureRing:
+    """
+    单生产者单消费者的预分配环形缓冲区
+
+    缓冲区满时丢弃新事件并计数，生产者永远不会阻塞。
+    """
+
+    __slots__ = ('slots', 'mask', 'write', 'read', 'dropped')
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("容量必须是2的幂")
+        self.slots: List[Optional[CapturedEvent]] = [None] * capacity
+        self.mask = capacity - 1
+        self.write = 0
+        self.read = 0
+        self.dropped = 0
+
+    def push(self, event: CapturedEvent) -> bool:
+        """生产者（输入钩子线程）调用"""
+        write = self.write
+        if write - self.read > self.mask:
+            self.dropped += 1
+            return False
+        self.slots[write & self.mask] = event
+        # 先写入槽位再发布写入位置，消费者看到新位置时槽位一定已写好
+        self.write = write + 1
+        return True
+
+    def drain(self) -> List[CapturedEvent]:
+        """消费者（采集线程）调用：取出已发布的全部事件"""
+        read, write = self.read, self.write
+        if read == write:
+            return []
+        slots, mask = self.slots, self.mask
+        start, end = read & mask, write & mask
+        if start < end:
+            events = slots[start:end]
+        else:
+            events = slots[start:] + slots[:end]
+        self.read = write
+        return events
+
+    def __len__(self):
+        return self.write - self.read
+
+
+class InputCapture:
+    """
+    录制事件的采集线程
+
+    用法:
+        capture = InputCapture(self._store_captured, log=self.log_message)
+        mouse_ring, keyboard_ring = capture.ring(), capture.ring()
+        capture.start()
+        # pynput 回调中:
+        mouse_ring.push((time.perf_counter(), EventCode.CLICK, x, y, button, None))
+        ...
+        capture.stop()   # 停止监听器之后调用，处理完剩余事件才返回
+
+    handler 在采集线程中按时间顺序收到每批事件，前后批之间的时间戳也不会倒退；
+    handler 出错时把错误信息交给 log（GUI 的 log_message），未提供时输出到标准输出。
+    """
+
+    def __init__(self, handler: Callable[[List[CapturedEvent]], None],
+                 capacity: int = DEFAULT_CAPACITY, interval: float = DRAIN_INTERVAL,
+                 log: Optional[Callable[[str], None]] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.handler = handler
+        self.capacity = capacity
+        self.interval = interval
+        self.log = log
+        # 与回调取时间戳使用同一个时钟
+        self.clock = clock
+        self.rings: List[CaptureRing] = []
+        # 已取出但还不能确定顺序的事件（最近一个唤醒间隔内的），按时间排序
+        self._carry: List[CapturedEvent] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def ring(self) -> CaptureRing:
+        """为一个生产者线程创建环形缓冲区（在 start 之前调用）"""
+        ring = CaptureRing(self.capacity)
+        self.rings.append(ring)
+        return ring
+
+    @property
+    def dropped(self) -> int:
+        """因缓冲区满而丢弃的事件数"""
+        return sum(ring.dropped for ring in self.rings)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='录制采集', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._drain()
+        # 监听器已停止，不会再有新事件，处理剩余的全部事件
+        self._drain(final=True)
+
+    def _drain(self, final: bool = False):
+        events = self._carry
+        for ring in self.rings:
+            events += ring.drain()
+        if not events:
+            return
+        # 合并多个监听器的事件
+        events.sort(key=_by_time)
+        if final:
+            ready, self._carry = events, []
+        else:
+            # 时间戳在最近一个间隔内的事件暂不处理：其他监听器可能还有更早的事件未发布
+            horizon = self.clock() - self.interval
+            split = len(events)
+            while split and events[split - 1][0] > horizon:
+                split -= 1
+            ready, self._carry = events[:split], events[split:]
+            if not ready:
+                return
+        try:
+            self.handler(ready)
+        except Exception as e:
+            # 处理出错不能让采集线程退出，否则之后的事件会堆满缓冲区
+            message = f"处理录制事件出错: {e}"
+            if self.log:
+                self.log(message)
+            else:
+                print(message)
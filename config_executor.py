@@ -5,244 +5,740 @@
 根据JSON配置文件批量执行鼠标操作
 """
 
+import startup_timing
 import json
-import pyautogui
+import os
 import time
 import argparse
 import sys
-from pathlib import Path
+from contextlib import redirect_stdout
+
+from backends import BACKENDS, BackendUnavailableError, RecordingBackend, SimulatedBackend, create_backend
+from timing import DeadlineScheduler, RateLimiter, VirtualClock
+from action_plan import (
+    ClickAction, DoubleClickAction, RightClickAction, ContinuousClickAction,
+    DragAction, WaitAction, MoveAction, GridPattern, LinePattern, PolylinePattern, PointsFilePattern,
+    PlanError, SequenceCache, compile_action, compile_config, compile_settings, count_actions, expand_actions,
+)
+from patterns import click_points, describe_pattern, pattern_points
+from config_stream import ConfigStream
+from plan_cache import PlanCache, summarize
+from structured_log import DEBUG, LEVELS, NOTICE, NullLogger, configure_default, default_logger
+# file_watch、metrics、tracing 只在 --watch、--metrics-*、--profile 时使用，
+# 在用到时才导入，--list/--validate 不必加载
+
+startup_timing.mark('config_executor 导入完成')
 
 class ConfigExecutor:
-    def __init__(self, config_file):
+    def __init__(self, config_file, max_rate=None, backend=None, stream=False, cache=True, metrics=None,
+                 tracer=None, log=None):
         self.config_file = config_file
-        self.config = self.load_config()
+        # 流式模式下不整体加载配置，由 execute_stream 等方法增量读取
+        self.stream = stream
+        
+        # 编译后的动作计划及配置概要；非流式模式下在加载配置时生成
+        self.plan = None
+        self.plan_errors = None
+        self.summary = None
+        
+        # 计划缓存：内容未变化的配置直接复用上次的编译结果，不解析JSON
+        self.cache = PlanCache() if cache and not stream else None
+        self.config = {} if stream else self.load_config()
+        
+        # 输入注入后端，未指定时在首次执行时创建 pyautogui 后端
+        self.backend = backend
+        
+        # 极速模式目标速率（每秒动作数），命令行参数优先于 settings.max_rate
+        self.max_rate = max_rate
+        self.limiter = None
         
-        # 设置pyautogui
-        pyautogui.FAILSAFE = self.config.get('settings', {}).get('fail_safe', True)
-        pyautogui.PAUSE = 0.1
+        # 执行过程的日志（structured_log.StructuredLogger），由后台线程写出
+        self.log = log if log is not None else default_logger()
+        
+        # 时间线追踪（tracing.Tracer），为 None 时不记录
+        self.tracer = tracer
+        
+        # 动作时间线调度器，动作间的等待均基于绝对截止时间
+        self.scheduler = DeadlineScheduler(sleeper=tracer.sleeper() if tracer is not None else None)
+        
+        # 执行指标（ExecutionMetrics），为 None 时不做任何统计
+        self.metrics = metrics
+        self._sequence_name = None
+        # 当前动作开始等待前的累计等待时间，用于统计动作的等待耗时
+        self._sleep_mark = None
+        # 当前动作开始等待前的截止时间；动作前没有等待时截止时间不变，不统计开始延迟
+        self._deadline_mark = None
+        
+        # 动作类型 -> 执行函数
+        self._handlers = {
+            ClickAction: self._run_click,
+            DoubleClickAction: self._run_double_click,
+            RightClickAction: self._run_right_click,
+            ContinuousClickAction: self._run_continuous_click,
+            DragAction: self._run_drag,
+            WaitAction: self._run_wait,
+            MoveAction: self._run_move,
+            GridPattern: self._run_pattern,
+            LinePattern: self._run_pattern,
+            PolylinePattern: self._run_pattern,
+            PointsFilePattern: self._run_pattern,
+        }
         
     def load_config(self):
-        """加载配置文件"""
+        """
+        加载并编译配置文件
+        
+        命中计划缓存时直接使用缓存的编译结果并返回 None（不解析JSON）；
+        否则解析、编译并写入缓存，返回解析后的配置。
+        """
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.config_file, 'rb') as f:
+                data = f.read()
         except FileNotFoundError:
             print(f"错误：配置文件 {self.config_file} 不存在")
             sys.exit(1)
-        except json.JSONDecodeError as e:
+            
+        if self.cache is not None:
+            cached = self.cache.load(data)
+            if cached is not None:
+                self.summary = cached
+                self.plan, self.plan_errors = cached.plan, list(cached.errors)
+                return None
+                
+        try:
+            config = json.loads(data.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
             print(f"错误：配置文件格式错误 - {e}")
             sys.exit(1)
             
-    def execute_action(self, action):
-        """执行单个动作"""
-        action_type = action.get('type')
-        delay_before = action.get('delay_before', 0)
-        
-        if delay_before > 0:
-            print(f"等待 {delay_before} 秒...")
-            time.sleep(delay_before)
+        self.plan, self.plan_errors = compile_config(config)
+        self.summary = summarize(config, self.plan, self.plan_errors)
+        if self.cache is not None:
+            self.cache.store(data, self.summary)
+        return config
             
+    def compile_plan(self):
+        """返回编译后的动作计划（配置有错误时为 None）"""
+        if self.plan is None and self.plan_errors is None:
+            self.plan, self.plan_errors = compile_config(self.config)
+        return self.plan
+    
+    @property
+    def description(self):
+        return self.summary.description if self.summary is not None else '无描述'
+
+    def execute_action(self, action):
+        """执行单个动作（已编译的动作或原始配置字典）"""
+        if isinstance(action, dict):
+            errors = []
+            action = compile_action(action, "动作", errors)
+            if action is None:
+                for error in errors:
+                    self.log.error('invalid_action', "错误：{error}", error=error)
+                return
+            # 单独执行的动作以当前时刻为时间线起点
+            self.scheduler.reset()
+            self.ensure_backend()
+            if type(action) not in self._handlers:
+                # 循环块：逐个执行展开后的动作
+                for item in expand_actions((action,)):
+                    self.execute_action(item)
+                return
+
+        metrics = self.metrics
+        if metrics is not None and self._sleep_mark is None:
+            self._sleep_mark = self._slept()
+            self._deadline_mark = self.scheduler.deadline
+
+        if action.delay_before > 0:
+            self.log.info('delay_before', "等待 {seconds} 秒...", seconds=action.delay_before)
+            self.scheduler.wait(action.delay_before)
+
+        if metrics is None:
+            try:
+                self._handlers[type(action)](action)
+            except Exception as e:
+                self.log.error('action_failed', "错误：执行动作失败 - {error}", error=str(e))
+            return
+
+        clock = self.scheduler.clock
+        start = clock()
+        # 只有等待过截止时间的动作才有计划开始时刻；否则截止时间停留在之前的动作上，
+        # 差值包含了之前动作的注入耗时
+        deadline = self.scheduler.deadline
+        lateness = start - deadline if deadline != self._deadline_mark else None
+        slept = self._slept()
         try:
-            if action_type == 'click':
-                x = action['x']
-                y = action['y']
-                button = action.get('button', 'left')
-                print(f"点击坐标: ({x}, {y}), 按钮: {button}")
-                pyautogui.click(x, y, button=button)
-                
-            elif action_type == 'double_click':
-                x = action['x']
-                y = action['y']
-                print(f"双击坐标: ({x}, {y})")
-                pyautogui.doubleClick(x, y)
-                
-            elif action_type == 'right_click':
-                x = action['x']
-                y = action['y']
-                print(f"右键点击坐标: ({x}, {y})")
-                pyautogui.rightClick(x, y)
-                
-            elif action_type == 'continuous_click':
-                x = action['x']
-                y = action['y']
-                count = action['count']
-                interval = action.get('interval', 1.0)
-                print(f"连续点击 {count} 次，坐标: ({x}, {y}), 间隔: {interval}秒")
-                
-                for i in range(count):
-                    pyautogui.click(x, y)
-                    print(f"完成第 {i + 1} 次点击")
-                    if i < count - 1:
-                        time.sleep(interval)
-                        
-            elif action_type == 'drag':
-                start_x = action['start_x']
-                start_y = action['start_y']
-                end_x = action['end_x']
-                end_y = action['end_y']
-                duration = action.get('duration', 1.0)
-                print(f"拖拽: ({start_x}, {start_y}) -> ({end_x}, {end_y}), 持续时间: {duration}秒")
-                
-                pyautogui.moveTo(start_x, start_y)
-                pyautogui.drag(end_x - start_x, end_y - start_y, duration=duration)
-                
-            elif action_type == 'wait':
-                wait_time = action['time']
-                print(f"等待 {wait_time} 秒")
-                time.sleep(wait_time)
-                
-            elif action_type == 'move':
-                x = action['x']
-                y = action['y']
-                duration = action.get('duration', 0.5)
-                print(f"移动鼠标到: ({x}, {y})")
-                pyautogui.moveTo(x, y, duration=duration)
-                
-            else:
-                print(f"警告：未知的动作类型 '{action_type}'")
-                
-        except KeyError as e:
-            print(f"错误：动作配置缺少必要参数 {e}")
+            self._handlers[type(action)](action)
         except Exception as e:
-            print(f"错误：执行动作失败 - {e}")
-            
+            self.log.error('action_failed', "错误：执行动作失败 - {error}", error=str(e))
+        elapsed = clock() - start
+        inner = self._slept() - slept
+        metrics.observe(self._sequence_name or '(单个动作)', type(action).__name__, lateness,
+                        elapsed - inner, slept - self._sleep_mark + inner)
+        self._sleep_mark = None
+
+    def _slept(self):
+        """调度器和限速器累计的等待时间"""
+        if self.limiter is not None:
+            return self.scheduler.slept + self.limiter.slept
+        return self.scheduler.slept
+
+    def _pace(self):
+        """极速模式下等待限速器的下一个注入时隙"""
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+    def _run_click(self, action):
+        self.log.info('click', "点击坐标: ({x}, {y}), 按钮: {button}", x=action.x, y=action.y, button=action.button)
+        self._pace()
+        self.backend.click(action.x, action.y, button=action.button)
+
+    def _run_double_click(self, action):
+        self.log.info('double_click', "双击坐标: ({x}, {y})", x=action.x, y=action.y)
+        self._pace()
+        self.backend.click(action.x, action.y, clicks=2)
+
+    def _run_right_click(self, action):
+        self.log.info('right_click', "右键点击坐标: ({x}, {y})", x=action.x, y=action.y)
+        self._pace()
+        self.backend.click(action.x, action.y, button='right')
+
+    def _run_continuous_click(self, action):
+        x, y, count, interval = action.x, action.y, action.count, action.interval
+        log = self.log
+        log.info('continuous_click', "连续点击 {count} 次，坐标: ({x}, {y}), 间隔: {interval}秒",
+                 count=count, x=x, y=y, interval=interval)
+
+        click = self.backend.click
+        start = self.scheduler.clock()
+        for i in range(count):
+            self._pace()
+            click(x, y)
+            log.debug('click_done', "完成第 {n} 次点击", n=i + 1)
+            if i < count - 1:
+                self.scheduler.wait(interval)
+        self._log_report(self.scheduler.report(count, interval, start))
+
+    def _log_report(self, report):
+        self.log.info('rate', report.describe(), **report._asdict())
+
+    def _run_drag(self, action):
+        self.log.info('drag', "拖拽: ({start_x}, {start_y}) -> ({end_x}, {end_y}), 持续时间: {duration}秒",
+                      start_x=action.start_x, start_y=action.start_y, end_x=action.end_x, end_y=action.end_y,
+                      duration=action.duration)
+        self._pace()
+        self.backend.drag(action.start_x, action.start_y, action.end_x, action.end_y, duration=action.duration)
+        self.scheduler.advance(action.duration)
+
+    def _run_wait(self, action):
+        self.log.info('wait', "等待 {seconds} 秒", seconds=action.time)
+        self.scheduler.wait(action.time)
+
+    def _run_move(self, action):
+        self.log.info('move', "移动鼠标到: ({x}, {y})", x=action.x, y=action.y)
+        self._pace()
+        self.backend.move(action.x, action.y, duration=action.duration)
+        self.scheduler.advance(action.duration)
+
+    def _run_pattern(self, action):
+        self.log.info('pattern', describe_pattern(action))
+        # 坐标文件的相对路径相对于配置文件所在目录
+        points = pattern_points(action, os.path.dirname(os.path.abspath(self.config_file)))
+        start = self.scheduler.clock()
+        count = click_points(self.backend, points, button=action.button, interval=action.interval,
+                             scheduler=self.scheduler, limiter=self.limiter)
+        self.log.info('pattern_done', "完成 {count} 个点的点击", count=count)
+        if action.interval > 0:
+            self._log_report(self.scheduler.report(count, action.interval, start))
+
+    def ensure_backend(self):
+        """返回注入后端，必要时创建默认的 pyautogui 后端"""
+        if self.backend is None:
+            self.backend = create_backend('pyautogui')
+            self.backend.configure(fail_safe=self.summary.fail_safe if self.summary is not None else True)
+        if self.tracer is not None:
+            from tracing import TracingBackend
+            if not isinstance(self.backend, TracingBackend):
+                self.backend = TracingBackend(self.backend, self.tracer)
+        return self.backend
+
+    def configure_pacing(self, settings):
+        """
+        配置注入后端和节奏控制
+        
+        指定了目标速率时进入极速模式：取消后端每次操作后的固定停顿，
+        由限速器按每秒动作数控制注入节奏；否则保留默认的0.1秒停顿。
+        """
+        backend = self.ensure_backend()
+        max_rate = self.max_rate if self.max_rate is not None else settings.max_rate
+        if max_rate and max_rate > 0:
+            backend.configure(fail_safe=settings.fail_safe, pause=0)
+            # 限速器与调度器使用同一时间源（模拟执行时为虚拟时钟）
+            self.limiter = RateLimiter(max_rate, clock=self.scheduler.clock, sleeper=self.scheduler.sleeper)
+            self.log.notice('fast_mode', "极速模式已启用，目标速率 {max_rate:g} 次/秒", max_rate=max_rate)
+        else:
+            backend.configure(fail_safe=settings.fail_safe, pause=0.1)
+            self.limiter = None
+
     def execute_sequence(self, sequence_name=None):
         """执行指定序列或所有序列"""
-        sequences = self.config.get('click_sequences', [])
-        
-        if not sequences:
+        plan = self.compile_plan()
+        if plan is None:
+            print("配置文件存在错误，无法执行:")
+            for error in self.plan_errors:
+                print(f"- {error}")
+            return
+
+        if not plan.sequences:
             print("配置文件中没有找到点击序列")
             return
-            
-        # 安全延迟
-        safety_delay = self.config.get('settings', {}).get('safety_delay', 3.0)
+
+        sequences = plan.find_sequences(sequence_name)
+        if not sequences:
+            print(f"错误：未找到名为 '{sequence_name}' 的序列")
+            return
+
+        self.prepare_run(plan.settings)
+
+        for sequence in sequences:
+            self.run_sequence(sequence.name, sequence.actions, plan.settings.default_delay,
+                              count_actions(sequence.actions))
+
+        self.finish_run(len(sequences))
+
+    def prepare_run(self, settings):
+        """执行前的准备：配置节奏控制并等待安全延迟"""
+        self.configure_pacing(settings)
+
+        safety_delay = settings.safety_delay
         if safety_delay > 0:
-            print(f"安全延迟 {safety_delay} 秒，请准备...")
+            self.log.notice('safety_delay', "安全延迟 {seconds} 秒，请准备...", seconds=safety_delay)
+            self.log.flush()
             time.sleep(safety_delay)
-            
-        executed_count = 0
+
+    def run_sequence(self, name, actions, default_delay, total=None):
+        """
+        执行一个序列的动作
         
-        for sequence in sequences:
-            seq_name = sequence.get('name', '未命名序列')
-            
-            # 如果指定了序列名称，只执行匹配的序列
-            if sequence_name and seq_name != sequence_name:
-                continue
-                
-            print(f"\n=== 执行序列: {seq_name} ===")
-            
-            actions = sequence.get('actions', [])
-            for i, action in enumerate(actions, 1):
-                print(f"\n动作 {i}/{len(actions)}:")
+        actions 可以是任意可迭代对象（流式模式下为生成器），其中的循环块在执行时惰性展开，
+        因此默认延迟放在下一个动作之前，而不依赖动作总数。
+        
+        Returns:
+            int: 实际执行的动作数
+        """
+        log = self.log
+        log.notice('sequence_start', "\n=== 执行序列: {name} ===", name=name)
+        log.progress(0, total)
+
+        self.scheduler.reset()
+        self._sequence_name = name
+        metrics = self.metrics
+        tracer = self.tracer
+        if tracer is not None:
+            sequence_start = tracer.clock()
+        i = 0
+        for i, action in enumerate(expand_actions(actions), 1):
+            if metrics is not None:
+                self._sleep_mark = self._slept()
+                self._deadline_mark = self.scheduler.deadline
+            # 动作间默认延迟
+            if i > 1 and default_delay > 0:
+                self.scheduler.wait(default_delay)
+
+            if total:
+                log.info('action', "\n动作 {index}/{total}:", index=i, total=total)
+            else:
+                log.info('action', "\n动作 {index}:", index=i)
+            log.progress(i, total)
+            if tracer is None:
                 self.execute_action(action)
-                
-                # 动作间默认延迟
-                default_delay = self.config.get('settings', {}).get('default_delay', 0.5)
-                if i < len(actions) and default_delay > 0:
-                    time.sleep(default_delay)
-                    
-            print(f"序列 '{seq_name}' 执行完成")
-            executed_count += 1
-            
-        if executed_count == 0 and sequence_name:
-            print(f"错误：未找到名为 '{sequence_name}' 的序列")
-        else:
-            print(f"\n总共执行了 {executed_count} 个序列")
-            
+            else:
+                with tracer.span(type(action).__name__, 'action', index=i):
+                    self.execute_action(action)
+
+        self._sequence_name = None
+        if tracer is not None:
+            tracer.complete(name, 'sequence', sequence_start, tracer.clock(), {'actions': i})
+        log.notice('sequence_done', "序列 '{name}' 执行完成\n"
+                   "耗时 {elapsed:.3f} 秒 (计划 {scheduled:.3f} 秒, 最大唤醒误差 {max_lateness_ms:.3f} 毫秒)",
+                   name=name, actions=i, elapsed=self.scheduler.elapsed(), scheduled=self.scheduler.scheduled(),
+                   max_lateness_ms=self.scheduler.max_lateness * 1000)
+        return i
+
+    def finish_run(self, executed_count):
+        """输出本次执行的汇总"""
+        self.log.notice('run_done', "\n总共执行了 {sequences} 个序列", sequences=executed_count)
+        if self.limiter is not None:
+            report = self.limiter.report()
+            self.log.notice('fast_mode_report', f"极速模式: {report.describe()}", **report._asdict())
+
+    def replan(self, sequence_cache):
+        """
+        重新读取配置文件并编译，内容未变化的序列直接复用之前的编译结果
+        
+        配置有错误时打印错误并返回 None，之前的计划保持不变。
+        """
+        started = time.perf_counter()
+        try:
+            with open(self.config_file, 'rb') as f:
+                data = f.read()
+            config = json.loads(data.decode('utf-8'))
+        except (OSError, ValueError) as e:
+            self.log.error('load_failed', "错误：无法加载配置文件 - {error}", error=str(e))
+            return None
+
+        plan, errors = compile_config(config, reuse=sequence_cache)
+        if plan is None:
+            self.log.error('plan_errors', "配置文件存在错误，继续使用之前的计划:\n{details}",
+                           details='\n'.join(f"- {error}" for error in errors), errors=errors)
+            return None
+
+        self.config = config
+        self.plan, self.plan_errors = plan, errors
+        self.summary = summarize(config, plan, errors)
+        if self.cache is not None:
+            self.cache.store(data, self.summary)
+        self.log.notice('replanned', "计划已更新: 重新编译 {compiled} 个序列，复用 {reused} 个，用时 {ms:.1f} 毫秒",
+                        compiled=sequence_cache.misses, reused=sequence_cache.hits,
+                        ms=(time.perf_counter() - started) * 1000)
+        return plan
+
+    def watch(self, sequence_name=None, poll_interval=0.25):
+        """
+        监视模式：常驻进程，配置文件每次保存后重新规划并执行
+        
+        只有内容变化的序列会被重新校验和编译；注入后端和解释器保持常驻，
+        安全延迟只在第一次执行前等待。
+        """
+        sequence_cache = SequenceCache()
+        first_run = True
+        from file_watch import FileWatcher
+        with FileWatcher(self.config_file, poll_interval) as watcher:
+            self.log.notice('watch_start', "监视模式已启动 ({method})，按 Ctrl+C 退出", method=watcher.method)
+            plan = self.replan(sequence_cache)
+            while True:
+                if plan is not None:
+                    sequences = plan.find_sequences(sequence_name)
+                    if not sequences:
+                        if sequence_name:
+                            self.log.error('sequence_missing', "错误：未找到名为 '{name}' 的序列", name=sequence_name)
+                        else:
+                            self.log.error('no_sequences', "配置文件中没有找到点击序列")
+                    else:
+                        if first_run:
+                            self.prepare_run(plan.settings)
+                            first_run = False
+                        else:
+                            self.configure_pacing(plan.settings)
+                        for sequence in sequences:
+                            self.run_sequence(sequence.name, sequence.actions, plan.settings.default_delay,
+                                              count_actions(sequence.actions))
+                        self.finish_run(len(sequences))
+
+                self.log.notice('watch_wait', "\n等待配置文件 {path} 变化...", path=self.config_file)
+                watcher.wait()
+                self.log.notice('watch_changed', "\n检测到配置文件变化")
+                plan = self.replan(sequence_cache)
+
+    def dry_run(self, sequence_name=None):
+        """
+        模拟执行：在虚拟时钟上运行编译后的动作，估算耗时
+        
+        执行路径与真实执行相同（默认延迟、delay_before、截止时间调度、
+        极速模式限速、pyautogui 的固定停顿和移动/拖拽时长），
+        但不注入事件也不真正等待。
+        """
+        plan = self.compile_plan()
+        if plan is None:
+            print("配置文件存在错误，无法模拟:")
+            for error in self.plan_errors:
+                print(f"- {error}")
+            return None
+
+        sequences = plan.find_sequences(sequence_name)
+        if not sequences:
+            if sequence_name:
+                print(f"错误：未找到名为 '{sequence_name}' 的序列")
+            else:
+                print("配置文件中没有找到点击序列")
+            return None
+
+        clock = VirtualClock()
+        saved = self.backend, self.scheduler, self.limiter, self.metrics, self.tracer, self.log
+        # 虚拟时间不计入执行指标和时间线，模拟过程中的逐动作日志也没有意义
+        self.metrics = self.tracer = None
+        self.log = NullLogger()
+        self.backend = SimulatedBackend(clock)
+        self.scheduler = DeadlineScheduler(clock, sleeper=clock.sleep_until)
+        results = []
+        started = time.perf_counter()
+        try:
+            # 模拟过程中的逐动作输出没有意义，全部丢弃
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                self.configure_pacing(plan.settings)
+                clock.sleep_until(clock() + plan.settings.safety_delay)
+                for sequence in sequences:
+                    before = (clock.slept, clock.busy, len(self.backend.events))
+                    executed = self.run_sequence(sequence.name, sequence.actions, plan.settings.default_delay,
+                                      count_actions(sequence.actions))
+                    results.append((sequence, clock.slept - before[0], clock.busy - before[1],
+                                    len(self.backend.events) - before[2], executed))
+        finally:
+            self.backend, self.scheduler, self.limiter, self.metrics, self.tracer, self.log = saved
+        simulated_in = time.perf_counter() - started
+
+        print("=== 模拟执行（不注入事件、不等待）===")
+        print(f"安全延迟: {_ms(plan.settings.safety_delay)}")
+        for sequence, slept, busy, events, executed in results:
+            print(f"序列 '{sequence.name}': 预计 {_ms(slept + busy)} "
+                  f"(等待 {_ms(slept)}, 注入 {_ms(busy)}; {executed} 个动作, {events} 次注入)")
+        total = clock.now
+        print(f"\n总计: 预计 {_ms(total)} ({_clock_format(total)})")
+        print(f"  等待 {_ms(clock.slept)} (含安全延迟)，注入 {_ms(clock.busy)} (含每次操作后的固定停顿)")
+        print(f"模拟用时 {simulated_in * 1000:.1f} 毫秒")
+        return total
+
+    def _compile_streamed(self, sequence):
+        """逐个编译流式读取的动作，遇到无效动作立即停止"""
+        for j, raw in sequence.actions:
+            errors = []
+            action = compile_action(raw, f"序列 {sequence.index} 动作 {j}", errors)
+            if action is None:
+                raise PlanError(errors)
+            yield action
+
+    def execute_stream(self, sequence_name=None):
+        """
+        流式执行：边解析、边校验、边执行
+        
+        内存占用与配置文件大小无关，第一个动作的开始时间也不依赖文件长度；
+        遇到无效动作时停止执行（之前的动作已经执行）。
+        """
+        settings = None
+        settings_seen = False
+        executed_count = 0
+        try:
+            with ConfigStream(self.config_file) as stream:
+                for sequence in stream.sequences():
+                    if sequence_name and sequence.name != sequence_name:
+                        continue
+
+                    if settings is None:
+                        self.log.notice('description', "描述: {description}",
+                                        description=stream.meta.get('description', '无描述'))
+                        settings_seen = stream.settings is not None
+                        errors = []
+                        settings = compile_settings(stream.settings, errors)
+                        if errors:
+                            raise PlanError(errors)
+                        self.prepare_run(settings)
+
+                    self.run_sequence(sequence.name, self._compile_streamed(sequence), settings.default_delay)
+                    executed_count += 1
+
+                if settings is not None and not settings_seen and stream.settings is not None:
+                    self.log.warning('settings_ignored',
+                                     "警告：'settings' 位于 'click_sequences' 之后，流式模式下未生效，已使用默认设置")
+        except PlanError as e:
+            self.log.error('plan_errors', "配置文件存在错误，已停止执行:\n{details}",
+                           details='\n'.join(f"- {error}" for error in e.errors), errors=e.errors)
+            return
+
+        if executed_count == 0:
+            if sequence_name:
+                self.log.error('sequence_missing', "错误：未找到名为 '{name}' 的序列", name=sequence_name)
+            else:
+                self.log.error('no_sequences', "配置文件中没有找到点击序列")
+            return
+
+        self.finish_run(executed_count)
+
     def list_sequences(self):
         """列出所有可用的序列"""
-        sequences = self.config.get('click_sequences', [])
+        if self.stream:
+            return self.list_stream()
+        sequences = self.summary.sequences
         
         if not sequences:
             print("配置文件中没有找到点击序列")
             return
             
         print("可用的点击序列:")
-        for i, sequence in enumerate(sequences, 1):
-            name = sequence.get('name', '未命名序列')
-            actions_count = len(sequence.get('actions', []))
+        for i, (name, actions_count) in enumerate(sequences, 1):
             print(f"{i}. {name} ({actions_count} 个动作)")
             
+    def list_stream(self):
+        """流式列出所有序列及其动作数"""
+        count = 0
+        try:
+            with ConfigStream(self.config_file) as stream:
+                for sequence in stream.sequences():
+                    if count == 0:
+                        print("可用的点击序列:")
+                    actions_count = sum(1 for _ in sequence.actions)
+                    count += 1
+                    print(f"{count}. {sequence.name} ({actions_count} 个动作)")
+        except PlanError as e:
+            for error in e.errors:
+                print(f"错误：{error}")
+            return
+        if count == 0:
+            print("配置文件中没有找到点击序列")
+            
     def validate_config(self):
         """验证配置文件格式"""
+        if self.stream:
+            return self.validate_stream()
+        self.compile_plan()
+        return list(self.plan_errors)
+
+    def validate_stream(self):
+        """流式验证配置文件，内存占用与文件大小无关"""
         errors = []
-        
-        # 检查必要的顶级字段
-        if 'click_sequences' not in self.config:
-            errors.append("缺少 'click_sequences' 字段")
-            return errors
-            
-        sequences = self.config['click_sequences']
-        if not isinstance(sequences, list):
-            errors.append("'click_sequences' 必须是数组")
-            return errors
-            
-        # 检查每个序列
-        for i, sequence in enumerate(sequences):
-            if not isinstance(sequence, dict):
-                errors.append(f"序列 {i+1} 必须是对象")
-                continue
-                
-            if 'actions' not in sequence:
-                errors.append(f"序列 {i+1} 缺少 'actions' 字段")
-                continue
-                
-            actions = sequence['actions']
-            if not isinstance(actions, list):
-                errors.append(f"序列 {i+1} 的 'actions' 必须是数组")
-                continue
-                
-            # 检查每个动作
-            for j, action in enumerate(actions):
-                if not isinstance(action, dict):
-                    errors.append(f"序列 {i+1} 动作 {j+1} 必须是对象")
-                    continue
-                    
-                if 'type' not in action:
-                    errors.append(f"序列 {i+1} 动作 {j+1} 缺少 'type' 字段")
-                    continue
-                    
-                action_type = action['type']
-                
-                # 检查不同类型动作的必要字段
-                if action_type in ['click', 'double_click', 'right_click', 'move']:
-                    if 'x' not in action or 'y' not in action:
-                        errors.append(f"序列 {i+1} 动作 {j+1} 缺少坐标字段 'x' 或 'y'")
-                        
-                elif action_type == 'continuous_click':
-                    required_fields = ['x', 'y', 'count']
-                    for field in required_fields:
-                        if field not in action:
-                            errors.append(f"序列 {i+1} 动作 {j+1} 缺少字段 '{field}'")
-                            
-                elif action_type == 'drag':
-                    required_fields = ['start_x', 'start_y', 'end_x', 'end_y']
-                    for field in required_fields:
-                        if field not in action:
-                            errors.append(f"序列 {i+1} 动作 {j+1} 缺少字段 '{field}'")
-                            
-                elif action_type == 'wait':
-                    if 'time' not in action:
-                        errors.append(f"序列 {i+1} 动作 {j+1} 缺少字段 'time'")
-                        
+        try:
+            with ConfigStream(self.config_file) as stream:
+                for sequence in stream.sequences():
+                    for j, raw in sequence.actions:
+                        compile_action(raw, f"序列 {sequence.index} 动作 {j}", errors)
+                compile_settings(stream.settings, errors)
+        except PlanError as e:
+            errors.extend(e.errors)
         return errors
 
+def _ms(seconds):
+    return f"{seconds * 1000:.3f} 毫秒"
+
+
+def _clock_format(seconds):
+    """秒数 -> H:MM:SS.mmm"""
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02d}:{secs:06.3f}"
+
+
+def export_metrics(metrics, json_path):
+    """运行结束时写出指标：JSON 文件和最后一次 Prometheus 文件"""
+    if metrics is None:
+        return
+    if metrics.prometheus_path:
+        metrics.write_prometheus()
+        print(f"Prometheus 指标已写入 {metrics.prometheus_path}")
+    if json_path:
+        try:
+            metrics.write_json(json_path)
+            print(f"执行指标已写入 {json_path}")
+        except OSError as e:
+            print(f"错误：无法写入指标文件 {json_path} - {e}")
+
+
+def finish_outputs(metrics, json_path, profile, log=None):
+    """写出剩余日志，结束剖析并写出指标"""
+    if log is not None:
+        log.flush()
+    if profile is not None:
+        profile.stop()
+    export_metrics(metrics, json_path)
+
+
 def main():
     parser = argparse.ArgumentParser(description='配置文件执行器 - 批量执行鼠标操作')
     parser.add_argument('config_file', nargs='?', default='click_config.json', help='配置文件路径')
     parser.add_argument('--sequence', '-s', help='执行指定名称的序列')
     parser.add_argument('--list', '-l', action='store_true', help='列出所有可用序列')
     parser.add_argument('--validate', '-v', action='store_true', help='验证配置文件格式')
+    parser.add_argument('--cps', type=float, help='极速模式：取消固定停顿，按每秒动作数限速（覆盖 settings.max_rate）')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式模式：增量解析配置，边校验边执行，适用于超大配置文件')
+    parser.add_argument('--backend', '-b', choices=sorted(BACKENDS), default='pyautogui',
+                        help='输入注入后端（xtest 为Linux原生XTest注入；recording 只记录不注入、null 只计数不注入，可在无显示环境运行）')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不读取也不写入计划缓存，每次重新解析和校验配置')
+    parser.add_argument('--dry-run', '-n', action='store_true',
+                        help='模拟执行：在虚拟时钟上运行动作，估算每个序列和总耗时（不注入事件）')
+    parser.add_argument('--watch', '-w', action='store_true',
+                        help='监视模式：常驻运行，配置文件保存后只重新编译变化的序列并再次执行')
+    parser.add_argument('--parallel', '-p', type=int, metavar='N',
+                        help='并行模式：启动N个工作进程，每个进程使用独立的Xvfb虚拟显示，序列分片同时执行')
+    parser.add_argument('--display-base', type=int, default=99,
+                        help='并行模式下虚拟显示编号的起始值（默认99）')
+    parser.add_argument('--metrics-json', metavar='FILE',
+                        help='记录每个动作的开始延迟、注入耗时和等待耗时直方图，结束时写入JSON文件')
+    parser.add_argument('--metrics-prom', metavar='FILE',
+                        help='执行期间定期把指标以 Prometheus 文本格式写入该文件')
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='PREFIX',
+                        help='剖析本次运行：写出 PREFIX.prof（cProfile）和 PREFIX.trace.json（Chrome 时间线），默认前缀 profile')
+    parser.add_argument('--metrics-interval', type=float, default=10.0,
+                        help='--metrics-prom 文件的更新间隔（秒，默认10）')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='安静模式：不输出逐动作日志，只输出序列开始/结束、进度汇总、警告和错误')
+    parser.add_argument('--log-level', choices=list(LEVELS),
+                        help='终端日志级别（默认 debug，即输出全部日志；--quiet 相当于 notice）')
+    parser.add_argument('--log-json', metavar='FILE',
+                        help='把执行日志以 JSON Lines 格式（每行一条，含时间戳、级别、事件名和字段）追加写入该文件')
     
     args = parser.parse_args()
+    startup_timing.mark('参数解析完成')
     
     # 检查配置文件是否存在
-    if not Path(args.config_file).exists():
+    if not os.path.exists(args.config_file):
         print(f"错误：配置文件 {args.config_file} 不存在")
         print("\n可以使用示例配置文件 click_config.json 作为模板")
         sys.exit(1)
         
-    executor = ConfigExecutor(args.config_file)
+    if args.cps is not None and args.cps <= 0:
+        print("错误：--cps 必须大于0")
+        sys.exit(1)
+        
+    if args.parallel is not None:
+        if args.parallel < 1:
+            print("错误：--parallel 必须大于0")
+            sys.exit(1)
+        if args.stream:
+            print("错误：--parallel 不能与 --stream 同时使用")
+            sys.exit(1)
+        
+    metrics = None
+    if args.metrics_json or args.metrics_prom:
+        if args.parallel is not None or args.dry_run:
+            print("错误：--metrics-json/--metrics-prom 不能与 --parallel 或 --dry-run 同时使用")
+            sys.exit(1)
+        if args.metrics_interval <= 0:
+            print("错误：--metrics-interval 必须大于0")
+            sys.exit(1)
+        from metrics import ExecutionMetrics
+        metrics = ExecutionMetrics(args.metrics_prom, args.metrics_interval)
+        
+    profile = None
+    if args.profile:
+        if args.parallel is not None:
+            print("错误：--profile 不能与 --parallel 同时使用")
+            sys.exit(1)
+        from tracing import ProfileSession
+        profile = ProfileSession(args.profile)
+        
+    if args.quiet or args.log_level or args.log_json:
+        level = LEVELS[args.log_level] if args.log_level else NOTICE if args.quiet else DEBUG
+        try:
+            configure_default(level, args.log_json)
+        except OSError as e:
+            print(f"错误：无法写入日志文件 {args.log_json} - {e}")
+            sys.exit(1)
+        
+    if profile is not None:
+        # 从创建执行器开始剖析，包括配置加载和编译
+        profile.start()
+        
+    backend = None
+    if args.backend != 'pyautogui' and args.parallel is None and not args.dry_run:
+        try:
+            backend = create_backend(args.backend)
+        except BackendUnavailableError as e:
+            print(f"错误：无法使用注入后端 '{args.backend}' - {e}")
+            sys.exit(1)
+    executor = ConfigExecutor(args.config_file, max_rate=args.cps, backend=backend, stream=args.stream,
+                              cache=not args.no_cache, metrics=metrics,
+                              tracer=profile.tracer if profile is not None else None)
     
     if args.validate:
         print("验证配置文件...")
@@ -258,10 +754,57 @@ def main():
     elif args.list:
         executor.list_sequences()
         
+    elif args.dry_run:
+        if args.stream:
+            print("错误：--dry-run 不能与 --stream 同时使用")
+            sys.exit(1)
+        if executor.dry_run(args.sequence) is None:
+            sys.exit(1)
+        
+    elif args.watch:
+        if args.stream or args.parallel is not None:
+            print("错误：--watch 不能与 --stream 或 --parallel 同时使用")
+            sys.exit(1)
+        try:
+            executor.watch(args.sequence)
+        except KeyboardInterrupt:
+            executor.log.flush()
+            print("\n监视模式已退出")
+        
+    elif args.parallel is not None:
+        from parallel_runner import run_parallel
+        try:
+            results = run_parallel(args.config_file, args.parallel, args.sequence, backend=args.backend,
+                                   max_rate=args.cps, first_display=args.display_base,
+                                   cache=not args.no_cache)
+        except KeyboardInterrupt:
+            print("\n用户中断操作")
+            sys.exit(1)
+        if not results or any(r.error or any(seq.error for seq in r.sequences) for r in results):
+            sys.exit(1)
+        
+    elif args.stream:
+        try:
+            print(f"流式读取配置文件: {args.config_file}")
+            executor.execute_stream(args.sequence)
+            executor.log.flush()
+            
+            if isinstance(backend, RecordingBackend):
+                print(f"录制后端捕获的事件: {executor.backend.summary()}")
+            
+        except KeyboardInterrupt:
+            executor.log.flush()
+            print("\n用户中断操作")
+        except Exception as e:
+            executor.log.flush()
+            print(f"执行失败: {e}")
+            finish_outputs(metrics, args.metrics_json, profile)
+            sys.exit(1)
+        
     else:
         try:
             print(f"加载配置文件: {args.config_file}")
-            print(f"描述: {executor.config.get('description', '无描述')}")
+            print(f"描述: {executor.description}")
             
             # 验证配置
             errors = executor.validate_config()
@@ -272,12 +815,21 @@ def main():
                 sys.exit(1)
                 
             executor.execute_sequence(args.sequence)
+            executor.log.flush()
+            
+            if isinstance(backend, RecordingBackend):
+                print(f"录制后端捕获的事件: {executor.backend.summary()}")
             
         except KeyboardInterrupt:
+            executor.log.flush()
             print("\n用户中断操作")
         except Exception as e:
+            executor.log.flush()
             print(f"执行失败: {e}")
+            finish_outputs(metrics, args.metrics_json, profile)
             sys.exit(1)
+    
+    finish_outputs(metrics, args.metrics_json, profile, executor.log)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
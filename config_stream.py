@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式配置读取
+增量解析 click_sequences，逐个产出动作，内存占用与配置文件大小无关
+
+限制：
+- 'settings' 需要写在 'click_sequences' 之前才能在执行前生效
+- 序列的 'name' 需要写在 'actions' 之前，否则按未命名序列处理
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from action_plan import PlanError
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class StreamedSequence:
+    """流式读取中的一个序列，actions 只能按顺序遍历一次"""
+
+    def __init__(self, index: int, meta: Dict[str, Any], actions: Iterator[Tuple[int, Any]]):
+        self.index = index
+        self.meta = meta
+        self.name = meta.get('name', '未命名序列')
+        self.actions = actions
+
+
+class ConfigStream:
+    """
+    增量JSON配置读取器
+
+    用法:
+        with ConfigStream(path) as stream:
+            for sequence in stream.sequences():
+                for j, action in sequence.actions:
+                    ...
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 16):
+        self.path = path
+        self.chunk_size = chunk_size
+        # 已解析的顶层字段（click_sequences 除外）
+        self.meta: Dict[str, Any] = {}
+        self._file = None
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._base = 0
+        self._eof = False
+
+    def __enter__(self):
+        self._file = open(self.path, 'r', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---- 底层读取 ----
+
+    def _error(self, message: str) -> PlanError:
+        return PlanError([f"配置文件格式错误 (位置 {self._base + self._pos}): {message}"])
+
+    def _fill(self) -> bool:
+        """读入下一块数据，已消费的部分会被丢弃以保持内存平稳"""
+        if self._eof:
+            return False
+        chunk = self._file.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos:
+            self._base += self._pos
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += chunk
+        return True
+
+    def _peek(self) -> str:
+        """跳过空白并返回下一个字符，文件结束时返回空串"""
+        while True:
+            buf = self._buf
+            pos = self._pos = _WHITESPACE.match(buf, self._pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise self._error(f"期望 '{char}'，实际为 '{found or '文件结束'}'")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """解析一个完整的JSON值（数据不足时继续读入）"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise self._error(e.msg)
+            # 值恰好结束在缓冲区末尾时可能是被截断的数字，需要再读一块确认
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _key(self) -> str:
+        if self._peek() != '"':
+            raise self._error("期望字段名")
+        key = self._value()
+        self._expect(':')
+        return key
+
+    def _members(self) -> Iterator[str]:
+        """遍历对象的字段名（调用方负责消费对应的值），已消费起始的 '{'"""
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            yield self._key()
+            separator = self._peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise self._error(f"期望 ',' 或 '}}'，实际为 '{separator or '文件结束'}'")
+
+    def _elements(self) -> Iterator[int]:
+        """遍历数组元素的序号（调用方负责消费元素），已消费起始的 '['"""
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        index = 1
+        while True:
+            yield index
+            separator = self._peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise self._error(f"期望 ',' 或 ']'，实际为 '{separator or '文件结束'}'")
+            index += 1
+
+    # ---- 结构遍历 ----
+
+    def _actions(self) -> Iterator[Tuple[int, Any]]:
+        for j in self._elements():
+            yield j, self._value()
+
+    def _sequence(self, index: int) -> Iterator[StreamedSequence]:
+        if self._peek() != '{':
+            # 非对象元素：整体读掉，交给调用方报告错误
+            self._value()
+            raise PlanError([f"序列 {index} 必须是对象"])
+        self._pos += 1
+
+        meta: Dict[str, Any] = {}
+        has_actions = False
+        for key in self._members():
+            if key != 'actions':
+                meta[key] = self._value()
+                continue
+            if self._peek() != '[':
+                raise PlanError([f"序列 {index} 的 'actions' 必须是数组"])
+            self._pos += 1
+            has_actions = True
+            sequence = StreamedSequence(index, dict(meta), self._actions())
+            yield sequence
+            # 调用方可能跳过了该序列，读完剩余动作
+            for _ in sequence.actions:
+                pass
+
+        if not has_actions:
+            raise PlanError([f"序列 {index} 缺少 'actions' 字段"])
+
+    def sequences(self) -> Iterator[StreamedSequence]:
+        """按文件顺序产出序列；顶层的其他字段存入 meta"""
+        if self._file is None:
+            raise RuntimeError("ConfigStream 需要在 with 语句中使用")
+
+        self._expect('{')
+        found = False
+        for key in self._members():
+            if key != 'click_sequences':
+                self.meta[key] = self._value()
+                continue
+            if self._peek() != '[':
+                raise PlanError(["'click_sequences' 必须是数组"])
+            self._pos += 1
+            found = True
+            for index in self._elements():
+                yield from self._sequence(index)
+
+        if not found:
+            raise PlanError(["缺少 'click_sequences' 字段"])
+        if self._peek():
+            raise self._error("顶层对象之后存在多余内容")
+
+    @property
+    def settings(self) -> Optional[Dict[str, Any]]:
+        """目前已读到的 settings 字段"""
+        return self.meta.get('settings')
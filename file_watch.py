@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件变化监视
+Linux 上通过 ctypes 调用 inotify，其他平台或 inotify 不可用时退回到轮询修改时间
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Optional, Tuple
+
+# inotify 常量（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# 连续写入（编辑器先截断再写入、先写临时文件再改名）合并为一次变化
+DEBOUNCE = 0.05
+
+
+def _load_inotify():
+    """返回 (inotify_init1, inotify_add_watch)，不可用时返回 None"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        init1 = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    init1.argtypes = [ctypes.c_int]
+    init1.restype = ctypes.c_int
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    add_watch.restype = ctypes.c_int
+    return init1, add_watch
+
+
+class FileWatcher:
+    """
+    监视单个文件的内容变化
+
+    inotify 模式下监视文件所在目录，这样编辑器以 "写临时文件再改名" 方式保存时也能收到通知。
+
+    用法:
+        watcher = FileWatcher('click_config.json')
+        while watcher.wait():
+            ...  # 文件已变化
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.25):
+        self.path = os.path.abspath(path)
+        self.directory, self.name = os.path.split(self.path)
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._stamp = self._stat()
+
+        functions = _load_inotify()
+        if functions is not None:
+            init1, add_watch = functions
+            fd = init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+                if add_watch(fd, os.fsencode(self.directory), mask) >= 0:
+                    self._fd = fd
+                else:
+                    os.close(fd)
+
+    @property
+    def method(self) -> str:
+        return 'inotify' if self._fd is not None else f'轮询 ({self.poll_interval:g} 秒)'
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _changed(self) -> bool:
+        """文件的修改时间/大小/inode 是否与上次记录不同（同时更新记录）"""
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def _read_events(self) -> bool:
+        """读出所有待处理的 inotify 事件，返回其中是否有目标文件"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                start = offset + _EVENT_HEADER.size
+                name = data[start:start + length].rstrip(b'\0')
+                if os.fsdecode(name) == self.name:
+                    relevant = True
+                offset = start + length
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞直到文件内容发生变化
+
+        Returns:
+            bool: 文件已变化返回 True，超时返回 False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if self._fd is not None:
+                ready, _, _ = select.select([self._fd], [], [], remaining)
+                if ready and self._read_events():
+                    # 合并紧随其后的写入
+                    while select.select([self._fd], [], [], DEBOUNCE)[0]:
+                        self._read_events()
+                    if self._changed():
+                        return True
+            else:
+                time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+                if self._changed():
+                    # 轮询时同样等待写入结束
+                    time.sleep(DEBOUNCE)
+                    self._changed()
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图形界面的日志泵
+任意线程（连续点击、回放、pynput 监听线程）只把日志追加到队列，
+由 Tk 主循环定时批量写入文本框，并只保留最近的若干行
+"""
+
+import threading
+import time
+import tkinter as tk
+from collections import deque
+
+# 文本框中保留的最多行数
+MAX_LINES = 2000
+
+# 主循环写入日志的间隔（毫秒）
+INTERVAL_MS = 50
+
+
+class LogPump:
+    """
+    线程安全的日志队列，定时批量写入 ScrolledText
+
+    用法:
+        self.log_pump = LogPump(self.root, self.log_text)
+        self.log_pump.put("点击完成")   # 可在任意线程调用
+    """
+
+    def __init__(self, root, widget, max_lines: int = MAX_LINES, interval_ms: int = INTERVAL_MS):
+        self.root = root
+        self.widget = widget
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        # 队列同样只保留最近 max_lines 条，写入跟不上时丢弃最早的日志
+        self._queue = deque(maxlen=max_lines)
+        self._lines = 0
+        self._skipped = 0
+        # 同一秒内的日志复用格式化好的时间戳
+        self._second = None
+        self._stamp = ''
+        self._schedule()
+
+    def put(self, message: str):
+        """添加一条日志（可在任意线程调用，不访问 Tk）"""
+        queue = self._queue
+        if len(queue) == queue.maxlen:
+            self._skipped += 1
+        queue.append((time.time(), message))
+
+    def flush(self):
+        """在主线程中立即写入排队的日志并刷新界面（主线程随后要阻塞时调用）"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        self._drain()
+        self.root.update_idletasks()
+
+    def clear(self):
+        """清空文本框和未写入的日志"""
+        self._queue.clear()
+        self._skipped = 0
+        self.widget.delete('1.0', tk.END)
+        self._lines = 0
+
+    def _schedule(self):
+        try:
+            self.root.after(self.interval_ms, self._tick)
+        except tk.TclError:
+            # 窗口已销毁
+            pass
+
+    def _tick(self):
+        self._drain()
+        self._schedule()
+
+    def _timestamp(self, timestamp: float) -> str:
+        second = int(timestamp)
+        if second != self._second:
+            self._second = second
+            self._stamp = time.strftime("%H:%M:%S", time.localtime(second))
+        return self._stamp
+
+    def _drain(self):
+        queue = self._queue
+        if not queue:
+            return
+        lines = []
+        skipped, self._skipped = self._skipped, 0
+        if skipped:
+            lines.append(f"... 日志过多，省略了 {skipped} 条 ...")
+        # 只取出当前已有的条目，其他线程同时追加的留到下一轮
+        for _ in range(len(queue)):
+            timestamp, message = queue.popleft()
+            lines.append(f"[{self._timestamp(timestamp)}] {message}")
+
+        widget = self.widget
+        try:
+            widget.insert(tk.END, '\n'.join(lines) + '\n')
+            self._lines += sum(line.count('\n') + 1 for line in lines)
+            excess = self._lines - self.max_lines
+            if excess > 0:
+                widget.delete('1.0', f"{excess + 1}.0")
+                self._lines -= excess
+            widget.see(tk.END)
+        except tk.TclError:
+            pass
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+执行指标
+按动作类型和序列记录每个动作的开始延迟（实际开始时刻相对其截止时间，只统计开始前有等待的动作）、注入耗时和等待耗时，
+使用对数分桶直方图（每次记录只做一次 frexp 和几次加法），
+运行结束时导出JSON，长时间运行期间定期写出 Prometheus 文本格式文件
+"""
+
+import json
+import math
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 第 k 个桶的上界为 BUCKET_BASE × 2^k 秒（1微秒 ~ 约134秒），超出的值计入最后一个桶
+BUCKET_BASE = 1e-6
+BUCKET_COUNT = 28
+
+# 每个动作记录的三项指标: (名称, 说明)
+METRICS = (
+    ('start_lateness', '动作实际开始时刻相对其截止时间的延迟（只统计开始前等待过的动作）'),
+    ('injection', '动作注入耗时（不含等待）'),
+    ('sleep', '动作前后及内部的等待耗时'),
+)
+
+METRICS_VERSION = 1
+
+
+class Histogram:
+    """对数分桶直方图"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds <= BUCKET_BASE:
+            index = 0
+        else:
+            mantissa, exponent = math.frexp(seconds / BUCKET_BASE)
+            # 恰好是2的整数次幂时属于下一级的桶（上界包含在内）
+            index = exponent - 1 if mantissa == 0.5 else exponent
+            if index >= BUCKET_COUNT:
+                index = BUCKET_COUNT - 1
+        self.buckets[index] += 1
+
+    @staticmethod
+    def upper_bound(index: int) -> float:
+        return BUCKET_BASE * (1 << index)
+
+    def quantile(self, q: float) -> float:
+        """估计分位数（返回所在桶的上界，不超过最大值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        """JSON 表示（时间单位为秒，buckets 只包含非空桶：上界 -> 数量）"""
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': {f"{self.upper_bound(i):g}": n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ExecutionMetrics:
+    """
+    执行器的指标收集
+
+    observe 由执行器在每个动作结束后调用；指定了 prometheus_path 时，
+    每隔 interval 秒（在动作之间检查）原子地重写一次该文件。
+    """
+
+    def __init__(self, prometheus_path: Optional[str] = None, interval: float = 10.0,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.prometheus_path = prometheus_path
+        self.interval = interval
+        self.clock = clock
+        self.started = time.time()
+        self._origin = clock()
+        self._next_write = self._origin + interval
+        # (标签名, 标签值) -> 三项指标的直方图
+        self._histograms: Dict[Tuple[str, str], Tuple[Histogram, Histogram, Histogram]] = {}
+        # (序列, 动作类型) -> 需要更新的6个直方图，每个动作只查一次字典
+        self._targets: Dict[Tuple[str, str], Tuple[Histogram, ...]] = {}
+
+    def _group(self, label: str, value: str) -> Tuple[Histogram, Histogram, Histogram]:
+        key = (label, value)
+        group = self._histograms.get(key)
+        if group is None:
+            group = self._histograms[key] = (Histogram(), Histogram(), Histogram())
+        return group
+
+    def observe(self, sequence: str, action: str, lateness: Optional[float], injection: float, sleep: float):
+        """记录一个动作的开始延迟、注入耗时和等待耗时（秒）；动作前没有等待时 lateness 为 None，不记录"""
+        targets = self._targets.get((sequence, action))
+        if targets is None:
+            targets = self._targets[(sequence, action)] = (self._group('action', action)
+                                                           + self._group('sequence', sequence))
+        for histogram, value in zip(targets, (lateness, injection, sleep, lateness, injection, sleep)):
+            if value is not None:
+                histogram.record(value)
+        if self.prometheus_path is not None and self.clock() >= self._next_write:
+            self.write_prometheus()
+
+    def to_dict(self) -> Dict:
+        result = {
+            'version': METRICS_VERSION,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started)),
+            'elapsed': self.clock() - self._origin,
+            'actions': {},
+            'sequences': {},
+        }
+        for (label, value), group in self._histograms.items():
+            section = result['actions' if label == 'action' else 'sequences']
+            section[value] = {name: histogram.to_dict() for (name, _), histogram in zip(METRICS, group)}
+        return result
+
+    def write_json(self, path: str):
+        _atomic_write(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def prometheus_text(self) -> str:
+        """Prometheus 文本格式（直方图的桶为累计计数）"""
+        lines: List[str] = []
+        for index, (name, help_text) in enumerate(METRICS):
+            for label in ('action', 'sequence'):
+                metric = f"zmh_{label}_{name}_seconds"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for (group_label, value), group in self._histograms.items():
+                    if group_label != label:
+                        continue
+                    histogram = group[index]
+                    labels = f'{label}="{_escape(value)}"'
+                    cumulative = 0
+                    for i, n in enumerate(histogram.buckets):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{{labels},le="{Histogram.upper_bound(i):g}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.total!r}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        lines.append("# HELP zmh_metrics_updated_timestamp_seconds 指标文件的写出时间")
+        lines.append("# TYPE zmh_metrics_updated_timestamp_seconds gauge")
+        lines.append(f"zmh_metrics_updated_timestamp_seconds {time.time():.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self):
+        """重写 Prometheus 指标文件，失败时静默忽略（不影响执行）"""
+        self._next_write = self.clock() + self.interval
+        try:
+            _atomic_write(self.prometheus_path, self.prometheus_text())
+        except OSError:
+            pass
+
+
+def _atomic_write(path: str, text: str):
+    """先写临时文件再替换，读取方不会看到写了一半的文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        # mkstemp 创建的文件只有属主可读，指标文件通常由其他用户的采集进程读取
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
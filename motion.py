@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鼠标轨迹简化
+录制轨迹时鼠标移动事件每秒可达数百到上千个，逐个保存会让录制文件和回放时的注入次数都很大。
+移动事件先缓存为一段轨迹，遇到点击/按键、停顿或缓存达到上限时用 Ramer–Douglas–Peucker 算法
+在像素容差内简化，只保留决定路径形状的点（连同各自的时间戳）
+"""
+
+from typing import List, Sequence, Tuple
+
+# 轨迹点: (时间戳, x, y)
+Point = Tuple[float, int, int]
+
+# 默认容差（像素）：简化后的折线与原轨迹的最大距离
+DEFAULT_TOLERANCE = 2.0
+
+# 两次移动间隔超过该值（秒）时视为停顿，在停顿处分段，悬停位置和停留时间得以保留
+DWELL_GAP = 0.1
+
+# 缓存的最大点数，达到后先简化已有部分，限制内存和单次简化的耗时
+MAX_PENDING = 512
+
+
+def simplify(points: Sequence[Point], tolerance: float = DEFAULT_TOLERANCE) -> List[Point]:
+    """
+    Ramer–Douglas–Peucker 简化（非递归），始终保留首尾两点
+
+    只按 x/y 坐标计算距离，保留点的时间戳不变。
+    """
+    count = len(points)
+    if count <= 2:
+        return list(points)
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    limit = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        _, x1, y1 = points[first]
+        _, x2, y2 = points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = dx * dx + dy * dy
+        farthest, distance = 0, -1.0
+        for i in range(first + 1, last):
+            _, x, y = points[i]
+            if length:
+                # 点到首尾连线距离的平方: 叉积² / 线段长度²
+                cross = dx * (y - y1) - dy * (x - x1)
+                d = cross * cross / length
+            else:
+                # 首尾重合（绕了一圈回到原处）时用到该点的距离
+                d = (x - x1) * (x - x1) + (y - y1) * (y - y1)
+            if d > distance:
+                farthest, distance = i, d
+        if distance > limit:
+            keep[farthest] = True
+            if farthest - first > 1:
+                stack.append((first, farthest))
+            if last - farthest > 1:
+                stack.append((farthest, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class MotionSimplifier:
+    """
+    边录制边简化鼠标轨迹
+
+    用法:
+        motion = MotionSimplifier()
+        for t, x, y in motion.add(t, x, y):      # 一段轨迹结束时返回简化后的点
+            ...
+        for t, x, y in motion.flush():          # 点击、按键或停止录制前取出剩余的点
+            ...
+    """
+
+    __slots__ = ('tolerance', 'dwell', 'max_pending', 'received', 'kept', '_pending')
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE, dwell: float = DWELL_GAP,
+                 max_pending: int = MAX_PENDING):
+        self.tolerance = tolerance
+        self.dwell = dwell
+        self.max_pending = max(max_pending, 3)
+        # 收到和保留的移动事件数
+        self.received = 0
+        self.kept = 0
+        self._pending: List[Point] = []
+
+    def add(self, t: float, x: int, y: int) -> List[Point]:
+        """加入一个移动事件，返回已确定保留的点（大多数时候为空）"""
+        self.received += 1
+        pending = self._pending
+        ready: List[Point] = []
+        if pending:
+            last_t, last_x, last_y = pending[-1]
+            if x == last_x and y == last_y:
+                return ready
+            if t - last_t > self.dwell:
+                ready = self.flush()
+                pending = self._pending
+        pending.append((t, int(x), int(y)))
+        if len(pending) >= self.max_pending:
+            # 最后一点留作下一部分的起点，保证分段处连续
+            ready += self._emit(simplify(pending, self.tolerance)[:-1])
+            del pending[:-1]
+        return ready
+
+    def flush(self) -> List[Point]:
+        """简化并取出缓存中的全部点"""
+        if not self._pending:
+            return []
+        points = simplify(self._pending, self.tolerance)
+        self._pending = []
+        return self._emit(points)
+
+    def _emit(self, points: List[Point]) -> List[Point]:
+        self.kept += len(points)
+        return points
+
+    def __len__(self):
+        return len(self._pending)
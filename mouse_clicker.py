@@ -9,27 +9,52 @@
 4. 连续点击（可设置间隔时间）
 5. 获取当前鼠标位置
 6. 拖拽操作
+7. 按坐标序列批量点击
 """
 
-import pyautogui
+import startup_timing
 import time
 import sys
 import argparse
-from typing import Tuple, Optional
+from typing import Callable, Iterable, Tuple, Optional
+
+from backends import BACKENDS, BackendUnavailableError, InputBackend, RecordingBackend, create_backend
+from timing import DeadlineScheduler, RateLimiter
+from patterns import click_points, file_points
+from structured_log import DEBUG, LEVELS, NOTICE, configure_default, default_logger
+
+startup_timing.mark('mouse_clicker 导入完成')
 
 class MouseClicker:
-    def __init__(self):
-        # 设置pyautogui的安全设置
-        pyautogui.FAILSAFE = True  # 鼠标移动到屏幕左上角时停止
-        pyautogui.PAUSE = 0.1  # 每次操作后暂停0.1秒
+    def __init__(self, max_rate: Optional[float] = None, backend: Optional[InputBackend] = None,
+                 sleeper: Optional[Callable[[float], float]] = None, log=None):
+        self.backend = backend if backend is not None else create_backend('pyautogui')
+        # 操作日志（structured_log.StructuredLogger），由后台线程写出
+        self.log = log if log is not None else default_logger()
+        # 等待到指定时刻的函数（剖析时记录等待区间），默认真实休眠
+        self.sleeper = sleeper
+        
+        if max_rate:
+            # 极速模式：取消固定停顿，由限速器按每秒动作数控制节奏
+            self.backend.configure(fail_safe=True, pause=0)
+            self.limiter = RateLimiter(max_rate, sleeper=sleeper)
+        else:
+            # 鼠标移动到屏幕左上角时停止，每次操作后暂停0.1秒
+            self.backend.configure(fail_safe=True, pause=0.1)
+            self.limiter = None
+        
+        # 屏幕尺寸在首次查询后缓存，避免每次点击都向系统查询
+        self._screen_size: Optional[Tuple[int, int]] = None
         
     def get_screen_size(self) -> Tuple[int, int]:
         """获取屏幕尺寸"""
-        return pyautogui.size()
+        if self._screen_size is None:
+            self._screen_size = self.backend.screen_size()
+        return self._screen_size
     
     def get_mouse_position(self) -> Tuple[int, int]:
         """获取当前鼠标位置"""
-        return pyautogui.position()
+        return self.backend.position()
     
     def click(self, x: int, y: int, button: str = 'left', clicks: int = 1, interval: float = 0.0) -> bool:
         """
@@ -50,20 +75,21 @@ class MouseClicker:
             
             # 检查坐标是否在屏幕范围内
             if not (0 <= x <= screen_width and 0 <= y <= screen_height):
-                print(f"错误：坐标 ({x}, {y}) 超出屏幕范围 ({screen_width}x{screen_height})")
+                self.log.error('out_of_bounds', "错误：坐标 ({x}, {y}) 超出屏幕范围 ({width}x{height})",
+                               x=x, y=y, width=screen_width, height=screen_height)
                 return False
             
-            print(f"点击坐标: ({x}, {y}), 按钮: {button}, 次数: {clicks}")
+            self.log.info('click', "点击坐标: ({x}, {y}), 按钮: {button}, 次数: {clicks}",
+                          x=x, y=y, button=button, clicks=clicks)
             
-            if clicks == 1:
-                pyautogui.click(x, y, button=button)
-            else:
-                pyautogui.click(x, y, clicks=clicks, interval=interval, button=button)
+            if self.limiter is not None:
+                self.limiter.acquire()
+            self.backend.click(x, y, button=button, clicks=clicks, interval=interval)
             
             return True
             
         except Exception as e:
-            print(f"点击操作失败: {e}")
+            self.log.error('click_failed', "点击操作失败: {error}", error=str(e))
             return False
     
     def double_click(self, x: int, y: int) -> bool:
@@ -89,11 +115,43 @@ class MouseClicker:
             bool: 操作是否成功
         """
         try:
-            print(f"拖拽: ({start_x}, {start_y}) -> ({end_x}, {end_y})")
-            pyautogui.drag(end_x - start_x, end_y - start_y, duration, button='left')
+            self.log.info('drag', "拖拽: ({start_x}, {start_y}) -> ({end_x}, {end_y})",
+                          start_x=start_x, start_y=start_y, end_x=end_x, end_y=end_y)
+            if self.limiter is not None:
+                self.limiter.acquire()
+            self.backend.drag(start_x, start_y, end_x, end_y, duration=duration, button='left')
+            return True
+        except Exception as e:
+            self.log.error('drag_failed', "拖拽操作失败: {error}", error=str(e))
+            return False
+    
+    def click_points(self, points: Iterable[Tuple[int, int]], button: str = 'left', interval: float = 0.0) -> bool:
+        """
+        依次点击一系列坐标
+        
+        points 可以是任意可迭代对象（如 patterns.grid_points 生成器），按需读取；
+        无间隔时分批提交给注入后端，有间隔时按绝对截止时间逐点等待。
+        
+        Args:
+            points: 坐标序列
+            button: 鼠标按钮
+            interval: 相邻两点的间隔时间（秒）
+        
+        Returns:
+            bool: 操作是否成功
+        """
+        try:
+            scheduler = DeadlineScheduler(sleeper=self.sleeper)
+            scheduler.reset()
+            count = click_points(self.backend, points, button=button, interval=interval, scheduler=scheduler,
+                                 limiter=self.limiter, bounds=self.get_screen_size())
+            self.log.notice('points_done', "完成 {count} 个点的点击", count=count)
             return True
+        except KeyboardInterrupt:
+            self.log.warning('interrupted', "\n用户中断操作")
+            return False
         except Exception as e:
-            print(f"拖拽操作失败: {e}")
+            self.log.error('points_failed', "批量点击操作失败: {error}", error=str(e))
             return False
     
     def continuous_click(self, x: int, y: int, count: int, interval: float = 1.0, button: str = 'left') -> bool:
@@ -111,19 +169,27 @@ class MouseClicker:
             bool: 操作是否成功
         """
         try:
-            print(f"连续点击 {count} 次，间隔 {interval} 秒")
+            log = self.log
+            log.notice('continuous_click', "连续点击 {count} 次，间隔 {interval} 秒", count=count, interval=interval)
+            scheduler = DeadlineScheduler(sleeper=self.sleeper)
+            scheduler.reset()
+            log.progress(0, count)
             for i in range(count):
                 if not self.click(x, y, button=button):
                     return False
+                log.debug('click_done', "完成第 {n} 次点击", n=i + 1)
+                log.progress(i + 1, count)
                 if i < count - 1:  # 最后一次点击后不需要等待
-                    time.sleep(interval)
-                print(f"完成第 {i + 1} 次点击")
+                    # 按绝对截止时间等待，点击本身的耗时不会累积
+                    scheduler.wait(interval)
+            report = scheduler.report(count, interval)
+            log.notice('rate', report.describe(), **report._asdict())
             return True
         except KeyboardInterrupt:
-            print("\n用户中断操作")
+            self.log.warning('interrupted', "\n用户中断操作")
             return False
         except Exception as e:
-            print(f"连续点击操作失败: {e}")
+            self.log.error('continuous_failed', "连续点击操作失败: {error}", error=str(e))
             return False
 
 def main():
@@ -134,11 +200,50 @@ def main():
     parser.add_argument('--right-click', '-r', nargs=2, type=int, metavar=('X', 'Y'), help='右键点击指定坐标')
     parser.add_argument('--continuous', '-cont', nargs=4, type=float, metavar=('X', 'Y', 'COUNT', 'INTERVAL'), help='连续点击：X Y 次数 间隔时间')
     parser.add_argument('--drag', nargs=4, type=int, metavar=('START_X', 'START_Y', 'END_X', 'END_Y'), help='拖拽操作')
+    parser.add_argument('--points', metavar='FILE', help='依次点击坐标文件中的点（每行 X,Y）')
+    parser.add_argument('--interval', type=float, default=0.0, help='--points 相邻两点的间隔时间（秒）')
     parser.add_argument('--delay', type=float, default=0, help='操作前延迟时间（秒）')
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='PREFIX',
+                        help='剖析本次运行：写出 PREFIX.prof（cProfile）和 PREFIX.trace.json（Chrome 时间线）')
+    parser.add_argument('--cps', type=float, help='极速模式：取消固定停顿，按每秒动作数限速')
+    parser.add_argument('--backend', '-b', choices=sorted(BACKENDS), default='pyautogui',
+                        help='输入注入后端（xtest 为Linux原生XTest注入；recording 只记录不注入、null 只计数不注入，可在无显示环境运行）')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='安静模式：不输出每次点击的日志，只输出汇总、警告和错误')
+    parser.add_argument('--log-level', choices=list(LEVELS), help='终端日志级别（默认 debug）')
+    parser.add_argument('--log-json', metavar='FILE', help='把操作日志以 JSON Lines 格式追加写入该文件')
     
     args = parser.parse_args()
+    startup_timing.mark('参数解析完成')
+    
+    if args.cps is not None and args.cps <= 0:
+        print("错误：--cps 必须大于0")
+        sys.exit(1)
     
-    clicker = MouseClicker()
+    if args.quiet or args.log_level or args.log_json:
+        level = LEVELS[args.log_level] if args.log_level else NOTICE if args.quiet else DEBUG
+        try:
+            configure_default(level, args.log_json)
+        except OSError as e:
+            print(f"错误：无法写入日志文件 {args.log_json} - {e}")
+            sys.exit(1)
+    
+    try:
+        backend = create_backend(args.backend)
+    except BackendUnavailableError as e:
+        print(f"错误：无法使用注入后端 '{args.backend}' - {e}")
+        sys.exit(1)
+    
+    profile = None
+    if args.profile:
+        # 只在剖析时导入 cProfile
+        from tracing import ProfileSession, TracingBackend
+        profile = ProfileSession(args.profile).start()
+        clicker = MouseClicker(max_rate=args.cps, backend=TracingBackend(backend, profile.tracer),
+                               sleeper=profile.tracer.sleeper())
+    else:
+        clicker = MouseClicker(max_rate=args.cps, backend=backend)
+    startup_timing.mark('注入后端就绪')
     
     # 显示屏幕信息
     screen_width, screen_height = clicker.get_screen_size()
@@ -169,11 +274,20 @@ def main():
     elif args.continuous:
         x, y, count, interval = args.continuous
         clicker.continuous_click(int(x), int(y), int(count), interval)
+        clicker.log.flush()
+        if clicker.limiter is not None:
+            print(f"极速模式: {clicker.limiter.report().describe()}")
     
     elif args.drag:
         start_x, start_y, end_x, end_y = args.drag
         clicker.drag(start_x, start_y, end_x, end_y)
     
+    elif args.points:
+        clicker.click_points(file_points(args.points), interval=args.interval)
+        clicker.log.flush()
+        if clicker.limiter is not None:
+            print(f"极速模式: {clicker.limiter.report().describe()}")
+    
     else:
         # 交互模式
         print("\n=== 鼠标模拟点击工具 ===")
@@ -187,6 +301,8 @@ def main():
         
         while True:
             try:
+                # 上一个操作的日志写完后再显示提示
+                clicker.log.flush()
                 choice = input("\n请选择操作 (0-6): ").strip()
                 
                 if choice == '0':
@@ -236,6 +352,13 @@ def main():
                 print("输入格式错误，请输入数字")
             except Exception as e:
                 print(f"操作失败: {e}")
+    
+    clicker.log.flush()
+    if profile is not None:
+        profile.stop()
+    
+    if isinstance(backend, RecordingBackend):
+        print(f"录制后端捕获的事件: {backend.summary()}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -5,23 +5,59 @@
 提供图形界面的鼠标自动化操作工具
 """
 
+import startup_timing
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import pyautogui
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import time
 import threading
 import platform
+import os
+from collections import deque
 from typing import Tuple
-try:
-    from pynput import mouse, keyboard
-    PYNPUT_AVAILABLE = True
-    KEYBOARD_AVAILABLE = True
-    print("✅ pynput录制功能已启用 (Python 3.11环境)")
-except ImportError:
-    PYNPUT_AVAILABLE = False
-    KEYBOARD_AVAILABLE = False
-    print("警告: pynput未安装，将使用简化的录制功能")
-    print("要使用完整的全局录制功能，请运行: pip install pynput")
+from backends import LazyBackend
+from timing import DeadlineScheduler
+from capture import InputCapture
+from motion import DEFAULT_TOLERANCE
+from recording import BUTTON_NAMES, EXTENSION, EventCode, EventRecorder, MappedRecording, Replayer
+from background_cache import BackgroundCache
+from log_pump import LogPump
+from position_tracker import PositionTracker
+
+# pynput 在窗口显示后由后台线程导入（load_pynput），导入完成前为 None
+mouse = keyboard = None
+PYNPUT_AVAILABLE = False
+KEYBOARD_AVAILABLE = False
+_pynput_loaded = False
+_pynput_lock = threading.Lock()
+
+
+def load_pynput() -> bool:
+    """导入 pynput 并返回是否可用（线程安全，只导入一次；其他线程正在导入时等待其完成）"""
+    global mouse, keyboard, PYNPUT_AVAILABLE, KEYBOARD_AVAILABLE, _pynput_loaded
+    with _pynput_lock:
+        if not _pynput_loaded:
+            _pynput_loaded = True
+            try:
+                mouse = startup_timing.load('pynput.mouse')
+                keyboard = startup_timing.load('pynput.keyboard')
+                PYNPUT_AVAILABLE = True
+                KEYBOARD_AVAILABLE = True
+                print("✅ pynput录制功能已启用 (Python 3.11环境)")
+            except ImportError:
+                print("警告: pynput未安装，将使用简化的录制功能")
+                print("要使用完整的全局录制功能，请运行: pip install pynput")
+    return PYNPUT_AVAILABLE
+
+startup_timing.mark('mouse_clicker_gui 导入完成')
+
+# 窗口尺寸停止变化多久后重新缩放背景（毫秒）
+BACKGROUND_RESIZE_DELAY_MS = 300
+
+# 主线程检查后台缩放结果的间隔（毫秒）
+BACKGROUND_POLL_MS = 50
+
+# 主线程检查输入库是否加载完成的间隔（毫秒）
+INPUT_POLL_MS = 50
 
 class MouseClickerGUI:
     def __init__(self, root):
@@ -44,12 +80,12 @@ class MouseClickerGUI:
             # 如果设置图标失败，继续运行程序
             print(f"设置图标失败: {e}")
         
-        # 设置pyautogui - 根据平台优化
+        # 输入注入后端 - 根据平台优化（pyautogui 在窗口显示后由后台线程导入）
+        self.backend = LazyBackend('pyautogui')
         current_platform = platform.system()
         if current_platform == 'Windows':
             # Windows平台优化设置
-            pyautogui.FAILSAFE = True
-            pyautogui.PAUSE = 0.1
+            self.backend.configure(fail_safe=True, pause=0.1)
             # 确保在Windows上正确处理DPI缩放
             try:
                 import ctypes
@@ -57,11 +93,9 @@ class MouseClickerGUI:
             except:
                 pass  # 如果设置失败，继续使用默认设置
         elif current_platform == 'Darwin':  # macOS
-            pyautogui.FAILSAFE = False  # macOS上可能导致问题
-            pyautogui.PAUSE = 0.2
+            self.backend.configure(fail_safe=False, pause=0.2)  # fail-safe在macOS上可能导致问题
         else:  # Linux和其他平台
-            pyautogui.FAILSAFE = True
-            pyautogui.PAUSE = 0.1
+            self.backend.configure(fail_safe=True, pause=0.1)
         
         # 变量
         self.is_running = False
@@ -69,48 +103,78 @@ class MouseClickerGUI:
         
         # 录制和回放相关变量
         self.is_recording = False
-        self.recorded_actions = []
-        self.recording_start_time = None
+        self.recorder = EventRecorder()
+        # 从文件加载的录制（内存映射），加载后替代 recorder 中的内容
+        self.loaded_recording = None
         self.mouse_listener = None
         self.keyboard_listener = None
+        # 录制采集：监听器回调只写入环形缓冲区，采集线程写入 recorder 并输出日志
+        self.capture = None
+        self.mouse_ring = None
+        self.keyboard_ring = None
+        # 本次录制是否记录鼠标轨迹（移动 + 分开的按下/释放）
+        self.recording_motion = False
         
         # 全局快捷键监听器
         self.global_hotkey_listener = None
         
+        # 鼠标位置显示（输入库加载完成后创建）
+        self.position_tracker = None
+        
+        # 输入库加载结束（成功或失败）时由后台线程设置；Tk 只能在主线程中访问
+        self._input_loaded = threading.Event()
+        self._input_ok = False
+        
         self.setup_ui()
+        threading.Thread(target=self._load_input_libraries, name='load-input', daemon=True).start()
+        self.root.after(INPUT_POLL_MS, self._poll_input_ready)
+        
+    def _load_input_libraries(self):
+        """后台线程：导入 pyautogui 和 pynput，只设置完成标志，不访问 Tk"""
+        try:
+            self.backend.load()
+            load_pynput()
+            startup_timing.mark('输入库加载完成')
+            self._input_ok = True
+        except Exception as e:
+            self.log_message(f"❌ 加载输入注入库失败: {e}")
+        finally:
+            self._input_loaded.set()
+        
+    def _poll_input_ready(self):
+        """主线程定时检查输入库是否加载完成，成功后启用依赖它们的功能"""
+        if not self._input_loaded.is_set():
+            self.root.after(INPUT_POLL_MS, self._poll_input_ready)
+        elif self._input_ok:
+            self._on_input_ready()
+        
+    def _on_input_ready(self):
+        screen_width, screen_height = self.backend.screen_size()
+        self.screen_size_text.set(f"屏幕尺寸: {screen_width} x {screen_height}")
         self.setup_global_hotkeys()
-        self.update_position()
+        # 鼠标位置显示由 pynput 移动事件驱动，窗口隐藏时停止
+        self.position_tracker = PositionTracker(self.root, self.current_position, self.backend.position,
+                                                mouse.Listener if PYNPUT_AVAILABLE else None)
+        self.position_tracker.start()
         
     def setup_ui(self):
         """设置用户界面"""
-        # 设置背景图片
-        try:
-            import os
-            from PIL import Image, ImageTk
-            background_path = os.path.join(os.path.dirname(__file__), "background.png")
-            if os.path.exists(background_path):
-                # 加载背景图片，自动检测格式
-                bg_image = Image.open(background_path)
-                # 转换为RGB模式以确保兼容性
-                if bg_image.mode != 'RGB':
-                    bg_image = bg_image.convert('RGB')
-                # 调整图片大小以适应窗口
-                bg_image = bg_image.resize((600, 700), Image.Resampling.LANCZOS)
-                self.bg_photo = ImageTk.PhotoImage(bg_image)
-                
-                # 创建背景标签
-                bg_label = tk.Label(self.root, image=self.bg_photo)
-                bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-                
-                # 确保背景在最底层
-                bg_label.lower()
-                print("✅ 背景图片加载成功")
-            else:
-                print("⚠️ 背景图片文件不存在，使用默认背景")
-        except Exception as e:
-            print(f"❌ 设置背景图片失败: {e}")
-            print("使用默认背景色")
-            self.root.configure(bg='#f0f0f0')
+        # 背景图片在窗口第一次显示之后再加载，不推迟首屏
+        self.bg_photo = None
+        self.bg_label = None
+        self.bg_cache = None
+        self._bg_size = None
+        self._bg_resize_job = None
+        # 后台缩放线程的结果 (缓存, 尺寸, 路径, 错误)，由主线程的 _poll_background 取出；Tk 只能在主线程中访问
+        self._bg_results = deque()
+        self._bg_rendering = 0
+        background_path = os.path.join(os.path.dirname(__file__), "background.png")
+        if os.path.exists(background_path):
+            self.bg_cache = BackgroundCache(background_path)
+            self.root.bind('<Map>', self._on_first_map, add='+')
+            self.root.bind('<Configure>', self._on_resize, add='+')
+        else:
+            print("⚠️ 背景图片文件不存在，使用默认背景")
         
         # 主框架 - 确保可见性
         main_frame = ttk.Frame(self.root, padding="10")
@@ -128,8 +192,8 @@ class MouseClickerGUI:
         info_frame = ttk.LabelFrame(main_frame, text="屏幕信息", padding="5")
         info_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        screen_size = pyautogui.size()
-        ttk.Label(info_frame, text=f"屏幕尺寸: {screen_size[0]} x {screen_size[1]}").grid(row=0, column=0, sticky=tk.W)
+        self.screen_size_text = tk.StringVar(value="屏幕尺寸: 加载中...")
+        ttk.Label(info_frame, textvariable=self.screen_size_text).grid(row=0, column=0, sticky=tk.W)
         ttk.Label(info_frame, text="当前鼠标位置:").grid(row=1, column=0, sticky=tk.W)
         ttk.Label(info_frame, textvariable=self.current_position).grid(row=1, column=1, sticky=tk.W)
         
@@ -220,6 +284,13 @@ class MouseClickerGUI:
         self.stop_record_button = ttk.Button(record_control_frame, text="停止录制", command=self.stop_recording, state="disabled")
         self.stop_record_button.grid(row=0, column=1, padx=(0, 5))
         
+        ttk.Button(record_control_frame, text="保存录制", command=self.save_recording_file).grid(row=0, column=2, padx=(0, 5))
+        ttk.Button(record_control_frame, text="加载录制", command=self.load_recording_file).grid(row=0, column=3, padx=(0, 5))
+        
+        self.record_motion_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(record_control_frame, text="录制鼠标轨迹(拖拽/悬停)",
+                        variable=self.record_motion_var).grid(row=0, column=4, padx=(5, 0))
+        
         # 回放控制
         replay_frame = ttk.Frame(record_frame)
         replay_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(5, 0))
@@ -243,32 +314,110 @@ class MouseClickerGUI:
         
         self.log_text = scrolledtext.ScrolledText(log_frame, height=10, width=70)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # 各线程的日志经队列由主循环批量写入，文本框只保留最近的日志
+        self.log_pump = LogPump(self.root, self.log_text)
         
         ttk.Button(log_frame, text="清空日志", command=self.clear_log).grid(row=1, column=0, pady=(5, 0))
         
+    def _on_first_map(self, event):
+        if event.widget is not self.root or self._bg_size is not None:
+            return
+        # 窗口映射时排队的重绘先执行，背景随后加载
+        self.root.after_idle(self.load_background)
+        
+    def load_background(self):
+        """按当前窗口尺寸加载背景：缓存命中时直接解码，否则在后台线程中缩放后再显示"""
+        width, height = self.root.winfo_width(), self.root.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = 600, 700
+        size = (width, height)
+        if size == self._bg_size:
+            return
+        self._bg_size = size
+        cache = self.bg_cache
+        path = cache.lookup(size)
+        if path is not None:
+            self._show_background(path, size)
+            return
+        
+        def render():
+            # 后台线程只把结果放入队列，不访问 Tk
+            try:
+                self._bg_results.append((cache, size, cache.render(size), None))
+            except Exception as e:
+                self._bg_results.append((cache, size, None, e))
+        
+        self._bg_rendering += 1
+        if self._bg_rendering == 1:
+            self.root.after(BACKGROUND_POLL_MS, self._poll_background)
+        threading.Thread(target=render, name='background-render', daemon=True).start()
+        
+    def _poll_background(self):
+        """主线程定时取出后台缩放的结果，还有缩放未完成时继续检查"""
+        while self._bg_results:
+            cache, size, path, error = self._bg_results.popleft()
+            self._bg_rendering -= 1
+            if error is not None:
+                self._background_failed(error)
+            else:
+                self._show_background(path, size)
+                # 缓存目录不可写时结果在临时文件中，PhotoImage 已读入内存
+                cache.discard(path)
+        if self._bg_rendering:
+            self.root.after(BACKGROUND_POLL_MS, self._poll_background)
+        
+    def _show_background(self, path, size):
+        if size != self._bg_size:
+            # 缩放期间窗口尺寸又变了，等待下一次缩放的结果
+            return
+        try:
+            self.bg_photo = tk.PhotoImage(file=path)
+        except tk.TclError as e:
+            self._background_failed(e)
+            return
+        if self.bg_label is None:
+            # 创建背景标签
+            self.bg_label = tk.Label(self.root, image=self.bg_photo)
+            self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+            # 确保背景在最底层
+            self.bg_label.lower()
+            print("✅ 背景图片加载成功")
+        else:
+            self.bg_label.configure(image=self.bg_photo)
+        
+    def _background_failed(self, error):
+        print(f"❌ 设置背景图片失败: {error}")
+        print("使用默认背景色")
+        self.root.configure(bg='#f0f0f0')
+        # 不再随窗口尺寸重试
+        self.bg_cache = None
+        
+    def _on_resize(self, event):
+        """窗口尺寸变化后等待拖动停止再重新缩放背景"""
+        if event.widget is not self.root or self.bg_cache is None or self._bg_size is None:
+            return
+        if (event.width, event.height) == self._bg_size:
+            return
+        if self._bg_resize_job is not None:
+            self.root.after_cancel(self._bg_resize_job)
+        self._bg_resize_job = self.root.after(BACKGROUND_RESIZE_DELAY_MS, self._resize_background)
+        
+    def _resize_background(self):
+        self._bg_resize_job = None
+        if self.bg_cache is not None:
+            self.load_background()
+        
     def log_message(self, message):
-        """添加日志消息"""
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """添加日志消息（可在任意线程调用）"""
+        self.log_pump.put(message)
         
     def clear_log(self):
         """清空日志"""
-        self.log_text.delete(1.0, tk.END)
-        
-    def update_position(self):
-        """更新鼠标位置显示"""
-        try:
-            x, y = pyautogui.position()
-            self.current_position.set(f"({x}, {y})")
-        except:
-            pass
-        self.root.after(100, self.update_position)
+        self.log_pump.clear()
         
     def get_current_position(self):
         """获取当前鼠标位置并填入坐标框"""
-        x, y = pyautogui.position()
+        x, y = self.backend.position()
         self.x_entry.delete(0, tk.END)
         self.x_entry.insert(0, str(x))
         self.y_entry.delete(0, tk.END)
@@ -290,6 +439,7 @@ class MouseClickerGUI:
             delay = float(self.delay_entry.get())
             if delay > 0:
                 self.log_message(f"等待 {delay} 秒...")
+                self.log_pump.flush()
                 time.sleep(delay)
         except ValueError:
             pass
@@ -299,7 +449,7 @@ class MouseClickerGUI:
         try:
             x, y = self.get_coordinates()
             self.apply_delay()
-            pyautogui.click(x, y)
+            self.backend.click(x, y)
             self.log_message(f"单击坐标: ({x}, {y})")
         except Exception as e:
             messagebox.showerror("错误", str(e))
@@ -309,7 +459,7 @@ class MouseClickerGUI:
         try:
             x, y = self.get_coordinates()
             self.apply_delay()
-            pyautogui.doubleClick(x, y)
+            self.backend.click(x, y, clicks=2)
             self.log_message(f"双击坐标: ({x}, {y})")
         except Exception as e:
             messagebox.showerror("错误", str(e))
@@ -319,7 +469,7 @@ class MouseClickerGUI:
         try:
             x, y = self.get_coordinates()
             self.apply_delay()
-            pyautogui.rightClick(x, y)
+            self.backend.click(x, y, button='right')
             self.log_message(f"右键点击坐标: ({x}, {y})")
         except Exception as e:
             messagebox.showerror("错误", str(e))
@@ -354,20 +504,26 @@ class MouseClickerGUI:
             self.apply_delay()
             self.log_message(f"开始连续点击: ({x}, {y}), 次数: {count}, 间隔: {interval}秒")
             
+            # 按绝对截止时间调度，点击和日志的耗时不会累积到间隔中
+            scheduler = DeadlineScheduler()
+            scheduler.reset()
+            clicked = 0
             for i in range(count):
                 if not self.is_running:
                     break
                     
-                pyautogui.click(x, y)
+                self.backend.click(x, y)
+                clicked += 1
                 self.log_message(f"完成第 {i + 1} 次点击")
                 
                 if i < count - 1 and self.is_running:
-                    time.sleep(interval)
+                    scheduler.wait(interval)
                     
             if self.is_running:
                 self.log_message("连续点击完成")
             else:
                 self.log_message("连续点击已停止")
+            self.log_message(scheduler.report(clicked, interval).describe())
                 
         except Exception as e:
             self.log_message(f"连续点击出错: {e}")
@@ -395,10 +551,8 @@ class MouseClickerGUI:
             
             self.apply_delay()
             
-            # 移动到起始位置
-            pyautogui.moveTo(start_x, start_y)
-            # 执行拖拽
-            pyautogui.drag(end_x - start_x, end_y - start_y, duration=1.0)
+            # 移动到起始位置并拖拽到结束位置
+            self.backend.drag(start_x, start_y, end_x, end_y, duration=1.0)
             
             self.log_message(f"拖拽操作: ({start_x}, {start_y}) -> ({end_x}, {end_y})")
             
@@ -407,16 +561,21 @@ class MouseClickerGUI:
     
     def start_recording(self):
         """开始录制鼠标操作"""
-        if not PYNPUT_AVAILABLE:
+        if not load_pynput():
             messagebox.showwarning("警告", "pynput库未安装，无法使用录制功能。\n请运行: pip install pynput")
             return
             
         if self.is_recording:
             return
             
+        self.recording_motion = self.record_motion_var.get()
+        self.recorder = EventRecorder(motion_tolerance=DEFAULT_TOLERANCE if self.recording_motion else None)
+        self._close_loaded_recording()
+        self.capture = InputCapture(self._store_captured, log=self.log_message)
+        self.mouse_ring = self.capture.ring()
+        self.keyboard_ring = self.capture.ring()
+        self.capture.start()
         self.is_recording = True
-        self.recorded_actions = []
-        self.recording_start_time = time.time()
         
         # 更新按钮状态
         self.start_record_button.config(state="disabled")
@@ -425,6 +584,7 @@ class MouseClickerGUI:
         # 启动鼠标监听器
         try:
             self.mouse_listener = mouse.Listener(
+                on_move=self.record_mouse_move if self.recording_motion else None,
                 on_click=self.record_mouse_click,
                 on_scroll=self.record_mouse_scroll
             )
@@ -468,117 +628,94 @@ class MouseClickerGUI:
             self.keyboard_listener.stop()
             self.keyboard_listener = None
         
+        # 监听器停止后处理完剩余事件
+        self.capture.stop()
+        dropped = self.capture.dropped
+        self.capture = None
+        self.recorder.finish()
+        
         # 更新按钮状态
         self.start_record_button.config(state="normal")
         self.stop_record_button.config(state="disabled")
         
-        self.log_message(f"录制停止，共录制 {len(self.recorded_actions)} 个操作")
+        self.log_message(f"录制停止，共录制 {len(self.recorder)} 个操作")
+        motion = self.recorder.motion
+        if motion is not None and motion.received:
+            self.log_message(f"鼠标轨迹: {motion.received} 个移动事件简化为 {motion.kept} 个轨迹点")
+        if dropped:
+            self.log_message(f"警告: 录制缓冲区已满，丢失了 {dropped} 个操作")
+    
+    # 以下回调运行在 pynput 的系统输入钩子线程中，只取时间戳并写入环形缓冲区
+    
+    def record_mouse_move(self, x, y):
+        """记录鼠标移动事件（轨迹录制模式）"""
+        if self.is_recording:
+            self.mouse_ring.push((time.perf_counter(), EventCode.MOVE, x, y, None, None))
     
     def record_mouse_click(self, x, y, button, pressed):
-        """记录鼠标点击事件"""
+        """记录鼠标点击事件：轨迹录制模式分别记录按下和释放，否则只记录按下"""
         if not self.is_recording:
             return
-            
-        if pressed:  # 只记录按下事件
-            current_time = time.time()
-            delay = current_time - self.recording_start_time if self.recorded_actions else 0
-            
-            action = {
-                'type': 'click',
-                'x': x,
-                'y': y,
-                'button': str(button),
-                'delay': delay
-            }
-            
-            self.recorded_actions.append(action)
-            self.recording_start_time = current_time
-            
-            button_name = str(button).split('.')[-1] if '.' in str(button) else str(button)
-            self.log_message(f"录制: {button_name}点击 ({x}, {y})")
+        if self.recording_motion:
+            code = EventCode.BUTTON_DOWN if pressed else EventCode.BUTTON_UP
+            self.mouse_ring.push((time.perf_counter(), code, x, y, button, None))
+        elif pressed:
+            self.mouse_ring.push((time.perf_counter(), EventCode.CLICK, x, y, button, None))
     
     def record_mouse_scroll(self, x, y, dx, dy):
         """记录鼠标滚轮事件"""
-        if not self.is_recording:
-            return
-            
-        current_time = time.time()
-        delay = current_time - self.recording_start_time if self.recorded_actions else 0
-        
-        action = {
-            'type': 'scroll',
-            'x': x,
-            'y': y,
-            'dx': dx,
-            'dy': dy,
-            'delay': delay
-        }
-        
-        self.recorded_actions.append(action)
-        self.recording_start_time = current_time
-        
-        direction = "上" if dy > 0 else "下" if dy < 0 else "左" if dx < 0 else "右"
-        self.log_message(f"录制: 滚轮{direction} ({x}, {y})")
+        if self.is_recording:
+            self.mouse_ring.push((time.perf_counter(), EventCode.SCROLL, x, y, dx, dy))
     
     def record_key_press(self, key):
         """记录键盘按下事件"""
-        if not self.is_recording:
-            return
-            
-        current_time = time.time()
-        delay = current_time - self.recording_start_time if self.recorded_actions else 0
-        
-        # 获取按键名称
-        try:
-            if hasattr(key, 'char') and key.char is not None:
-                key_name = key.char
-            else:
-                key_name = str(key).replace('Key.', '')
-        except:
-            key_name = str(key)
-        
-        action = {
-            'type': 'key_press',
-            'key': key_name,
-            'delay': delay
-        }
-        
-        self.recorded_actions.append(action)
-        self.recording_start_time = current_time
-        
-        self.log_message(f"录制: 按键按下 [{key_name}]")
+        if self.is_recording:
+            self.keyboard_ring.push((time.perf_counter(), EventCode.KEY_PRESS, 0, 0, key, None))
     
     def record_key_release(self, key):
         """记录键盘释放事件"""
-        if not self.is_recording:
-            return
-            
-        current_time = time.time()
-        delay = current_time - self.recording_start_time if self.recorded_actions else 0
-        
-        # 获取按键名称
-        try:
-            if hasattr(key, 'char') and key.char is not None:
-                key_name = key.char
-            else:
-                key_name = str(key).replace('Key.', '')
-        except:
-            key_name = str(key)
-        
-        action = {
-            'type': 'key_release',
-            'key': key_name,
-            'delay': delay
-        }
-        
-        self.recorded_actions.append(action)
-        self.recording_start_time = current_time
-        
-        self.log_message(f"录制: 按键释放 [{key_name}]")
+        if self.is_recording:
+            self.keyboard_ring.push((time.perf_counter(), EventCode.KEY_RELEASE, 0, 0, key, None))
+    
+    def _store_captured(self, events):
+        """采集线程中调用：按时间顺序写入录制并输出日志"""
+        recorder = self.recorder
+        for at, code, x, y, arg, extra in events:
+            if code == EventCode.MOVE:
+                # 轨迹点数量多，不逐个输出日志
+                recorder.move(x, y, at=at)
+            elif code == EventCode.BUTTON_DOWN:
+                button_id = recorder.button_down(x, y, arg, at=at)
+                self.log_message(f"录制: {BUTTON_NAMES[button_id]}按下 ({x}, {y})")
+            elif code == EventCode.BUTTON_UP:
+                button_id = recorder.button_up(x, y, arg, at=at)
+                self.log_message(f"录制: {BUTTON_NAMES[button_id]}释放 ({x}, {y})")
+            elif code == EventCode.CLICK:
+                button_id = recorder.click(x, y, arg, at=at)
+                self.log_message(f"录制: {BUTTON_NAMES[button_id]}点击 ({x}, {y})")
+            elif code == EventCode.SCROLL:
+                recorder.scroll(x, y, arg, extra, at=at)
+                direction = "上" if extra > 0 else "下" if extra < 0 else "左" if arg < 0 else "右"
+                self.log_message(f"录制: 滚轮{direction} ({x}, {y})")
+            elif code == EventCode.KEY_PRESS:
+                key_id = recorder.key_press(arg, at=at)
+                self.log_message(f"录制: 按键按下 [{recorder.buffer.keys.name_of(key_id)}]")
+            elif code == EventCode.KEY_RELEASE:
+                key_id = recorder.key_release(arg, at=at)
+                self.log_message(f"录制: 按键释放 [{recorder.buffer.keys.name_of(key_id)}]")
+    
+    def _current_recording(self):
+        """返回要回放/保存的录制：优先使用加载的文件"""
+        if self.loaded_recording is not None:
+            return self.loaded_recording
+        if len(self.recorder):
+            return self.recorder.buffer
+        return None
     
     def replay_actions(self):
         """回放录制的操作"""
-        if not self.recorded_actions:
+        recording = self._current_recording()
+        if recording is None:
             messagebox.showwarning("警告", "没有录制的操作可以回放")
             return
             
@@ -590,147 +727,121 @@ class MouseClickerGUI:
             messagebox.showerror("错误", f"无效的回放次数: {e}")
             return
         
+        if recording is self.recorder.buffer:
+            # 回放副本，回放期间重新录制不会受影响
+            recording = recording.copy()
+        
         # 在新线程中执行回放
-        thread = threading.Thread(target=self._replay_worker, args=(replay_count,))
+        thread = threading.Thread(target=self._replay_worker, args=(recording, replay_count))
         thread.daemon = True
         thread.start()
     
-    def _replay_worker(self, replay_count):
-        """回放工作线程"""
+    def _replay_worker(self, recording, replay_count):
+        """
+        回放工作线程：事件按整数事件码分派
+        
+        设置了环境变量 ZMH_TRACE 时，把回放过程（每轮、等待、注入、日志）写成 Chrome 时间线
+        """
+        from tracing import TracingBackend, tracer_from_env
+        tracer = tracer_from_env()
+        log = self.log_message if tracer is None else tracer.wrap_log(self.log_message)
         try:
-            self.log_message(f"开始回放 {len(self.recorded_actions)} 个操作，重复 {replay_count} 次")
+            log(f"开始回放 {len(recording)} 个操作，重复 {replay_count} 次")
+            if tracer is None:
+                replayer = Replayer(self.backend, recording.keys, log=log)
+            else:
+                replayer = Replayer(TracingBackend(self.backend, tracer), recording.keys, log=log,
+                                    sleeper=tracer.sleeper())
             
             for round_num in range(replay_count):
                 if replay_count > 1:
-                    self.log_message(f"第 {round_num + 1} 轮回放开始")
+                    log(f"第 {round_num + 1} 轮回放开始")
                 
-                for i, action in enumerate(self.recorded_actions):
-                    # 等待延迟
-                    if action['delay'] > 0:
-                        time.sleep(min(action['delay'], 5.0))  # 限制最大延迟为5秒
-                    
-                    try:
-                        if action['type'] == 'click':
-                            # 执行点击
-                            button_map = {
-                                'Button.left': 'left',
-                                'Button.right': 'right',
-                                'Button.middle': 'middle',
-                                'left': 'left',
-                                'right': 'right',
-                                'middle': 'middle'
-                            }
-                            
-                            button = button_map.get(action['button'], 'left')
-                            
-                            if button == 'left':
-                                pyautogui.click(action['x'], action['y'])
-                            elif button == 'right':
-                                pyautogui.rightClick(action['x'], action['y'])
-                            elif button == 'middle':
-                                pyautogui.middleClick(action['x'], action['y'])
-                            
-                            self.log_message(f"回放: {button}点击 ({action['x']}, {action['y']})")
-                            
-                        elif action['type'] == 'scroll':
-                            # 执行滚轮操作
-                            pyautogui.scroll(int(action['dy']), x=action['x'], y=action['y'])
-                            direction = "上" if action['dy'] > 0 else "下"
-                            self.log_message(f"回放: 滚轮{direction} ({action['x']}, {action['y']})")
-                            
-                        elif action['type'] == 'key_press':
-                            # 执行按键按下
-                            key_name = action['key']
-                            try:
-                                # 按键名称映射
-                                key_mapping = {
-                                    'space': 'space',
-                                    'enter': 'enter',
-                                    'tab': 'tab',
-                                    'shift': 'shift',
-                                    'shift_l': 'shiftleft',
-                                    'shift_r': 'shiftright',
-                                    'ctrl': 'ctrl',
-                                    'ctrl_l': 'ctrlleft',
-                                    'ctrl_r': 'ctrlright',
-                                    'alt': 'alt',
-                                    'alt_l': 'altleft',
-                                    'alt_r': 'altright',
-                                    'cmd': 'cmd',
-                                    'win': 'win',
-                                    'esc': 'esc',
-                                    'escape': 'esc',
-                                    'backspace': 'backspace',
-                                    'delete': 'delete',
-                                    'up': 'up',
-                                    'down': 'down',
-                                    'left': 'left',
-                                    'right': 'right'
-                                }
-                                
-                                mapped_key = key_mapping.get(key_name.lower(), key_name)
-                                pyautogui.keyDown(mapped_key)
-                                self.log_message(f"回放: 按键按下 [{key_name}]")
-                            except Exception as key_e:
-                                self.log_message(f"回放按键失败 [{key_name}]: {key_e}")
-                                
-                        elif action['type'] == 'key_release':
-                            # 执行按键释放
-                            key_name = action['key']
-                            try:
-                                # 按键名称映射
-                                key_mapping = {
-                                    'space': 'space',
-                                    'enter': 'enter',
-                                    'tab': 'tab',
-                                    'shift': 'shift',
-                                    'shift_l': 'shiftleft',
-                                    'shift_r': 'shiftright',
-                                    'ctrl': 'ctrl',
-                                    'ctrl_l': 'ctrlleft',
-                                    'ctrl_r': 'ctrlright',
-                                    'alt': 'alt',
-                                    'alt_l': 'altleft',
-                                    'alt_r': 'altright',
-                                    'cmd': 'cmd',
-                                    'win': 'win',
-                                    'esc': 'esc',
-                                    'escape': 'esc',
-                                    'backspace': 'backspace',
-                                    'delete': 'delete',
-                                    'up': 'up',
-                                    'down': 'down',
-                                    'left': 'left',
-                                    'right': 'right'
-                                }
-                                
-                                mapped_key = key_mapping.get(key_name.lower(), key_name)
-                                pyautogui.keyUp(mapped_key)
-                                self.log_message(f"回放: 按键释放 [{key_name}]")
-                            except Exception as key_e:
-                                self.log_message(f"回放按键失败 [{key_name}]: {key_e}")
-                            
-                    except Exception as e:
-                        self.log_message(f"回放操作 {i+1} 失败: {e}")
-                        continue
+                if tracer is None:
+                    replayer.play(recording)
+                else:
+                    with tracer.span(f"第 {round_num + 1} 轮回放", 'round'):
+                        replayer.play(recording)
                 
                 if replay_count > 1 and round_num < replay_count - 1:
-                    self.log_message(f"第 {round_num + 1} 轮回放完成，等待1秒后开始下一轮")
+                    log(f"第 {round_num + 1} 轮回放完成，等待1秒后开始下一轮")
                     time.sleep(1)
             
-            self.log_message("回放完成")
+            log("回放完成")
             
         except Exception as e:
             self.log_message(f"回放过程出错: {e}")
+        finally:
+            if tracer is not None:
+                try:
+                    self.log_message(f"回放时间线已写入 {tracer.write()}")
+                except OSError as e:
+                    self.log_message(f"无法写入回放时间线: {e}")
     
     def clear_recording(self):
         """清空录制的操作"""
         if self.is_recording:
             self.stop_recording()
         
-        self.recorded_actions = []
+        self.recorder = EventRecorder()
+        self._close_loaded_recording()
         self.log_message("已清空录制的操作")
     
+    def save_recording_file(self):
+        """把录制的操作保存为二进制录制文件"""
+        if self.is_recording:
+            # 先停止录制：处理完采集线程中的事件并写出缓存的轨迹点
+            self.stop_recording()
+        
+        if not len(self.recorder):
+            messagebox.showwarning("警告", "没有录制的操作可以保存")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="保存录制",
+            defaultextension=EXTENSION,
+            filetypes=[("录制文件", f"*{EXTENSION}"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        
+        try:
+            buffer = self.recorder.buffer
+            buffer.save(path)
+        except OSError as e:
+            messagebox.showerror("错误", f"保存录制失败: {e}")
+            return
+        
+        self.log_message(f"已保存 {len(buffer)} 个操作到 {path} ({os.path.getsize(path)} 字节)")
+    
+    def load_recording_file(self):
+        """加载录制文件，回放时直接读取内存映射"""
+        path = filedialog.askopenfilename(
+            title="加载录制",
+            filetypes=[("录制文件", f"*{EXTENSION}"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        
+        if self.is_recording:
+            self.stop_recording()
+        
+        try:
+            recording = MappedRecording(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"加载录制失败: {e}")
+            return
+        
+        self._close_loaded_recording()
+        self.recorder = EventRecorder()
+        self.loaded_recording = recording
+        self.log_message(f"已加载录制文件 {path}，共 {len(recording)} 个操作")
+    
+    def _close_loaded_recording(self):
+        if self.loaded_recording is not None:
+            self.loaded_recording.close()
+            self.loaded_recording = None
+    
     def setup_global_hotkeys(self):
         """设置全局快捷键"""
         if not KEYBOARD_AVAILABLE:
@@ -791,6 +902,9 @@ class MouseClickerGUI:
     
     def cleanup_listeners(self):
         """清理所有监听器"""
+        if self.position_tracker is not None:
+            self.position_tracker.stop()
+        
         if self.mouse_listener:
             self.mouse_listener.stop()
             self.mouse_listener = None
@@ -837,6 +951,8 @@ def main():
         root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
+    # 主循环处理完首次显示的重绘后记录
+    root.after_idle(startup_timing.mark, '窗口首次显示')
     
     try:
         root.mainloop()
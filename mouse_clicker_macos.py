@@ -5,18 +5,24 @@
 专门针对macOS系统的权限和兼容性问题进行优化
 """
 
-import pyautogui
+import startup_timing
 import time
 import sys
 import platform
 import subprocess
 import argparse
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
 import time
 import json
+import os
 from typing import Tuple, Optional
+from backends import InputBackend, LazyBackend, create_backend
+from timing import DeadlineScheduler
+from recording import EXTENSION, MappedRecording, Replayer, buffer_from_actions
+from log_pump import LogPump
+from position_tracker import PositionTracker
 # 完全禁用pynput以避免macOS兼容性问题
 try:
     # from pynput import mouse
@@ -30,31 +36,41 @@ except ImportError:
     KEYBOARD_AVAILABLE = False
     print("⚠️ pynput不可用，录制功能已禁用")
 
+startup_timing.mark('mouse_clicker_macos 导入完成')
+
+# 主线程检查输入库是否加载完成的间隔（毫秒）
+INPUT_POLL_MS = 50
+
 class MacOSMouseClicker:
-    def __init__(self):
+    def __init__(self, backend: Optional[InputBackend] = None, lazy: bool = False):
+        # lazy 为真时（图形界面）pyautogui 在首次使用或调用 backend.load() 时才导入，
+        # 权限检查也由调用方在加载后进行
+        if backend is None:
+            backend = LazyBackend('pyautogui') if lazy else create_backend('pyautogui')
+        self.backend = backend
+        
         # macOS特殊设置
         if platform.system() == 'Darwin':
-            # 禁用fail-safe，在macOS上可能导致问题
-            pyautogui.FAILSAFE = False
-            # 增加操作间隔，提高稳定性
-            pyautogui.PAUSE = 0.2
+            # 禁用fail-safe（在macOS上可能导致问题），增加操作间隔提高稳定性
+            self.backend.configure(fail_safe=False, pause=0.2)
             
             print("macOS优化模式已启用")
-            self.check_permissions()
+            if not lazy:
+                self.check_permissions()
         else:
             # 非macOS系统使用默认设置
-            pyautogui.FAILSAFE = True
-            pyautogui.PAUSE = 0.1
+            self.backend.configure(fail_safe=True, pause=0.1)
     
     def check_permissions(self):
         """检查macOS权限"""
         print("正在检查macOS权限...")
         try:
             # 尝试获取鼠标位置来测试权限
-            pos = pyautogui.position()
+            pos = self.backend.position()
             print(f"✅ 权限检查通过，当前鼠标位置: {pos}")
             
             # 尝试截屏测试屏幕录制权限
+            pyautogui = startup_timing.load('pyautogui')
             screenshot = pyautogui.screenshot(region=(0, 0, 10, 10))
             print("✅ 屏幕录制权限正常")
             
@@ -70,9 +86,10 @@ class MacOSMouseClicker:
         """获取屏幕信息，包括缩放比例"""
         try:
             # 获取逻辑屏幕尺寸
-            logical_size = pyautogui.size()
+            logical_size = self.backend.screen_size()
             
             # 获取物理屏幕尺寸
+            pyautogui = startup_timing.load('pyautogui')
             screenshot = pyautogui.screenshot()
             physical_size = screenshot.size
             
@@ -127,11 +144,11 @@ class MacOSMouseClicker:
             print(f"点击坐标: ({x}, {y}), 按钮: {button}")
             
             # 先移动鼠标到目标位置
-            pyautogui.moveTo(x, y, duration=0.1)
+            self.backend.move(x, y, duration=0.1)
             time.sleep(0.1)
             
             # 执行点击
-            pyautogui.click(x, y, button=button)
+            self.backend.click(x, y, button=button)
             time.sleep(0.1)
             
             print("✅ 点击成功")
@@ -150,8 +167,7 @@ class MacOSMouseClicker:
     def get_mouse_position(self) -> Tuple[int, int]:
         """获取当前鼠标位置"""
         try:
-            pos = pyautogui.position()
-            return (pos.x, pos.y)
+            return self.backend.position()
         except Exception as e:
             print(f"获取鼠标位置失败: {e}")
             return (0, 0)
@@ -175,7 +191,7 @@ class MacOSMouseClicker:
                 return False
         else:
             try:
-                pyautogui.doubleClick(x, y)
+                self.backend.click(x, y, clicks=2)
                 return True
             except Exception as e:
                 print(f"双击失败: {e}")
@@ -219,7 +235,8 @@ class MacOSMouseClickerGUI:
     """小宝工具集之点击器GUI界面"""
     
     def __init__(self):
-        self.clicker = MacOSMouseClicker()
+        # pyautogui 在窗口显示后由后台线程导入
+        self.clicker = MacOSMouseClicker(lazy=True)
         self.root = tk.Tk()
         self.root.title("小宝工具集之点击器")
         self.root.geometry("600x700")
@@ -232,17 +249,54 @@ class MacOSMouseClickerGUI:
         # 录制和回放相关变量
         self.is_recording = False
         self.recorded_actions = []
+        # 从文件加载的录制（内存映射），与 recorded_actions 二选一
+        self.loaded_recording = None
         self.recording_start_time = None
         self.mouse_listener = None
         self.keyboard_listener = None
         
+        # 鼠标位置显示（输入库加载完成后创建）
+        self.position_tracker = None
+        
+        # 输入库加载结束（成功或失败）时由后台线程设置；Tk 只能在主线程中访问
+        self._input_loaded = threading.Event()
+        self._input_ok = False
+        
         # 创建界面
         self.create_widgets()
-        self.update_position()
+        threading.Thread(target=self._load_input_libraries, name='load-input', daemon=True).start()
+        self.root.after(INPUT_POLL_MS, self._poll_input_ready)
         
         # 绑定关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+    def _load_input_libraries(self):
+        """后台线程：导入 pyautogui 并检查权限，只设置完成标志，不访问 Tk"""
+        try:
+            self.clicker.backend.load()
+            if platform.system() == 'Darwin':
+                self.clicker.check_permissions()
+            startup_timing.mark('输入库加载完成')
+            self._input_ok = True
+        except Exception as e:
+            self.log_message(f"❌ 加载输入注入库失败: {e}")
+        finally:
+            self._input_loaded.set()
+        
+    def _poll_input_ready(self):
+        """主线程定时检查输入库是否加载完成，成功后启用位置显示"""
+        if not self._input_loaded.is_set():
+            self.root.after(INPUT_POLL_MS, self._poll_input_ready)
+        elif self._input_ok:
+            self._on_input_ready()
+        
+    def _on_input_ready(self):
+        screen_width, screen_height = self.clicker.backend.screen_size()
+        self.screen_size_text.set(f"屏幕尺寸: {screen_width} x {screen_height}")
+        # pynput 在 macOS 上已禁用，位置显示使用自适应轮询，窗口隐藏时停止
+        self.position_tracker = PositionTracker(self.root, self.current_position, self.clicker.backend.position)
+        self.position_tracker.start()
+        
     def create_widgets(self):
         """创建GUI组件"""
         # 主框架
@@ -258,8 +312,8 @@ class MacOSMouseClickerGUI:
         info_frame = ttk.LabelFrame(main_frame, text="屏幕信息", padding="5")
         info_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        screen_size = pyautogui.size()
-        ttk.Label(info_frame, text=f"屏幕尺寸: {screen_size[0]} x {screen_size[1]}").grid(row=0, column=0, sticky=tk.W)
+        self.screen_size_text = tk.StringVar(value="屏幕尺寸: 加载中...")
+        ttk.Label(info_frame, textvariable=self.screen_size_text).grid(row=0, column=0, sticky=tk.W)
         ttk.Label(info_frame, text="当前鼠标位置:").grid(row=1, column=0, sticky=tk.W)
         ttk.Label(info_frame, textvariable=self.current_position).grid(row=1, column=1, sticky=tk.W)
         
@@ -362,6 +416,9 @@ class MacOSMouseClickerGUI:
         self.replay_count_entry.insert(0, "1")
         self.replay_count_entry.grid(row=1, column=1, sticky=tk.W, pady=(10, 0))
         
+        ttk.Button(record_frame, text="保存录制", command=self.save_recording_file).grid(row=1, column=2, padx=(0, 5), pady=(10, 0))
+        ttk.Button(record_frame, text="加载录制", command=self.load_recording_file).grid(row=1, column=3, padx=(0, 5), pady=(10, 0))
+        
         # 测试功能
         test_frame = ttk.LabelFrame(main_frame, text="测试功能", padding="5")
         test_frame.grid(row=8, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -378,20 +435,19 @@ class MacOSMouseClickerGUI:
         
         self.log_text = scrolledtext.ScrolledText(log_frame, height=10, width=70)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # 各线程的日志经队列由主循环批量写入，文本框只保留最近的日志
+        self.log_pump = LogPump(self.root, self.log_text)
         
         ttk.Button(log_frame, text="清空日志", command=self.clear_log).grid(row=1, column=0, pady=(5, 0))
         
     def log_message(self, message):
-        """添加日志消息"""
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """添加日志消息（可在任意线程调用）"""
+        self.log_pump.put(message)
         
     def get_current_position(self):
         """获取当前鼠标位置"""
         try:
-            x, y = pyautogui.position()
+            x, y = self.clicker.backend.position()
             self.x_entry.delete(0, tk.END)
             self.x_entry.insert(0, str(x))
             self.y_entry.delete(0, tk.END)
@@ -400,21 +456,13 @@ class MacOSMouseClickerGUI:
         except Exception as e:
             self.log_message(f"获取鼠标位置失败: {e}")
     
-    def update_position(self):
-        """更新当前鼠标位置显示"""
-        try:
-            x, y = pyautogui.position()
-            self.current_position.set(f"({x}, {y})")
-        except:
-            pass
-        self.root.after(100, self.update_position)
-    
     def apply_delay(self):
         """应用延迟设置"""
         try:
             delay = float(self.delay_entry.get())
             if delay > 0:
                 self.log_message(f"等待 {delay} 秒...")
+                self.log_pump.flush()
                 time.sleep(delay)
         except ValueError:
             self.log_message("延迟时间格式错误，跳过延迟")
@@ -446,24 +494,31 @@ class MacOSMouseClickerGUI:
         """连续点击工作线程"""
         self.apply_delay()
         
+        # 按绝对截止时间调度，点击和日志的耗时不会累积到间隔中
+        scheduler = DeadlineScheduler()
+        scheduler.reset()
+        clicked = 0
         for i in range(count):
             if not self.is_running:
                 break
             
             try:
                 if self.method_var.get() == "pyautogui":
-                    pyautogui.click(x, y)
+                    self.clicker.backend.click(x, y)
                 else:
                     self.clicker.click_with_applescript(x, y)
+                clicked += 1
                 
                 self.log_message(f"第 {i+1} 次点击完成: ({x}, {y})")
                 
                 if i < count - 1 and self.is_running:
-                    time.sleep(interval)
+                    scheduler.wait(interval)
             except Exception as e:
                 self.log_message(f"点击失败: {e}")
                 break
         
+        self.log_message(scheduler.report(clicked, interval).describe())
+        
         # 重置按钮状态
         self.root.after(0, self.reset_continuous_buttons)
     
@@ -492,7 +547,7 @@ class MacOSMouseClickerGUI:
         self.apply_delay()
         
         try:
-            pyautogui.drag(end_x - start_x, end_y - start_y, duration=1, button='left')
+            self.clicker.backend.drag(start_x, start_y, end_x, end_y, duration=1, button='left')
             self.log_message(f"拖拽操作完成: 从 ({start_x}, {start_y}) 到 ({end_x}, {end_y})")
         except Exception as e:
             self.log_message(f"拖拽操作失败: {e}")
@@ -637,6 +692,7 @@ class MacOSMouseClickerGUI:
             # 使用简化的录制功能
             self.is_recording = True
             self.recorded_actions = []
+            self._close_loaded_recording()
             self.recording_start_time = time.time()
             self.record_button.config(state='disabled')
             self.stop_record_button.config(state='normal')
@@ -648,6 +704,7 @@ class MacOSMouseClickerGUI:
         # 使用全局鼠标监听
         self.is_recording = True
         self.recorded_actions = []
+        self._close_loaded_recording()
         self.recording_start_time = time.time()
         
         # 启动鼠标和键盘监听器
@@ -795,7 +852,7 @@ class MacOSMouseClickerGUI:
     
     def replay_actions(self):
         """回放录制的操作"""
-        if not self.recorded_actions:
+        if not self.recorded_actions and self.loaded_recording is None:
             self.log_message("没有录制的操作可以回放")
             return
         
@@ -824,6 +881,10 @@ class MacOSMouseClickerGUI:
             self.log_message(f"准备时间 {initial_delay} 秒...")
             time.sleep(initial_delay)
         
+        if not self.recorded_actions and self.loaded_recording is not None:
+            self.replay_recording(self.loaded_recording, replay_count)
+            return
+        
         for round_num in range(replay_count):
             self.log_message(f"第 {round_num + 1} 轮回放开始")
             
@@ -845,18 +906,10 @@ class MacOSMouseClickerGUI:
                         if key and KEYBOARD_AVAILABLE:
                             try:
                                 # 尝试将字符串转换为pynput的Key对象
-                                if len(key) == 1:
-                                    # 单个字符
-                                    if key_action == 'press':
-                                        pyautogui.keyDown(key)
-                                    else:
-                                        pyautogui.keyUp(key)
+                                if key_action == 'press':
+                                    self.clicker.backend.key_down(key)
                                 else:
-                                    # 特殊按键
-                                    if key_action == 'press':
-                                        pyautogui.keyDown(key)
-                                    else:
-                                        pyautogui.keyUp(key)
+                                    self.clicker.backend.key_up(key)
                                 
                                 self.log_message(f"  执行: {action_type}")
                             except Exception as kb_e:
@@ -869,17 +922,18 @@ class MacOSMouseClickerGUI:
                     x, y = action.get('x', 0), action.get('y', 0)
                     
                     if self.method_var.get() == "pyautogui":
+                        backend = self.clicker.backend
                         if action_type in ["单击", "左键单击"]:
-                            pyautogui.click(x, y)
+                            backend.click(x, y)
                         elif action_type == "双击":
-                            pyautogui.doubleClick(x, y)
+                            backend.click(x, y, clicks=2)
                         elif action_type in ["右键点击", "右键单击"]:
-                            pyautogui.rightClick(x, y)
+                            backend.click(x, y, button='right')
                         elif action_type == "中键单击":
-                            pyautogui.click(x, y, button='middle')
+                            backend.click(x, y, button='middle')
                         else:
                             # 其他类型的点击，默认使用左键
-                            pyautogui.click(x, y)
+                            backend.click(x, y)
                     else:
                         if action_type in ["单击", "左键单击"]:
                             self.clicker.click_with_applescript(x, y)
@@ -903,14 +957,104 @@ class MacOSMouseClickerGUI:
                 time.sleep(1)
         
         self.log_message("所有回放操作完成")
+    
+    def replay_recording(self, recording, replay_count):
+        """
+        直接从内存映射的录制文件回放（始终使用 pyautogui 方式注入）
+        
+        设置了环境变量 ZMH_TRACE 时，把回放过程写成 Chrome 时间线
+        """
+        from tracing import TracingBackend, tracer_from_env
+        tracer = tracer_from_env()
+        log = self.log_message if tracer is None else tracer.wrap_log(self.log_message)
+        backend = self.clicker.backend if tracer is None else TracingBackend(self.clicker.backend, tracer)
+        replayer = Replayer(backend, recording.keys, log=lambda message: log(f"  {message}"), max_delay=None,
+                            sleeper=tracer.sleeper() if tracer is not None else None)
+        
+        try:
+            for round_num in range(replay_count):
+                log(f"第 {round_num + 1} 轮回放开始")
+                if tracer is None:
+                    replayer.play(recording)
+                else:
+                    with tracer.span(f"第 {round_num + 1} 轮回放", 'round'):
+                        replayer.play(recording)
+                log(f"第 {round_num + 1} 轮回放完成")
+                
+                # 轮次间隔
+                if round_num < replay_count - 1:
+                    time.sleep(1)
+            
+            log("所有回放操作完成")
+        finally:
+            if tracer is not None:
+                try:
+                    self.log_message(f"回放时间线已写入 {tracer.write()}")
+                except OSError as e:
+                    self.log_message(f"无法写入回放时间线: {e}")
+    
+    def save_recording_file(self):
+        """把录制的操作保存为二进制录制文件"""
+        if not self.recorded_actions:
+            self.log_message("没有录制的操作可以保存")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="保存录制",
+            defaultextension=EXTENSION,
+            filetypes=[("录制文件", f"*{EXTENSION}"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        
+        try:
+            buffer = buffer_from_actions(self.recorded_actions)
+            buffer.save(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"保存录制失败: {e}")
+            return
+        
+        self.log_message(f"已保存 {len(buffer)} 个操作到 {path} ({os.path.getsize(path)} 字节)")
+    
+    def load_recording_file(self):
+        """加载录制文件，回放时直接读取内存映射"""
+        if self.is_recording:
+            self.log_message("请先停止录制")
+            return
+        
+        path = filedialog.askopenfilename(
+            title="加载录制",
+            filetypes=[("录制文件", f"*{EXTENSION}"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        
+        try:
+            recording = MappedRecording(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"加载录制失败: {e}")
+            return
+        
+        self._close_loaded_recording()
+        self.recorded_actions = []
+        self.loaded_recording = recording
+        self.replay_button.config(state="normal")
+        self.log_message(f"已加载录制文件 {path}，共 {len(recording)} 个操作")
+    
+    def _close_loaded_recording(self):
+        if self.loaded_recording is not None:
+            self.loaded_recording.close()
+            self.loaded_recording = None
             
     def clear_log(self):
         """清空日志"""
-        self.log_text.delete(1.0, tk.END)
+        self.log_pump.clear()
         self.log_message("日志已清空")
         
     def on_closing(self):
         """关闭窗口时的处理"""
+        if self.position_tracker is not None:
+            self.position_tracker.stop()
         self.root.quit()
         self.root.destroy()
         
@@ -918,6 +1062,8 @@ class MacOSMouseClickerGUI:
         """运行GUI"""
         self.log_message("小宝工具集之点击器已启动")
         self.log_message("请设置坐标并选择点击操作")
+        # 主循环处理完首次显示的重绘后记录
+        self.root.after_idle(startup_timing.mark, '窗口首次显示')
         self.root.mainloop()
 
 def main():
@@ -932,6 +1078,7 @@ def main():
     parser.add_argument('--info', '-i', action='store_true', help='显示屏幕信息')
     
     args = parser.parse_args()
+    startup_timing.mark('参数解析完成')
     
     # 如果指定了GUI模式，启动图形界面
     if args.gui:
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行执行器
+启动多个工作进程，每个进程绑定一个独立的本地 Xvfb 虚拟显示，
+把 click_sequences 分片到各进程同时执行，最后汇总结果和耗时
+"""
+
+import contextlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from action_plan import (
+    ActionTemplate, ContinuousClickAction, DragAction, ForBlock, MoveAction, RepeatBlock, SequencePlan,
+    WaitAction, count_actions,
+)
+from backends import BackendUnavailableError, RecordingBackend, create_backend
+from patterns import PATTERN_TYPES, pattern_size
+
+# 不需要 X 显示的后端
+HEADLESS_BACKENDS = ('recording', 'null')
+
+# 等待 Xvfb 就绪的最长时间（秒）
+XVFB_START_TIMEOUT = 10.0
+
+
+class SequenceResult(NamedTuple):
+    """单个序列的执行结果"""
+    index: int
+    name: str
+    actions: int
+    elapsed: float
+    scheduled: float
+    max_lateness: float
+    error: Optional[str]
+
+
+class WorkerResult(NamedTuple):
+    """单个工作进程的执行结果"""
+    display: Optional[int]
+    sequences: Tuple[SequenceResult, ...]
+    elapsed: float
+    events: int
+    log_file: str
+    error: Optional[str]
+
+
+class VirtualDisplay:
+    """
+    本地 Xvfb 虚拟显示
+
+    用法:
+        with VirtualDisplay(99) as display:
+            os.environ['DISPLAY'] = display.name
+    """
+
+    def __init__(self, number: int, size: Tuple[int, int] = (1920, 1080)):
+        self.number = number
+        self.size = size
+        self.name = f":{number}"
+        self.process = None
+
+    def start(self):
+        xvfb = shutil.which('Xvfb')
+        if xvfb is None:
+            raise BackendUnavailableError("未找到 Xvfb，请先安装（如 apt install xvfb）")
+
+        width, height = self.size
+        self.process = subprocess.Popen(
+            [xvfb, self.name, '-screen', '0', f'{width}x{height}x24', '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+        # 套接字出现即表示 Xvfb 已可接受连接
+        socket_path = f"/tmp/.X11-unix/X{self.number}"
+        deadline = time.monotonic() + XVFB_START_TIMEOUT
+        while not os.path.exists(socket_path):
+            if self.process.poll() is not None:
+                raise BackendUnavailableError(f"Xvfb {self.name} 启动失败（退出码 {self.process.returncode}）")
+            if time.monotonic() > deadline:
+                self.stop()
+                raise BackendUnavailableError(f"Xvfb {self.name} 在 {XVFB_START_TIMEOUT:g} 秒内未就绪")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def display_in_use(number: int) -> bool:
+    return os.path.exists(f"/tmp/.X{number}-lock") or os.path.exists(f"/tmp/.X11-unix/X{number}")
+
+
+def free_displays(count: int, first: int = 99) -> List[int]:
+    """从 first 开始查找 count 个未被占用的显示编号"""
+    numbers = []
+    number = first
+    while len(numbers) < count:
+        if not display_in_use(number):
+            numbers.append(number)
+        number += 1
+    return numbers
+
+
+def _actions_seconds(actions, default_delay: float) -> float:
+    """动作自身的等待时间加上每个动作之前的默认延迟"""
+    total = 0.0
+    for action in actions:
+        if isinstance(action, ActionTemplate):
+            action = action.action
+        total += action.delay_before
+        if isinstance(action, (RepeatBlock, ForBlock)):
+            # 循环次数依赖外层变量而无法静态确定时按一次估计
+            iterations = 1
+            total_inner, inner = count_actions((action,)), count_actions(action.actions)
+            if total_inner is not None and inner:
+                iterations = total_inner // inner
+            total += iterations * _actions_seconds(action.actions, default_delay)
+            continue
+        total += default_delay
+        if isinstance(action, WaitAction):
+            total += action.time
+        elif isinstance(action, (DragAction, MoveAction)):
+            total += action.duration
+        elif isinstance(action, ContinuousClickAction):
+            total += action.interval * max(action.count - 1, 0)
+        elif isinstance(action, PATTERN_TYPES):
+            # 点数未知（坐标文件、按间距取点）时按一个点估计
+            total += action.interval * max((pattern_size(action) or 1) - 1, 0)
+    return total
+
+
+def estimate_seconds(sequence: SequencePlan, default_delay: float) -> float:
+    """粗略估计序列的计划耗时，仅用于分片时平衡负载"""
+    return _actions_seconds(sequence.actions, default_delay)
+
+
+def shard_sequences(sequences: Sequence[SequencePlan], workers: int,
+                    default_delay: float) -> List[List[int]]:
+    """
+    把序列分配给各工作进程，返回每个进程的序列下标列表
+
+    按估计耗时从长到短依次分给当前负载最小的进程（最长处理时间优先），
+    每个分片内部保持配置文件中的原始顺序。
+    """
+    shards: List[List[int]] = [[] for _ in range(min(workers, len(sequences)))]
+    if not shards:
+        return shards
+    loads = [0.0] * len(shards)
+    order = sorted(range(len(sequences)),
+                   key=lambda i: estimate_seconds(sequences[i], default_delay), reverse=True)
+    for i in order:
+        target = loads.index(min(loads))
+        shards[target].append(i)
+        loads[target] += estimate_seconds(sequences[i], default_delay)
+    for shard in shards:
+        shard.sort()
+    return [shard for shard in shards if shard]
+
+
+def _run_shard(config_file: str, indices: List[int], backend_name: str, max_rate: Optional[float],
+               display: Optional[int], log_file: str, cache: bool = True) -> WorkerResult:
+    """工作进程入口：启动自己的虚拟显示，依次执行分到的序列"""
+    # 在子进程中导入，避免父进程提前加载注入相关模块
+    from config_executor import ConfigExecutor
+    from structured_log import StructuredLogger
+
+    start = time.perf_counter()
+    results = []
+    events = 0
+    with open(log_file, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        try:
+            with contextlib.ExitStack() as stack:
+                options = {}
+                if display is not None:
+                    virtual = stack.enter_context(VirtualDisplay(display))
+                    os.environ['DISPLAY'] = virtual.name
+                    if backend_name == 'xtest':
+                        options['display'] = virtual.name
+                backend = create_backend(backend_name, **options)
+                stack.callback(backend.close)
+                # 执行日志直接写入该工作进程的日志文件，退出前写完
+                logger = StructuredLogger(stream=log)
+                stack.callback(logger.close)
+
+                executor = ConfigExecutor(config_file, max_rate=max_rate, backend=backend, cache=cache,
+                                          log=logger)
+                plan = executor.compile_plan()
+                settings = plan.settings
+                # 虚拟显示上无人操作，不需要安全延迟
+                executor.configure_pacing(settings)
+
+                for i in indices:
+                    sequence = plan.sequences[i]
+                    error = None
+                    executed = 0
+                    try:
+                        executed = executor.run_sequence(sequence.name, sequence.actions,
+                                                         settings.default_delay, count_actions(sequence.actions))
+                    except Exception as e:
+                        error = str(e)
+                        logger.flush()
+                        traceback.print_exc(file=log)
+                    scheduler = executor.scheduler
+                    results.append(SequenceResult(i, sequence.name, executed,
+                                                  scheduler.elapsed(), scheduler.scheduled(),
+                                                  scheduler.max_lateness, error))
+
+                if isinstance(backend, RecordingBackend):
+                    events = sum(backend.summary().values())
+        except Exception as e:
+            traceback.print_exc(file=log)
+            return WorkerResult(display, tuple(results), time.perf_counter() - start, events, log_file, str(e))
+
+    return WorkerResult(display, tuple(results), time.perf_counter() - start, events, log_file, None)
+
+
+def run_parallel(config_file: str, workers: int, sequence_name: Optional[str] = None,
+                 backend: str = 'pyautogui', max_rate: Optional[float] = None,
+                 first_display: int = 99, cache: bool = True) -> List[WorkerResult]:
+    """
+    并行执行配置文件中的序列
+
+    每个工作进程启动一个独立的 Xvfb（recording/null 后端不需要显示），
+    各进程的输出写入各自的日志文件，结束后打印汇总。
+    """
+    from config_executor import ConfigExecutor
+
+    # 父进程编译时写入计划缓存，工作进程随后直接命中
+    executor = ConfigExecutor(config_file, cache=cache)
+    plan = executor.compile_plan()
+    if plan is None:
+        print("配置文件存在错误，无法执行:")
+        for error in executor.plan_errors:
+            print(f"- {error}")
+        return []
+
+    selected = plan.find_sequences(sequence_name)
+    if not selected:
+        print(f"错误：未找到名为 '{sequence_name}' 的序列" if sequence_name else "配置文件中没有找到点击序列")
+        return []
+    # 分片使用序列在配置中的下标，工作进程各自编译配置后按下标取序列
+    candidates = [i for i, seq in enumerate(plan.sequences) if seq in selected]
+    shards = [[candidates[j] for j in shard]
+              for shard in shard_sequences([plan.sequences[i] for i in candidates], workers,
+                                           plan.settings.default_delay)]
+
+    headless = backend in HEADLESS_BACKENDS
+    displays: List[Optional[int]] = [None] * len(shards) if headless else free_displays(len(shards), first_display)
+    log_dir = tempfile.mkdtemp(prefix='zmh-parallel-')
+
+    print(f"并行执行 {len(candidates)} 个序列，{len(shards)} 个工作进程，注入后端: {backend}")
+    for shard, display in zip(shards, displays):
+        where = f"显示 :{display}" if display is not None else "无显示"
+        print(f"  {where}: {', '.join(plan.sequences[i].name for i in shard)}")
+    print(f"工作进程日志目录: {log_dir}")
+
+    start = time.perf_counter()
+    results: List[WorkerResult] = []
+    # 使用 spawn 启动子进程，避免继承父进程中的 X 连接等状态
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=get_context('spawn')) as pool:
+        futures = []
+        for n, (shard, display) in enumerate(zip(shards, displays), 1):
+            log_file = os.path.join(log_dir, f"worker-{n}.log")
+            futures.append(pool.submit(_run_shard, config_file, shard, backend, max_rate, display, log_file, cache))
+        for future in as_completed(futures):
+            results.append(future.result())
+    wall = time.perf_counter() - start
+
+    print_summary(results, wall)
+    return results
+
+
+def print_summary(results: List[WorkerResult], wall: float):
+    """打印并行执行的汇总"""
+    sequences = sorted((seq for result in results for seq in result.sequences), key=lambda seq: seq.index)
+
+    print("\n=== 并行执行汇总 ===")
+    for seq in sequences:
+        status = f"失败: {seq.error}" if seq.error else "完成"
+        print(f"{seq.name}: {status}，{seq.actions} 个动作，耗时 {seq.elapsed:.3f} 秒 "
+              f"(计划 {seq.scheduled:.3f} 秒, 最大唤醒误差 {seq.max_lateness * 1000:.3f} 毫秒)")
+
+    for result in sorted(results, key=lambda r: r.log_file):
+        where = f"显示 :{result.display}" if result.display is not None else "无显示"
+        line = f"工作进程 ({where}): {len(result.sequences)} 个序列，耗时 {result.elapsed:.3f} 秒"
+        if result.events:
+            line += f"，注入 {result.events} 个事件"
+        if result.error:
+            line += f"，出错: {result.error} (详见 {result.log_file})"
+        print(line)
+
+    serial = sum(seq.elapsed for seq in sequences)
+    failed = sum(1 for seq in sequences if seq.error) + sum(1 for r in results if r.error)
+    speedup = serial / wall if wall > 0 else 0.0
+    print(f"总共执行了 {len(sequences)} 个序列，失败 {failed} 个")
+    print(f"总耗时 {wall:.3f} 秒，串行耗时合计 {serial:.3f} 秒，加速比 {speedup:.2f}x")
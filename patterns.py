@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+点击图案
+网格、直线、折线和坐标文件按需逐个生成坐标，不预先生成点列表；
+click_points 把坐标分批交给注入后端，点与点之间的等待由截止时间调度器控制
+"""
+
+import math
+import os
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
+
+from action_plan import GridPattern, LinePattern, PointsFilePattern, PolylinePattern
+from timing import DeadlineScheduler, RateLimiter
+
+Point = Tuple[int, int]
+
+# 无间隔点击时每批提交的点数
+BATCH_SIZE = 64
+
+PATTERN_TYPES = (GridPattern, LinePattern, PolylinePattern, PointsFilePattern)
+
+
+def grid_points(x: int, y: int, columns: int, rows: int, spacing_x: int, spacing_y: int,
+                snake: bool = False) -> Iterator[Point]:
+    """
+    逐行生成网格各格的坐标，(x, y) 为第一格
+
+    snake 为 True 时奇数行反向，相邻两点始终相邻，减少鼠标移动距离
+    """
+    for row in range(rows):
+        cy = y + row * spacing_y
+        order = range(columns - 1, -1, -1) if snake and row % 2 else range(columns)
+        for column in order:
+            yield x + column * spacing_x, cy
+
+
+def line_points(start_x: int, start_y: int, end_x: int, end_y: int, count: int) -> Iterator[Point]:
+    """在起点和终点（均包含）之间均匀生成 count 个点"""
+    if count == 1:
+        yield start_x, start_y
+        return
+    dx, dy = end_x - start_x, end_y - start_y
+    last = count - 1
+    for i in range(count):
+        yield start_x + round(dx * i / last), start_y + round(dy * i / last)
+
+
+def polyline_points(vertices: Iterable[Point], spacing: Optional[float] = None) -> Iterator[Point]:
+    """
+    沿折线生成坐标
+
+    未指定 spacing 时只生成各顶点；否则从第一个顶点起沿路径每隔 spacing 像素生成一个点
+    （间距跨越拐角连续计算），最后一个顶点总是包含在内。
+    """
+    vertices = iter(vertices)
+    previous = next(vertices, None)
+    if previous is None:
+        return
+    yield previous
+    if not spacing:
+        yield from vertices
+        return
+
+    # 上一个生成的点到当前线段起点的路径距离
+    carried = 0.0
+    for vertex in vertices:
+        (x0, y0), (x1, y1) = previous, vertex
+        length = math.hypot(x1 - x0, y1 - y0)
+        distance = spacing - carried
+        while distance <= length:
+            t = distance / length
+            yield round(x0 + (x1 - x0) * t), round(y0 + (y1 - y0) * t)
+            distance += spacing
+        carried = length - (distance - spacing)
+        previous = vertex
+    if carried > 0:
+        yield previous
+
+
+def file_points(path: str) -> Iterator[Point]:
+    """
+    逐行读取坐标文件
+
+    每行一个点，X 和 Y 以逗号或空白分隔；空行和 # 之后的注释被忽略。
+    """
+    with open(path, encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            text = line.split('#', 1)[0].strip()
+            if not text:
+                continue
+            parts = text.replace(',', ' ').split()
+            try:
+                if len(parts) != 2:
+                    raise ValueError
+                yield int(float(parts[0])), int(float(parts[1]))
+            except ValueError:
+                raise ValueError(f"{path} 第 {lineno} 行不是有效的坐标: '{text}'") from None
+
+
+def pattern_points(action, base_dir: str = '') -> Iterator[Point]:
+    """生成图案动作的所有坐标；坐标文件的相对路径相对于 base_dir"""
+    kind = type(action)
+    if kind is GridPattern:
+        return grid_points(action.x, action.y, action.columns, action.rows,
+                           action.spacing_x, action.spacing_y, action.snake)
+    if kind is LinePattern:
+        if action.spacing:
+            return polyline_points(((action.start_x, action.start_y), (action.end_x, action.end_y)),
+                                   action.spacing)
+        return line_points(action.start_x, action.start_y, action.end_x, action.end_y, action.count)
+    if kind is PolylinePattern:
+        return polyline_points(action.points, action.spacing)
+    if kind is PointsFilePattern:
+        return file_points(os.path.join(base_dir, action.path))
+    raise TypeError(f"不是图案动作: {kind.__name__}")
+
+
+def pattern_size(action) -> Optional[int]:
+    """图案的点数；坐标文件和按间距取点的图案需要遍历，返回 None"""
+    kind = type(action)
+    if kind is GridPattern:
+        return action.columns * action.rows
+    if kind is LinePattern and not action.spacing:
+        return action.count
+    if kind is PolylinePattern and not action.spacing:
+        return len(action.points)
+    return None
+
+
+def describe_pattern(action) -> str:
+    kind = type(action)
+    if kind is GridPattern:
+        return (f"网格点击 {action.columns}x{action.rows}，起点 ({action.x}, {action.y})，"
+                f"间距 ({action.spacing_x}, {action.spacing_y})")
+    if kind is LinePattern:
+        amount = f"间距 {action.spacing:g} 像素" if action.spacing else f"{action.count} 个点"
+        return f"直线点击 ({action.start_x}, {action.start_y}) -> ({action.end_x}, {action.end_y})，{amount}"
+    if kind is PolylinePattern:
+        amount = f"间距 {action.spacing:g} 像素" if action.spacing else "各顶点"
+        return f"折线点击 {len(action.points)} 个顶点，{amount}"
+    return f"按坐标文件点击: {action.path}"
+
+
+def click_points(backend, points: Iterable[Point], button: str = 'left', interval: float = 0.0,
+                 scheduler: Optional[DeadlineScheduler] = None, limiter: Optional[RateLimiter] = None,
+                 bounds: Optional[Tuple[int, int]] = None, batch_size: int = BATCH_SIZE) -> int:
+    """
+    依次点击 points 中的坐标，返回点击的点数
+
+    没有点间隔也没有限速时，每 batch_size 个点在一个 backend.batch() 块内提交；
+    否则逐点注入，点与点之间由 scheduler 按绝对截止时间等待 interval 秒。
+    指定 bounds（屏幕宽高）时每批注入前检查坐标，超出范围抛出 ValueError。
+    """
+    if scheduler is None:
+        scheduler = DeadlineScheduler()
+        scheduler.reset()
+    if interval > 0 or limiter is not None:
+        # 批量提交会把事件推迟到块结束，需要逐点计时时不能合并
+        batch_size = 1
+
+    click = backend.click
+    count = 0
+    points = iter(points)
+    while True:
+        chunk = list(islice(points, batch_size))
+        if not chunk:
+            return count
+        if bounds is not None:
+            width, height = bounds
+            for x, y in chunk:
+                if not (0 <= x <= width and 0 <= y <= height):
+                    raise ValueError(f"坐标 ({x}, {y}) 超出屏幕范围 ({width}x{height})")
+        with backend.batch():
+            for x, y in chunk:
+                if count and interval > 0:
+                    scheduler.wait(interval)
+                if limiter is not None:
+                    limiter.acquire()
+                click(x, y, button=button)
+                count += 1
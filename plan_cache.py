@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+动作计划缓存
+以 "配置文件内容 + 计划格式版本" 的 SHA-256 为键，缓存校验和编译后的结果，
+未修改的配置再次执行、校验或列出序列时无需解析JSON和重新校验
+"""
+
+import hashlib
+import os
+import pickle
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from action_plan import PLAN_VERSION, ActionPlan
+
+# 缓存文件自身的格式版本，与 PLAN_VERSION 一起参与计算缓存键
+CACHE_VERSION = 1
+
+
+class CachedPlan(NamedTuple):
+    """一个配置文件的编译结果及执行器需要的概要信息"""
+    plan: Optional[ActionPlan]
+    errors: Tuple[str, ...]
+    description: str
+    fail_safe: bool
+    # (序列名称, 动作数)，供 --list 使用，配置有错误时同样可用
+    sequences: Tuple[Tuple[str, int], ...]
+
+
+def summarize(config: Any, plan: Optional[ActionPlan], errors: List[str]) -> CachedPlan:
+    """从原始配置和编译结果生成缓存条目"""
+    sequences = []
+    if isinstance(config, dict) and isinstance(config.get('click_sequences'), list):
+        for sequence in config['click_sequences']:
+            if not isinstance(sequence, dict):
+                continue
+            actions = sequence.get('actions', [])
+            sequences.append((sequence.get('name', '未命名序列'), len(actions) if isinstance(actions, list) else 0))
+
+    description = '无描述'
+    fail_safe = True
+    if isinstance(config, dict):
+        description = config.get('description', '无描述')
+        settings = config.get('settings')
+        if isinstance(settings, dict):
+            fail_safe = bool(settings.get('fail_safe', True))
+
+    return CachedPlan(plan, tuple(errors), description, fail_safe, tuple(sequences))
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'zmhtools-dianjiqi', 'plans')
+
+
+class PlanCache:
+    """
+    基于内容寻址的计划缓存
+
+    缓存条目按内容哈希命名，配置文件被修改后自然失效；
+    编译器输出变化时提升 action_plan.PLAN_VERSION 即可使旧条目全部失效。
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        # 使用 os.path 而不是 pathlib：pathlib 的导入耗时与执行 --list 本身相当
+        self.directory = os.fspath(directory) if directory is not None else default_cache_dir()
+
+    @staticmethod
+    def key(data: bytes) -> str:
+        digest = hashlib.sha256(f"{CACHE_VERSION}:{PLAN_VERSION}\0".encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def load(self, data: bytes) -> Optional[CachedPlan]:
+        """返回缓存的编译结果，未命中或缓存损坏时返回 None"""
+        try:
+            with open(self._path(self.key(data)), 'rb') as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # 缓存损坏（写入中断、Python 版本变化等）按未命中处理
+            return None
+        return cached if isinstance(cached, CachedPlan) else None
+
+    def store(self, data: bytes, cached: CachedPlan):
+        """写入缓存（先写临时文件再原子替换），失败时静默忽略"""
+        # 只在缓存未命中时需要，不在启动时导入
+        import tempfile
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self._path(self.key(data)))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            pass
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图形界面的鼠标位置显示
+有 pynput 时由鼠标移动事件驱动：监听线程只记录最新位置（不访问 Tk），主线程每帧检查一次并更新界面，
+多次移动合并为一次更新；没有 pynput 时退回自适应轮询（位置不变时逐步放慢），窗口最小化或隐藏时完全停止更新
+"""
+
+from typing import Callable, Optional, Tuple
+
+# 主线程检查移动事件的间隔（毫秒），约为60Hz显示器的一帧（Tk 无法查询显示器刷新率）
+FRAME_MS = 16
+
+# 自适应轮询的最短和最长间隔（毫秒）
+MIN_POLL_MS = 50
+MAX_POLL_MS = 1000
+
+
+class PositionTracker:
+    """
+    把鼠标位置写入 Tk 变量
+
+    用法:
+        self.position_tracker = PositionTracker(self.root, self.current_position, self.backend.position,
+                                                mouse.Listener if PYNPUT_AVAILABLE else None)
+        self.position_tracker.start()
+        ...
+        self.position_tracker.stop()
+    """
+
+    def __init__(self, root, variable, position: Callable[[], Tuple[int, int]],
+                 listener_factory: Optional[Callable] = None):
+        self.root = root
+        self.variable = variable
+        self.position = position
+        # pynput.mouse.Listener，为 None 时使用轮询
+        self.listener_factory = listener_factory
+        self.listener = None
+        self.method = None
+        # 监听线程写入、主线程读取的最新位置（单个属性的读写在 GIL 下是原子的）
+        self._latest: Optional[Tuple[int, int]] = None
+        self._shown: Optional[Tuple[int, int]] = None
+        self._frame_job = None
+        self._poll_job = None
+        self._poll_ms = MIN_POLL_MS
+        self._visible = True
+
+    def start(self):
+        """开始更新，并在窗口隐藏/显示时自动暂停/恢复"""
+        self.root.bind('<Map>', self._on_map, add='+')
+        self.root.bind('<Unmap>', self._on_unmap, add='+')
+        self._resume()
+
+    def stop(self):
+        """停止更新（关闭窗口前调用）"""
+        self._pause()
+        self._visible = False
+
+    def _resume(self):
+        # 先显示一次当前位置，鼠标不动时也能看到正确的值
+        self._poll_ms = MIN_POLL_MS
+        self._poll()
+        if self.listener_factory is not None:
+            try:
+                self.listener = self.listener_factory(on_move=self._on_move)
+                self.listener.start()
+                self.method = 'events'
+                self._schedule_frame()
+                return
+            except Exception:
+                self.listener = None
+        self.method = 'polling'
+        self._schedule_poll()
+
+    def _pause(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        if self._frame_job is not None:
+            self.root.after_cancel(self._frame_job)
+            self._frame_job = None
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+
+    def _on_map(self, event):
+        # 子控件的事件也会传到顶层窗口的绑定上，只处理窗口本身
+        if event.widget is not self.root or self._visible:
+            return
+        self._visible = True
+        self._resume()
+
+    def _on_unmap(self, event):
+        if event.widget is not self.root or not self._visible:
+            return
+        self._visible = False
+        self._pause()
+
+    def _on_move(self, x, y):
+        """pynput 监听线程中调用：只记录最新位置，不访问 Tk"""
+        self._latest = (int(x), int(y))
+
+    def _schedule_frame(self):
+        self._frame_job = self.root.after(FRAME_MS, self._frame_tick)
+
+    def _frame_tick(self):
+        """主线程中每帧调用：显示监听线程记录的最新位置"""
+        self._frame_job = None
+        if not self._visible:
+            return
+        latest = self._latest
+        if latest is not None:
+            self._show(latest)
+        self._schedule_frame()
+
+    def _show(self, position: Tuple[int, int]):
+        if position != self._shown:
+            self._shown = position
+            self.variable.set(f"({position[0]}, {position[1]})")
+
+    def _poll(self) -> bool:
+        """读取一次位置，返回是否变化"""
+        try:
+            position = tuple(self.position())
+        except Exception:
+            return False
+        changed = position != self._shown
+        self._show(position)
+        return changed
+
+    def _schedule_poll(self):
+        self._poll_job = self.root.after(self._poll_ms, self._poll_tick)
+
+    def _poll_tick(self):
+        self._poll_job = None
+        if not self._visible:
+            return
+        # 位置变化时恢复最短间隔，不变时间隔逐步加倍
+        if self._poll():
+            self._poll_ms = MIN_POLL_MS
+        else:
+            self._poll_ms = min(self._poll_ms * 2, MAX_POLL_MS)
+        self._schedule_poll()
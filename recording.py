@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+录制文件格式与回放
+录制的操作以定长二进制记录保存，可以写入磁盘并直接从内存映射回放
+
+文件布局（小端序）:
+    文件头 32 字节: 魔数 'ZMHREC' | 版本 u16 | 记录数 u32 | 按键表偏移 u64 | 保留
+    记录区: 每条 16 字节
+        事件码 u8 | 参数 i8 (按钮编号 / 水平滚动量) | 按键编号 i16 (或垂直滚动量)
+        | x i32 | y i32 | 距上一事件的时间 u32 (微秒)
+    按键表: UTF-8 JSON 数组，按键编号即数组下标
+
+事件码见 EventCode；轨迹录制的事件码（移动、按下、释放）沿用同一记录布局
+"""
+
+import json
+import mmap
+import struct
+import time
+from enum import IntEnum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from motion import MotionSimplifier
+from timing import DeadlineScheduler
+
+MAGIC = b'ZMHREC'
+EXTENSION = '.zrec'
+VERSION = 1
+HEADER = struct.Struct('<6sHIQ10x')
+RECORD = struct.Struct('<BbhiiI')
+
+# 单个时间间隔的上限（u32 微秒约71分钟）
+_MAX_DT_US = 0xFFFFFFFF
+
+
+class EventCode(IntEnum):
+    """录制事件类型"""
+    CLICK = 1
+    DOUBLE_CLICK = 2
+    SCROLL = 3
+    KEY_PRESS = 4
+    KEY_RELEASE = 5
+    # 轨迹录制模式：简化后的移动轨迹点，以及分开记录的按下/释放（用于拖拽）
+    MOVE = 6
+    BUTTON_DOWN = 7
+    BUTTON_UP = 8
+
+
+class Button(IntEnum):
+    """鼠标按钮编号"""
+    LEFT = 1
+    RIGHT = 2
+    MIDDLE = 3
+
+
+# 按钮编号 -> 注入后端使用的按钮名称
+BUTTON_NAMES = {Button.LEFT: 'left', Button.RIGHT: 'right', Button.MIDDLE: 'middle'}
+
+# 按钮名称（含 pynput 的字符串形式）-> 按钮编号
+BUTTON_IDS = {
+    'left': Button.LEFT, 'right': Button.RIGHT, 'middle': Button.MIDDLE,
+    'Button.left': Button.LEFT, 'Button.right': Button.RIGHT, 'Button.middle': Button.MIDDLE,
+}
+
+# pynput 按键名称 -> pyautogui 按键名称（未列出的保持原样）
+PYAUTOGUI_KEY_NAMES = {
+    'shift_l': 'shiftleft',
+    'shift_r': 'shiftright',
+    'ctrl_l': 'ctrlleft',
+    'ctrl_r': 'ctrlright',
+    'alt_l': 'altleft',
+    'alt_r': 'altright',
+    'escape': 'esc',
+}
+
+
+def to_backend_key(key_name: str) -> str:
+    """把录制时的按键名称转换为注入后端的按键名称"""
+    return PYAUTOGUI_KEY_NAMES.get(key_name.lower(), key_name)
+
+
+class KeyTable:
+    """按键名称驻留表：每个名称只保存一次，记录中只存编号"""
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self.names: List[str] = list(names) if names else []
+        self._ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+
+    def id_for(self, name: str) -> int:
+        key_id = self._ids.get(name)
+        if key_id is None:
+            key_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return key_id
+
+    def name_of(self, key_id: int) -> str:
+        return self.names[key_id]
+
+    def __len__(self):
+        return len(self.names)
+
+
+def pack_dt(seconds: float) -> int:
+    """把时间间隔（秒）转换为记录中的微秒数"""
+    return min(max(int(seconds * 1_000_000), 0), _MAX_DT_US)
+
+
+def pack_scroll(dx, dy) -> Tuple[int, int]:
+    """把滚动量截断到记录中 i8 (水平) / i16 (垂直) 字段的范围"""
+    return max(-128, min(127, int(dx))), max(-32768, min(32767, int(dy)))
+
+
+class RecordingBuffer:
+    """内存中的录制数据，每个事件占 16 字节"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.keys = KeyTable()
+
+    def append(self, code: int, x: int = 0, y: int = 0, dt: float = 0.0, arg: int = 0, key: int = 0):
+        self.data += RECORD.pack(code, arg, key, int(x), int(y), pack_dt(dt))
+
+    def __len__(self):
+        return len(self.data) // RECORD.size
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        return RECORD.iter_unpack(self.data)
+
+    def copy(self) -> 'RecordingBuffer':
+        """返回独立副本（回放副本时录制可以继续追加）"""
+        other = RecordingBuffer()
+        other.data = bytearray(self.data)
+        other.keys = KeyTable(self.keys.names)
+        return other
+
+    def save(self, path: str):
+        save_recording(path, self.data, self.keys)
+
+
+def key_name(key) -> str:
+    """pynput 按键对象 -> 按键名称（字符键取字符，特殊键去掉 'Key.' 前缀）"""
+    try:
+        if getattr(key, 'char', None) is not None:
+            return key.char
+        return str(key).replace('Key.', '')
+    except Exception:
+        return str(key)
+
+
+class EventRecorder:
+    """
+    把 pynput 事件写入 RecordingBuffer
+
+    按钮和按键对象第一次出现时解析名称并驻留为整数编号，之后只做一次字典查找，每个事件只追加16字节。
+    在采集线程中使用时（见 capture.py）由 at 传入回调中取得的时间戳；不传时取调用时刻。
+
+    设置 motion_tolerance（像素）时记录移动轨迹：移动事件经 MotionSimplifier 简化后再写入，
+    其他事件写入前先写出缓存的轨迹点；停止录制后调用 finish() 写出剩余的点。
+    """
+
+    __slots__ = ('buffer', 'clock', 'motion', '_last', '_buttons', '_keys')
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter, motion_tolerance: Optional[float] = None):
+        self.buffer = RecordingBuffer()
+        self.clock = clock
+        self.motion = MotionSimplifier(motion_tolerance) if motion_tolerance is not None else None
+        self._last: Optional[float] = None
+        # pynput 按钮对象 -> 按钮编号，pynput 按键对象 -> 按键编号
+        self._buttons: Dict[object, int] = {}
+        self._keys: Dict[object, int] = {}
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def _dt(self, at: Optional[float] = None) -> float:
+        now = self.clock() if at is None else at
+        last, self._last = self._last, now
+        return 0.0 if last is None else now - last
+
+    def button_id(self, button) -> int:
+        button_id = self._buttons.get(button)
+        if button_id is None:
+            button_id = self._buttons[button] = BUTTON_IDS.get(str(button), Button.LEFT)
+        return button_id
+
+    def key_id(self, key) -> int:
+        key_id = self._keys.get(key)
+        if key_id is None:
+            key_id = self._keys[key] = self.buffer.keys.id_for(key_name(key))
+        return key_id
+
+    def _write_moves(self, points):
+        append, dt = self.buffer.append, self._dt
+        for t, x, y in points:
+            append(EventCode.MOVE, x, y, dt(t))
+
+    def _flush_motion(self):
+        if self.motion is not None:
+            self._write_moves(self.motion.flush())
+
+    def finish(self):
+        """写出缓存的轨迹点（停止录制后调用）"""
+        self._flush_motion()
+
+    def move(self, x: int, y: int, at: Optional[float] = None):
+        """记录一次鼠标移动（只在轨迹录制模式下调用）"""
+        at = self.clock() if at is None else at
+        if self.motion is None:
+            self.buffer.append(EventCode.MOVE, x, y, self._dt(at))
+        else:
+            self._write_moves(self.motion.add(at, x, y))
+
+    def button_down(self, x: int, y: int, button, at: Optional[float] = None) -> int:
+        """记录按钮按下（轨迹录制模式），返回按钮编号"""
+        self._flush_motion()
+        button_id = self.button_id(button)
+        self.buffer.append(EventCode.BUTTON_DOWN, x, y, self._dt(at), arg=button_id)
+        return button_id
+
+    def button_up(self, x: int, y: int, button, at: Optional[float] = None) -> int:
+        """记录按钮释放（轨迹录制模式），返回按钮编号"""
+        self._flush_motion()
+        button_id = self.button_id(button)
+        self.buffer.append(EventCode.BUTTON_UP, x, y, self._dt(at), arg=button_id)
+        return button_id
+
+    def click(self, x: int, y: int, button, at: Optional[float] = None) -> int:
+        """记录一次点击，返回按钮编号"""
+        self._flush_motion()
+        button_id = self.button_id(button)
+        self.buffer.append(EventCode.CLICK, x, y, self._dt(at), arg=button_id)
+        return button_id
+
+    def scroll(self, x: int, y: int, dx: int, dy: int, at: Optional[float] = None):
+        self._flush_motion()
+        dx, dy = pack_scroll(dx, dy)
+        self.buffer.append(EventCode.SCROLL, x, y, self._dt(at), arg=dx, key=dy)
+
+    def key_press(self, key, at: Optional[float] = None) -> int:
+        """记录按键按下，返回按键编号"""
+        self._flush_motion()
+        key_id = self.key_id(key)
+        self.buffer.append(EventCode.KEY_PRESS, dt=self._dt(at), key=key_id)
+        return key_id
+
+    def key_release(self, key, at: Optional[float] = None) -> int:
+        """记录按键释放，返回按键编号"""
+        self._flush_motion()
+        key_id = self.key_id(key)
+        self.buffer.append(EventCode.KEY_RELEASE, dt=self._dt(at), key=key_id)
+        return key_id
+
+
+# macOS 版录制的操作类型 -> (事件码, 按钮)
+_MACOS_CLICK_TYPES = {
+    '单击': (EventCode.CLICK, Button.LEFT),
+    '左键单击': (EventCode.CLICK, Button.LEFT),
+    '其他点击': (EventCode.CLICK, Button.LEFT),
+    '双击': (EventCode.DOUBLE_CLICK, Button.LEFT),
+    '右键点击': (EventCode.CLICK, Button.RIGHT),
+    '右键单击': (EventCode.CLICK, Button.RIGHT),
+    '中键单击': (EventCode.CLICK, Button.MIDDLE),
+}
+
+
+def buffer_from_actions(actions: Iterable[Dict]) -> RecordingBuffer:
+    """
+    把 GUI 录制的字典列表转换为二进制录制数据
+
+    同时支持 mouse_clicker_gui 的格式（type 为 click/scroll/key_press/key_release）
+    和 mouse_clicker_macos 的格式（中文操作类型 + action_category）。
+    """
+    buffer = RecordingBuffer()
+    for action in actions:
+        action_type = action['type']
+        delay = action.get('delay', 0)
+        x, y = action.get('x', 0), action.get('y', 0)
+
+        if action.get('action_category') == 'keyboard':
+            code = EventCode.KEY_PRESS if action.get('key_action') == 'press' else EventCode.KEY_RELEASE
+            buffer.append(code, dt=delay, key=buffer.keys.id_for(action['key']))
+        elif action_type == 'click':
+            buffer.append(EventCode.CLICK, x, y, delay, arg=BUTTON_IDS.get(action.get('button'), Button.LEFT))
+        elif action_type == 'scroll':
+            dx, dy = pack_scroll(action.get('dx', 0), action.get('dy', 0))
+            buffer.append(EventCode.SCROLL, x, y, delay, arg=dx, key=dy)
+        elif action_type == 'key_press':
+            buffer.append(EventCode.KEY_PRESS, dt=delay, key=buffer.keys.id_for(action['key']))
+        elif action_type == 'key_release':
+            buffer.append(EventCode.KEY_RELEASE, dt=delay, key=buffer.keys.id_for(action['key']))
+        elif action_type in _MACOS_CLICK_TYPES:
+            code, button = _MACOS_CLICK_TYPES[action_type]
+            buffer.append(code, x, y, delay, arg=button)
+        else:
+            raise ValueError(f"无法保存的操作类型 '{action_type}'")
+    return buffer
+
+
+def save_recording(path: str, records: bytes, keys: KeyTable):
+    """写入录制文件"""
+    count = len(records) // RECORD.size
+    key_table_offset = HEADER.size + len(records)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, count, key_table_offset))
+        f.write(records)
+        f.write(json.dumps(keys.names, ensure_ascii=False).encode('utf-8'))
+
+
+class MappedRecording:
+    """
+    内存映射的录制文件
+
+    记录区直接在映射上解包，打开文件不需要读入全部内容，可立即开始回放。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"录制文件 {path} 为空")
+
+        try:
+            magic, version, count, key_table_offset = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise ValueError(f"{path} 不是有效的录制文件")
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} 不是有效的录制文件")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"不支持的录制文件版本 {version}")
+
+        records_end = HEADER.size + count * RECORD.size
+        if records_end > key_table_offset or key_table_offset > len(self._map):
+            self.close()
+            raise ValueError(f"录制文件 {path} 已损坏或不完整")
+
+        self.count = count
+        self._view = memoryview(self._map)
+        self.records = self._view[HEADER.size:records_end]
+        self.keys = KeyTable(json.loads(bytes(self._map[key_table_offset:]).decode('utf-8')))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        return RECORD.iter_unpack(self.records)
+
+    def close(self):
+        try:
+            if getattr(self, 'records', None) is not None:
+                self.records.release()
+                self._view.release()
+                self.records = None
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+        except BufferError:
+            # 仍有回放线程在读取映射，交由垃圾回收在读取结束后释放
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Replayer:
+    """
+    把录制记录回放到注入后端
+
+    按事件码（整数）查表分派，不做任何字符串比较；
+    事件间隔按绝对截止时间等待，单个间隔不超过 max_delay 秒。
+    """
+
+    def __init__(self, backend, keys: KeyTable, log: Optional[Callable[[str], None]] = None,
+                 max_delay: Optional[float] = 5.0, sleeper: Optional[Callable[[float], float]] = None):
+        self.backend = backend
+        self.log = log
+        self.max_delay = max_delay
+        # 等待到指定时刻的函数（追踪时记录等待区间），默认真实休眠
+        self.sleeper = sleeper
+        # 按键编号 -> 后端按键名称，只转换一次
+        self.key_names = [to_backend_key(name) for name in keys.names]
+        self._handlers = {
+            EventCode.CLICK: self._click,
+            EventCode.DOUBLE_CLICK: self._double_click,
+            EventCode.SCROLL: self._scroll,
+            EventCode.KEY_PRESS: self._key_press,
+            EventCode.KEY_RELEASE: self._key_release,
+            EventCode.MOVE: self._move,
+            EventCode.BUTTON_DOWN: self._button_down,
+            EventCode.BUTTON_UP: self._button_up,
+        }
+
+    def _click(self, arg, key, x, y):
+        button = BUTTON_NAMES.get(arg, 'left')
+        self.backend.click(x, y, button=button)
+        if self.log:
+            self.log(f"回放: {button}点击 ({x}, {y})")
+
+    def _double_click(self, arg, key, x, y):
+        self.backend.click(x, y, clicks=2)
+        if self.log:
+            self.log(f"回放: 双击 ({x}, {y})")
+
+    def _scroll(self, arg, key, x, y):
+        # 垂直滚动量存放在按键编号字段，水平滚动量存放在参数字段
+        self.backend.scroll(x, y, key, arg)
+        if self.log:
+            direction = "上" if key > 0 else "下" if key < 0 else "左" if arg < 0 else "右"
+            self.log(f"回放: 滚轮{direction} ({x}, {y})")
+
+    def _key_press(self, arg, key, x, y):
+        self.backend.key_down(self.key_names[key])
+        if self.log:
+            self.log(f"回放: 按键按下 [{self.key_names[key]}]")
+
+    def _key_release(self, arg, key, x, y):
+        self.backend.key_up(self.key_names[key])
+        if self.log:
+            self.log(f"回放: 按键释放 [{self.key_names[key]}]")
+
+    def _move(self, arg, key, x, y):
+        # 轨迹点不输出日志，也不做后端的固定停顿（间隔由录制的时间决定）
+        self.backend.move(x, y, pause=False)
+
+    def _button_down(self, arg, key, x, y):
+        button = BUTTON_NAMES.get(arg, 'left')
+        self.backend.mouse_down(x, y, button=button)
+        if self.log:
+            self.log(f"回放: {button}按下 ({x}, {y})")
+
+    def _button_up(self, arg, key, x, y):
+        button = BUTTON_NAMES.get(arg, 'left')
+        self.backend.mouse_up(x, y, button=button)
+        if self.log:
+            self.log(f"回放: {button}释放 ({x}, {y})")
+
+    def play(self, records: Iterable[Tuple[int, int, int, int, int, int]],
+             should_continue: Callable[[], bool] = lambda: True) -> int:
+        """回放一轮，返回执行的事件数"""
+        handlers = self._handlers
+        max_delay_us = None if self.max_delay is None else int(self.max_delay * 1_000_000)
+        scheduler = DeadlineScheduler(sleeper=self.sleeper)
+        scheduler.reset()
+        played = 0
+        for i, (code, arg, key, x, y, dt_us) in enumerate(records, 1):
+            if not should_continue():
+                break
+            if dt_us:
+                if max_delay_us is not None and dt_us > max_delay_us:
+                    dt_us = max_delay_us
+                scheduler.wait(dt_us / 1_000_000)
+            try:
+                handlers[code](arg, key, x, y)
+                played += 1
+            except Exception as e:
+                if self.log:
+                    self.log(f"回放操作 {i} 失败: {e}")
+        return played
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动速度基准测试
+多次启动构建好的程序（或 .py 入口脚本），进程到达指定的启动阶段后立即退出，
+测量从创建进程到就绪的时间（包括单文件程序解压到临时目录的时间）和进程内到达该阶段的时间，结果写入JSON文件
+
+默认在参数解析完成时退出，不需要显示器，可在CI中运行；--gui 测量到图形界面首次显示，需要显示器
+
+用法:
+    python build_optimized.py --fast-start
+    python startup_benchmark.py                              # 测量 dist/<平台>/ 下的构建结果
+    python startup_benchmark.py mouse_clicker_macos.py       # 测量源码启动，作为对比
+    python startup_benchmark.py path/to/小宝工具集之点击器 --gui -o startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmark import percentiles
+
+# 结果文件的格式版本
+RESULT_VERSION = 1
+
+EXECUTABLE_NAME = '小宝工具集之点击器'
+
+# 默认就绪阶段（见 startup_timing 和各入口的 mark 调用）
+CLI_READY_STAGE = '参数解析完成'
+GUI_READY_STAGE = '窗口首次显示'
+
+# startup_timing 输出的一行: "  <时刻>  <阶段> (用时 ...) [线程]"
+_LINE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s+(.*?)(?: \(用时 [\d.]+\))?(?: \[[^\]]+\])?$')
+
+
+def default_target() -> str:
+    """build_optimized.py 整理输出后可执行文件的位置（目录模式或单文件）"""
+    system = platform.system().lower()
+    platform_dir = os.path.join('dist', {'darwin': 'macos'}.get(system, system))
+    if system == 'darwin':
+        return os.path.join(platform_dir, f"{EXECUTABLE_NAME}.app", 'Contents', 'MacOS', EXECUTABLE_NAME)
+    name = EXECUTABLE_NAME + ('.exe' if system == 'windows' else '')
+    onedir = os.path.join(platform_dir, EXECUTABLE_NAME, name)
+    return onedir if os.path.isfile(onedir) else os.path.join(platform_dir, name)
+
+
+def parse_report(text: str) -> Dict[str, float]:
+    """解析 startup_timing 的输出，返回 {阶段: 相对入口开始导入的时刻（毫秒）}，同名阶段取第一次"""
+    stages: Dict[str, float] = {}
+    for line in text.splitlines()[1:]:
+        match = _LINE.match(line)
+        if match:
+            stages.setdefault(match.group(2), float(match.group(1)))
+    return stages
+
+
+def launch(command: List[str], stage: str, timeout: float) -> Dict[str, Any]:
+    """启动一次，返回从创建进程到退出的时间（秒）和进程内记录的各阶段时刻"""
+    fd, report_path = tempfile.mkstemp(prefix='zmh-startup-', suffix='.txt')
+    os.close(fd)
+    env = dict(os.environ, ZMH_STARTUP_TIMING='1', ZMH_STARTUP_EXIT_AT=stage, ZMH_STARTUP_REPORT=report_path)
+    try:
+        start = time.perf_counter()
+        result = subprocess.run(command, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        with open(report_path, encoding='utf-8') as f:
+            stages = parse_report(f.read())
+    finally:
+        os.unlink(report_path)
+    if stage not in stages:
+        # 只保留错误输出的最后一行（通常是异常信息）
+        error = (result.stderr.decode(errors='replace').strip().splitlines() or [''])[-1]
+        raise RuntimeError(f"进程未到达阶段 '{stage}'（退出码 {result.returncode}）{': ' + error if error else ''}")
+    return {'wall': elapsed, 'stages': stages}
+
+
+def run(target: str, runs: int, stage: str, extra_args: List[str], timeout: float) -> Dict[str, Any]:
+    command = [sys.executable, target] if target.endswith('.py') else [os.path.abspath(target)]
+    command += extra_args
+
+    # 第一次启动单独统计：操作系统文件缓存为空或刚构建后的冷启动
+    samples = [launch(command, stage, timeout) for _ in range(runs + 1)]
+    first, warm = samples[0], samples[1:]
+    return {
+        'command': command,
+        'stage': stage,
+        'runs': runs,
+        'first_ms': first['wall'] * 1000,
+        'wall_ms': percentiles([sample['wall'] for sample in warm]),
+        'in_process_ms': percentiles([sample['stages'][stage] / 1000 for sample in warm]),
+        'stages_ms': warm[-1]['stages'],
+    }
+
+
+def print_result(result: Dict[str, Any]):
+    wall, inside = result['wall_ms'], result['in_process_ms']
+    print(f"\n=== 启动速度（到 '{result['stage']}'，{result['runs']} 次）===")
+    print(f"首次启动: {result['first_ms']:.1f} 毫秒")
+    print(f"启动到就绪: p50 {wall['p50']:.1f} / p90 {wall['p90']:.1f} / 最大 {wall['max']:.1f} 毫秒")
+    print(f"其中入口代码: p50 {inside['p50']:.1f} / p90 {inside['p90']:.1f} 毫秒"
+          f"（其余为解压、加载解释器和标准库）")
+    print("最后一次启动的各阶段（毫秒）:")
+    for name, at in sorted(result['stages_ms'].items(), key=lambda item: item[1]):
+        print(f"  {at:9.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='点击器启动速度基准测试')
+    parser.add_argument('target', nargs='?', help='可执行文件或 .py 入口脚本（默认 dist/<平台>/ 下的构建结果）')
+    parser.add_argument('--runs', '-n', type=int, default=10, help='统计的启动次数（另加一次首次启动，默认10）')
+    parser.add_argument('--gui', '-g', action='store_true',
+                        help=f"以 --gui 启动并测量到 '{GUI_READY_STAGE}'（需要显示器）")
+    parser.add_argument('--stage', help='就绪阶段名称（覆盖默认值）')
+    parser.add_argument('--timeout', type=float, default=60.0, help='单次启动的超时时间（秒，默认60）')
+    parser.add_argument('--output', '-o', help='结果JSON文件路径')
+
+    args = parser.parse_args()
+
+    target: Optional[str] = args.target or default_target()
+    if not os.path.isfile(target):
+        print(f"错误：找不到 {target}，请先运行 python build_optimized.py --fast-start 或指定路径")
+        sys.exit(1)
+    if args.runs < 1:
+        print("错误：--runs 至少为1")
+        sys.exit(1)
+
+    stage = args.stage or (GUI_READY_STAGE if args.gui else CLI_READY_STAGE)
+    try:
+        result = run(target, args.runs, stage, ['--gui'] if args.gui else [], args.timeout)
+    except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"错误：启动 {target} 失败 - {e}")
+        sys.exit(1)
+
+    print_result(result)
+    if args.output:
+        report = {
+            'version': RESULT_VERSION,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'platform': platform.platform(),
+            'target': target,
+            'size_mb': round(os.path.getsize(target) / (1 << 20), 2),
+            'result': result,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时记录
+设置环境变量 ZMH_STARTUP_TIMING=1 时记录启动各阶段的时刻和延迟导入的重量级模块（pyautogui、pynput、PIL）的导入耗时，
+进程退出时输出到标准错误；未设置时只有一次布尔判断的开销
+
+各入口最先导入本模块，时刻相对入口开始导入模块；解释器自身的启动耗时可用 python -X importtime 查看
+
+启动基准测试（startup_benchmark.py）另外设置:
+    ZMH_STARTUP_EXIT_AT=<阶段>   到达该阶段时输出记录并立即退出
+    ZMH_STARTUP_REPORT=<文件>    记录写入该文件而不是标准错误（窗口程序没有标准错误）
+"""
+
+import atexit
+import importlib
+import os
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+ENV = 'ZMH_STARTUP_TIMING'
+ENABLED = bool(os.environ.get(ENV))
+EXIT_AT = os.environ.get('ZMH_STARTUP_EXIT_AT') if ENABLED else None
+REPORT_PATH = os.environ.get('ZMH_STARTUP_REPORT') if ENABLED else None
+
+_origin = time.perf_counter()
+# (阶段, 相对起点的时刻, 耗时, 线程名)，耗时为 None 表示时间点
+_records: List[Tuple[str, float, Optional[float], str]] = []
+
+
+def mark(stage: str):
+    """记录到达某个启动阶段的时刻"""
+    if ENABLED:
+        _records.append((stage, time.perf_counter() - _origin, None, threading.current_thread().name))
+        if stage == EXIT_AT:
+            report()
+            # 不运行 atexit 和 Tk 的清理，测量到此为止
+            os._exit(0)
+
+
+def load(name: str):
+    """导入模块（首次使用重量级依赖时调用），启用记录时同时记录导入耗时"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if not ENABLED:
+        return importlib.import_module(name)
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    end = time.perf_counter()
+    _records.append((f"导入 {name}", end - _origin, end - start, threading.current_thread().name))
+    return module
+
+
+def report():
+    _records.append(('退出', time.perf_counter() - _origin, None, threading.current_thread().name))
+    lines = ["启动耗时（相对入口开始导入，毫秒）:"]
+    for stage, at, duration, thread in sorted(_records, key=lambda record: record[1]):
+        line = f"  {at * 1000:9.1f}  {stage}"
+        if duration is not None:
+            line += f" (用时 {duration * 1000:.1f})"
+        if thread != 'MainThread':
+            line += f" [{thread}]"
+        lines.append(line)
+    if REPORT_PATH:
+        with open(REPORT_PATH, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    else:
+        print('\n'.join(lines), file=sys.stderr)
+
+
+if ENABLED:
+    atexit.register(report)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步结构化日志
+注入循环只把 (级别, 事件名, 消息模板, 字段) 放入有界队列，格式化和写出由后台线程完成，
+终端输出与原来的 print 完全相同，另可把全部记录以 JSON Lines 写入文件
+
+队列满时丢弃 WARNING 以下的记录并计数，注入循环永远不会因日志而阻塞
+"""
+
+import atexit
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, TextIO
+
+DEBUG = 10
+INFO = 20
+# 序列开始/结束、进度和汇总，--quiet 时仍然输出
+NOTICE = 25
+WARNING = 30
+ERROR = 40
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'notice': NOTICE, 'warning': WARNING, 'error': ERROR}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+# 后台线程写出的最长间隔（秒）
+FLUSH_INTERVAL = 0.05
+
+# 队列容量（条）
+QUEUE_SIZE = 10000
+
+# 进度汇总的间隔（秒）
+PROGRESS_INTERVAL = 5.0
+
+
+def _format(template: str, fields: Dict[str, Any]) -> str:
+    if not fields:
+        return template
+    try:
+        return template.format(**fields)
+    except (KeyError, IndexError, ValueError):
+        return template
+
+
+class StructuredLogger:
+    """
+    后台线程写出的结构化日志
+
+    用法:
+        log = StructuredLogger(level=NOTICE, json_path='run.jsonl')
+        log.info('click', "点击坐标: ({x}, {y})", x=100, y=200)
+        log.close()
+    """
+
+    def __init__(self, level: int = DEBUG, stream: Optional[TextIO] = None, json_path: Optional[str] = None,
+                 json_level: int = DEBUG, queue_size: int = QUEUE_SIZE,
+                 progress_interval: float = PROGRESS_INTERVAL):
+        # 终端输出的级别；stream 为 None 时写入当前的 sys.stdout（写出时再取，支持 redirect_stdout）
+        self.level = level
+        self.stream = stream
+        self.json_level = json_level
+        self._json = open(json_path, 'a', encoding='utf-8') if json_path else None
+        # 低于该级别的记录在调用处直接返回
+        self.threshold = min(level, json_level) if self._json is not None else level
+        self.queue_size = queue_size
+        # 队列积压到一半时立即唤醒后台线程，不必等到下一个写出间隔
+        self._wake_at = max(queue_size // 2, 1)
+        self.dropped = 0
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self.progress_interval = progress_interval
+        self._progress_time = 0.0
+        self._progress_done = 0
+
+        self._thread = threading.Thread(target=self._run, name='structured-log', daemon=True)
+        self._thread.start()
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.threshold
+
+    def _put(self, level: int, event: str, template: str, fields: Dict[str, Any]):
+        if level < self.threshold or self._closed:
+            return
+        queue = self._queue
+        pending = len(queue)
+        if pending >= self._wake_at:
+            if level < WARNING and pending >= self.queue_size:
+                self.dropped += 1
+                return
+            self._wake.set()
+        queue.append((time.time(), level, event, template, fields))
+
+    def log(self, level: int, event: str, template: str, **fields):
+        """记录一条日志：template 在后台线程中用 fields 格式化"""
+        self._put(level, event, template, fields)
+
+    # 各级别直接调用 _put，注入循环中每条日志只有一次函数调用开销
+    def debug(self, event: str, template: str, **fields):
+        self._put(DEBUG, event, template, fields)
+
+    def info(self, event: str, template: str, **fields):
+        self._put(INFO, event, template, fields)
+
+    def notice(self, event: str, template: str, **fields):
+        self._put(NOTICE, event, template, fields)
+
+    def warning(self, event: str, template: str, **fields):
+        self._put(WARNING, event, template, fields)
+
+    def error(self, event: str, template: str, **fields):
+        self._put(ERROR, event, template, fields)
+
+    def progress(self, done: int, total: Optional[int] = None):
+        """每隔 progress_interval 秒输出一次进度汇总（done 为0或变小时视为新一轮）"""
+        now = time.monotonic()
+        if done <= 0 or done < self._progress_done or not self._progress_time:
+            self._progress_time, self._progress_done = now, done
+            return
+        if now - self._progress_time < self.progress_interval:
+            return
+        rate = (done - self._progress_done) / (now - self._progress_time)
+        self._progress_time, self._progress_done = now, done
+        if total:
+            self.notice('progress', "进度: {done}/{total} 个动作 ({percent:.1f}%)，{rate:.1f} 个/秒",
+                        done=done, total=total, percent=done * 100 / total, rate=rate)
+        else:
+            self.notice('progress', "进度: 已执行 {done} 个动作，{rate:.1f} 个/秒", done=done, rate=rate)
+
+    def flush(self, timeout: float = 5.0):
+        """等待已记录的日志全部写出（在直接 print 或读取输入之前调用，保证输出顺序）"""
+        if self._closed or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.append(done)
+        self._wake.set()
+        done.wait(timeout)
+
+    def close(self):
+        """写出剩余日志并停止后台线程"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+        if self._queue:
+            self._drain()
+        if self.dropped:
+            print(f"警告：日志队列已满，丢弃了 {self.dropped} 条日志")
+        if self._json is not None:
+            self._json.close()
+            self._json = None
+
+    def _run(self):
+        queue = self._queue
+        while not self._closed:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            if queue:
+                self._drain()
+
+    def _drain(self):
+        queue = self._queue
+        text = []
+        records = []
+        markers = []
+        while queue:
+            item = queue.popleft()
+            if isinstance(item, threading.Event):
+                markers.append(item)
+                continue
+            timestamp, level, event, template, fields = item
+            to_text = level >= self.level
+            to_json = self._json is not None and level >= self.json_level
+            if not (to_text or to_json):
+                continue
+            message = _format(template, fields)
+            if to_text:
+                text.append(message)
+            if to_json:
+                record = {'ts': timestamp, 'level': LEVEL_NAMES.get(level, str(level)), 'event': event,
+                          'msg': message.strip()}
+                record.update(fields)
+                records.append(json.dumps(record, ensure_ascii=False, default=str))
+        try:
+            if text:
+                stream = self.stream if self.stream is not None else sys.stdout
+                stream.write('\n'.join(text) + '\n')
+                stream.flush()
+            if records:
+                self._json.write('\n'.join(records) + '\n')
+                self._json.flush()
+        except (OSError, ValueError):
+            # 输出端已关闭（如管道另一端退出）时丢弃，不影响执行
+            pass
+        for marker in markers:
+            marker.set()
+
+
+class NullLogger:
+    """丢弃所有日志（模拟执行等不需要输出的场合）"""
+
+    level = threshold = ERROR + 1
+    dropped = 0
+
+    def enabled(self, level: int) -> bool:
+        return False
+
+    def log(self, *args, **fields):
+        pass
+
+    debug = info = notice = warning = error = log
+
+    def progress(self, done, total=None):
+        pass
+
+    def flush(self, timeout=5.0):
+        pass
+
+    def close(self):
+        pass
+
+
+_default: Optional[StructuredLogger] = None
+
+
+def default_logger() -> StructuredLogger:
+    """进程共享的默认日志（输出到标准输出，退出时自动写出剩余日志）"""
+    global _default
+    if _default is None:
+        _default = StructuredLogger()
+        atexit.register(_default.close)
+    return _default
+
+
+def configure_default(level: int = DEBUG, json_path: Optional[str] = None) -> StructuredLogger:
+    """按命令行参数替换默认日志"""
+    global _default
+    if _default is not None:
+        _default.close()
+    _default = StructuredLogger(level=level, json_path=json_path)
+    atexit.register(_default.close)
+    return _default
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+计时引擎
+按绝对单调时钟截止时间调度动作，避免 "点击 + sleep(间隔)" 带来的累积漂移
+"""
+
+import time
+from typing import Callable, NamedTuple, Optional
+
+# 距离截止时间小于该值时改为忙等，以获得亚毫秒级精度
+SPIN_THRESHOLD = 0.002
+
+
+def sleep_until(deadline: float, clock: Callable[[], float] = time.perf_counter,
+                spin_threshold: float = SPIN_THRESHOLD) -> float:
+    """
+    等待到指定的单调时钟时刻（先 sleep，最后一小段忙等）
+
+    Returns:
+        float: 返回时相对截止时间的延迟（秒），截止时间已过时为正数
+    """
+    remaining = deadline - clock()
+    if remaining > spin_threshold:
+        time.sleep(remaining - spin_threshold)
+    while clock() < deadline:
+        pass
+    return clock() - deadline
+
+
+class VirtualClock:
+    """
+    虚拟时钟（模拟执行使用）
+
+    调用时返回当前虚拟时刻；等待只推进时钟而不真正休眠，
+    并分别累计等待时间和注入耗时，可在毫秒内模拟数小时的执行。
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.slept = 0.0
+        self.busy = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        """推进时钟（注入事件本身的耗时）"""
+        self.now += seconds
+        self.busy += seconds
+
+    def sleep_until(self, deadline: float) -> float:
+        """与 sleep_until 相同的约定：返回相对截止时间的延迟，虚拟时钟没有唤醒误差"""
+        if deadline > self.now:
+            self.slept += deadline - self.now
+            self.now = deadline
+            return 0.0
+        return self.now - deadline
+
+
+class RateReport(NamedTuple):
+    """实际速率与请求速率的对比"""
+    count: int
+    elapsed: float
+    requested_rate: float
+    achieved_rate: float
+    max_lateness: float
+
+    def describe(self) -> str:
+        requested = f"{self.requested_rate:.2f}" if self.requested_rate else "不限"
+        return (f"共 {self.count} 次，耗时 {self.elapsed:.3f} 秒，"
+                f"实际速率 {self.achieved_rate:.2f} 次/秒 (请求 {requested} 次/秒)，"
+                f"最大唤醒误差 {self.max_lateness * 1000:.3f} 毫秒")
+
+
+class DeadlineScheduler:
+    """
+    截止时间调度器
+
+    每次等待都基于上一个截止时间累加，而不是基于当前时刻，
+    因此点击注入本身的耗时会被后续等待吸收，长时间运行也不会漂移。
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter,
+                 spin_threshold: float = SPIN_THRESHOLD,
+                 sleeper: Optional[Callable[[float], float]] = None):
+        self.clock = clock
+        self.spin_threshold = spin_threshold
+        # 等待到指定时刻的函数（如 VirtualClock.sleep_until），默认真实休眠
+        self.sleeper = sleeper
+        self.origin: Optional[float] = None
+        self.deadline = 0.0
+        self.max_lateness = 0.0
+        # 累计实际等待的时间（不随 reset 清零，统计时取差值）
+        self.slept = 0.0
+
+    def reset(self):
+        """以当前时刻为起点重新开始调度"""
+        self.origin = self.deadline = self.clock()
+        self.max_lateness = 0.0
+
+    def wait(self, seconds: float) -> float:
+        """等待到 上一截止时间 + seconds，返回延迟（秒）"""
+        if self.origin is None:
+            self.reset()
+        self.deadline += seconds
+        before = self.clock()
+        on_time = before < self.deadline
+        if self.sleeper is not None:
+            lateness = self.sleeper(self.deadline)
+        else:
+            lateness = sleep_until(self.deadline, self.clock, self.spin_threshold)
+        # 只统计真正等待过的唤醒误差；截止时间已过说明动作本身超时，不计入
+        if on_time:
+            self.slept += self.deadline + lateness - before
+            if lateness > self.max_lateness:
+                self.max_lateness = lateness
+        return lateness
+
+    def advance(self, seconds: float):
+        """推进截止时间但不等待（用于自身已耗时的动作，如拖拽、移动）"""
+        if self.origin is None:
+            self.reset()
+        self.deadline += seconds
+
+    def elapsed(self) -> float:
+        """距调度起点的实际耗时"""
+        if self.origin is None:
+            return 0.0
+        return self.clock() - self.origin
+
+    def scheduled(self) -> float:
+        """距调度起点的计划耗时"""
+        if self.origin is None:
+            return 0.0
+        return self.deadline - self.origin
+
+    def report(self, count: int, interval: float, start: Optional[float] = None) -> RateReport:
+        """
+        生成速率报告
+
+        Args:
+            count: 已执行的动作次数
+            interval: 请求的动作间隔（秒）
+            start: 统计起点（时钟读数），默认为调度起点
+        """
+        if start is None:
+            elapsed = self.elapsed()
+        else:
+            elapsed = self.clock() - start
+        # N 次动作之间只有 N-1 个间隔
+        achieved = (count - 1) / elapsed if count > 1 and elapsed > 0 else 0.0
+        requested = 1.0 / interval if interval > 0 else 0.0
+        return RateReport(count, elapsed, requested, achieved, self.max_lateness)
+
+
+class RateLimiter:
+    """
+    吞吐量限制器（极速模式使用）
+
+    取代全局的 pyautogui.PAUSE：相邻两次注入至少间隔 1/max_rate 秒，
+    落后于计划时不会补发突发事件。
+    """
+
+    def __init__(self, max_rate: float, clock: Callable[[], float] = time.perf_counter,
+                 spin_threshold: float = SPIN_THRESHOLD,
+                 sleeper: Optional[Callable[[float], float]] = None):
+        if max_rate <= 0:
+            raise ValueError("max_rate 必须大于0")
+        self.max_rate = max_rate
+        self.period = 1.0 / max_rate
+        self.clock = clock
+        self.spin_threshold = spin_threshold
+        self.sleeper = sleeper
+        self.next_slot: Optional[float] = None
+        self.first: Optional[float] = None
+        self.last = 0.0
+        self.count = 0
+        # 累计等待注入时隙的时间
+        self.slept = 0.0
+
+    def acquire(self):
+        """等待下一个可用的注入时隙"""
+        now = self.clock()
+        if self.next_slot is not None and now < self.next_slot:
+            if self.sleeper is not None:
+                self.sleeper(self.next_slot)
+            else:
+                sleep_until(self.next_slot, self.clock, self.spin_threshold)
+            self.slept += self.next_slot - now
+            now = self.next_slot
+        if self.first is None:
+            self.first = now
+        self.last = now
+        self.next_slot = now + self.period
+        self.count += 1
+
+    def report(self) -> RateReport:
+        """生成实际吞吐量与目标吞吐量的对比报告"""
+        elapsed = self.last - self.first if self.first is not None else 0.0
+        achieved = (self.count - 1) / elapsed if self.count > 1 and elapsed > 0 else 0.0
+        return RateReport(self.count, elapsed, self.max_rate, achieved, 0.0)
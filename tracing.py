@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能剖析与时间线追踪
+--profile 同时生成 cProfile 统计文件和 Chrome trace-event JSON（可在 chrome://tracing 或 Perfetto 中打开），
+时间线上每个序列、动作、等待、注入后端调用和日志输出都是一个区间
+
+GUI 回放线程在设置了环境变量 ZMH_TRACE=文件路径 时把回放过程写成同样格式的时间线
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from backends import InputBackend
+from timing import sleep_until
+
+# GUI 回放时间线的输出路径
+TRACE_ENV = 'ZMH_TRACE'
+
+
+class Tracer:
+    """
+    收集 Chrome trace-event 格式的区间事件（"ph": "X"）
+
+    时间戳为相对创建时刻的微秒数；可被多个线程同时使用（list.append 是原子的）。
+    """
+
+    def __init__(self, path: Optional[str] = None, clock: Callable[[], float] = time.perf_counter):
+        self.path = path
+        self.clock = clock
+        self.origin = clock()
+        self.pid = os.getpid()
+        self.events: List[Dict] = []
+        self._threads: Dict[int, str] = {}
+
+    def complete(self, name: str, category: str, start: float, end: float, args: Optional[Dict] = None):
+        """记录一个已结束的区间（start/end 为时钟读数）"""
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event = {
+            'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': tid,
+            'ts': (start - self.origin) * 1_000_000, 'dur': (end - start) * 1_000_000,
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, self.clock(), args)
+
+    def sleeper(self, sleep: Optional[Callable[[float], float]] = None) -> Callable[[float], float]:
+        """
+        返回记录等待区间的 sleeper（DeadlineScheduler/RateLimiter 的 sleeper 参数）
+
+        截止时间已过、无需等待时不记录。
+        """
+        clock = self.clock
+        if sleep is None:
+            def sleep(deadline):
+                return sleep_until(deadline, clock)
+
+        def traced(deadline: float) -> float:
+            start = clock()
+            lateness = sleep(deadline)
+            if deadline > start:
+                self.complete('sleep', 'sleep', start, clock(), {'lateness_ms': lateness * 1000})
+            return lateness
+        return traced
+
+    def wrap_log(self, log: Callable[[str], None]) -> Callable[[str], None]:
+        """返回记录耗时的日志函数"""
+        def traced(message: str):
+            start = self.clock()
+            log(message)
+            self.complete('log', 'log', start, self.clock())
+        return traced
+
+    def write(self, path: Optional[str] = None) -> str:
+        """写出 trace JSON 文件，返回文件路径"""
+        path = path or self.path
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in self._threads.items()]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return path
+
+
+def tracer_from_env() -> Optional[Tracer]:
+    """设置了 ZMH_TRACE 环境变量时返回写入该路径的 Tracer"""
+    path = os.environ.get(TRACE_ENV)
+    return Tracer(path) if path else None
+
+
+class TracingBackend(InputBackend):
+    """把每次注入调用记录为时间线区间的后端包装"""
+
+    def __init__(self, backend: InputBackend, tracer: Tracer):
+        self.backend = backend
+        self.tracer = tracer
+        self.name = backend.name
+
+    def _call(self, name, method, *args, **kwargs):
+        clock = self.tracer.clock
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self.tracer.complete(name, 'backend', start, clock())
+
+    def configure(self, fail_safe=True, pause=0.1):
+        self.backend.configure(fail_safe=fail_safe, pause=pause)
+
+    def click(self, x, y, button='left', clicks=1, interval=0.0):
+        self._call('backend.click', self.backend.click, x, y, button=button, clicks=clicks, interval=interval)
+
+    def move(self, x, y, duration=0.0, pause=True):
+        self._call('backend.move', self.backend.move, x, y, duration=duration, pause=pause)
+
+    def mouse_down(self, x, y, button='left'):
+        self._call('backend.mouse_down', self.backend.mouse_down, x, y, button=button)
+
+    def mouse_up(self, x, y, button='left'):
+        self._call('backend.mouse_up', self.backend.mouse_up, x, y, button=button)
+
+    def drag(self, start_x, start_y, end_x, end_y, duration=0.0, button='left'):
+        self._call('backend.drag', self.backend.drag, start_x, start_y, end_x, end_y,
+                   duration=duration, button=button)
+
+    def scroll(self, x, y, dy, dx=0):
+        self._call('backend.scroll', self.backend.scroll, x, y, dy, dx)
+
+    def key_down(self, key):
+        self._call('backend.key_down', self.backend.key_down, key)
+
+    def key_up(self, key):
+        self._call('backend.key_up', self.backend.key_up, key)
+
+    def position(self):
+        return self._call('backend.position', self.backend.position)
+
+    def screen_size(self):
+        return self._call('backend.screen_size', self.backend.screen_size)
+
+    @contextmanager
+    def batch(self):
+        with self.tracer.span('backend.batch', 'backend'), self.backend.batch():
+            yield self
+
+    def close(self):
+        self.backend.close()
+
+    def __getattr__(self, name):
+        # 其余属性（如录制后端的 events、summary）直接使用被包装的后端
+        return getattr(self.backend, name)
+
+
+class _TracedStream:
+    """记录每次写入耗时的输出流（用于统计日志输出的开销）"""
+
+    def __init__(self, stream, tracer: Tracer):
+        self._stream = stream
+        self._tracer = tracer
+
+    def write(self, text):
+        start = self._tracer.clock()
+        try:
+            return self._stream.write(text)
+        finally:
+            self._tracer.complete('print', 'log', start, self._tracer.clock())
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class ProfileSession:
+    """
+    一次带剖析的运行
+
+    start() 开始 cProfile 并接管标准输出，stop() 结束并写出
+    PREFIX.prof（可用 python -m pstats 或 snakeviz 查看）和 PREFIX.trace.json。
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.tracer = Tracer(f"{prefix}.trace.json")
+        self.profiler = cProfile.Profile()
+        self._stdout = None
+        self._start = None
+
+    def start(self):
+        self._stdout = sys.stdout
+        sys.stdout = _TracedStream(sys.stdout, self.tracer)
+        self._start = self.tracer.clock()
+        self.profiler.enable()
+        return self
+
+    def stop(self):
+        """结束剖析并写出文件（可重复调用，只有第一次生效）"""
+        if self._start is None:
+            return
+        self.profiler.disable()
+        self.tracer.complete('run', 'run', self._start, self.tracer.clock())
+        self._start = None
+        sys.stdout = self._stdout
+        stats_path = f"{self.prefix}.prof"
+        try:
+            self.profiler.dump_stats(stats_path)
+            trace_path = self.tracer.write()
+        except OSError as e:
+            print(f"错误：无法写入剖析结果 - {e}")
+            return
+        print(f"剖析统计已写入 {stats_path}，时间线已写入 {trace_path}（可在 chrome://tracing 或 Perfetto 中打开）")